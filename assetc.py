@@ -0,0 +1,297 @@
+"""
+Offline asset compiler.
+
+Walks asset tree and converts sources into runtime ready files:
+
+    *.glsl          -> preprocessed (includes resolved) and validated shader;
+                       shared code goes to *.inc files, which are only included
+    *.png, *.jpg    -> prebuilt mipmap chain (mipmap.MipCache container)
+    *.obj           -> indexed interleaved mesh (x, y, z, u, v floats)
+
+Steps run in process pool. Build is incremental: manifest in output
+directory stores content hash of every source and its dependencies, so
+only changed inputs are rebuilt.
+
+Usage:
+
+    python assetc.py <source dir> <output dir> [-j 4] [--compression bc1]
+"""
+
+import os
+import re
+import sys
+import json
+import struct
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+MANIFEST = 'manifest.json'
+
+_include = re.compile(r'^\s*#\s*include\s+"([^"]+)"\s*$')
+
+
+class AssetError(Exception):
+    pass
+
+
+# --- Shaders -----------------------------------------------------------------
+
+def _read_lines(path: str):
+    try:
+        with open(path) as f:
+            return f.read().splitlines()
+    except OSError as e:
+        raise AssetError("cannot read %s: %s" % (path, e.strerror))
+
+
+def shader_dependencies(path: str, seen=None):
+    """ Returns list of files included by shader, recursively """
+    seen = set() if seen is None else seen
+    deps = []
+    lines = _read_lines(path)
+    for line in lines:
+        match = _include.match(line)
+        if match:
+            dep = os.path.normpath(os.path.join(os.path.dirname(path), match.group(1)))
+            if dep in seen:
+                continue
+            seen.add(dep)
+            deps.append(dep)
+            deps.extend(shader_dependencies(dep, seen))
+    return deps
+
+
+def preprocess_shader(path: str, stack=()):
+    """ Resolves includes; raises AssetError on include cycles and missing files """
+    if path in stack:
+        raise AssetError("include cycle: %s" % " -> ".join(stack + (path,)))
+    lines = _read_lines(path)
+    out = []
+    for line in lines:
+        match = _include.match(line)
+        if match:
+            dep = os.path.normpath(os.path.join(os.path.dirname(path), match.group(1)))
+            out.append(preprocess_shader(dep, stack + (path,)))
+        else:
+            out.append(line.rstrip())
+    return "\n".join(out)
+
+
+def validate_shader(source: str, path: str):
+    code = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    code = re.sub(r'//[^\n]*', '', code)
+    lines = [line.strip() for line in code.splitlines() if line.strip()]
+    if not lines or not lines[0].startswith('#version'):
+        raise AssetError("%s: shader must start with #version directive" % path)
+    if code.count('{') != code.count('}'):
+        raise AssetError("%s: unbalanced braces" % path)
+    if not re.search(r'\bvoid\s+main\s*\(', code):
+        raise AssetError("%s: main function is missing" % path)
+
+
+def build_shader(source: str, target: str, options: dict):
+    text = preprocess_shader(source)
+    validate_shader(text, source)
+    with open(target, 'w') as f:
+        f.write(text + "\n")
+
+
+# --- Textures ----------------------------------------------------------------
+
+def build_texture(source: str, target: str, options: dict):
+    import mipmap
+    from texture import read_image
+    chain = mipmap.build(read_image(source), options.get('mip_filter', 'box'),
+                         True, options.get('compression'))
+    with open(target, 'wb') as f:
+        f.write(mipmap.MipCache('').pack(chain))
+
+
+# --- Meshes ------------------------------------------------------------------
+
+_mesh_header = struct.Struct('<8sII')
+MESH_MAGIC = b'PYOGLMSH'
+
+
+def parse_obj(path: str):
+    """ Reads positions, texture coordinates and triangulated faces of OBJ file """
+    positions, texcoords, corners = [], [], []
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            if parts[0] == 'v':
+                positions.append([float(c) for c in parts[1:4]])
+            elif parts[0] == 'vt':
+                texcoords.append([float(c) for c in parts[1:3]])
+            elif parts[0] == 'f':
+                face = []
+                for corner in parts[1:]:
+                    refs = corner.split('/')
+                    p = int(refs[0])
+                    t = int(refs[1]) if len(refs) > 1 and refs[1] else 0
+                    face.append((p - 1 if p > 0 else len(positions) + p,
+                                 t - 1 if t > 0 else (len(texcoords) + t if t else -1)))
+                for i in range(1, len(face) - 1):
+                    corners.extend((face[0], face[i], face[i + 1]))
+    return (np.array(positions, dtype=np.float32).reshape(-1, 3),
+            np.array(texcoords, dtype=np.float32).reshape(-1, 2),
+            np.array(corners, dtype=np.int64).reshape(-1, 2))
+
+
+def optimize_mesh(positions, texcoords, corners):
+    """ Deduplicates (position, texcoord) pairs and numbers vertices by first use.
+
+    Returns interleaved float32 vertices (x, y, z, u, v) and uint32 indexes.
+    """
+    uv = np.zeros((len(corners), 2), dtype=np.float32)
+    has_uv = corners[:, 1] >= 0
+    uv[has_uv] = texcoords[corners[has_uv, 1]]
+    vertices = np.hstack([positions[corners[:, 0]], uv])
+    unique, first, inverse = np.unique(vertices, axis=0, return_index=True, return_inverse=True)
+    inverse = inverse.ravel()
+    # renumber unique vertices in order of first reference for better fetch locality
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return unique[order].astype(np.float32), rank[inverse].astype(np.uint32)
+
+
+def build_mesh(source: str, target: str, options: dict):
+    vertices, indexes = optimize_mesh(*parse_obj(source))
+    with open(target, 'wb') as f:
+        f.write(_mesh_header.pack(MESH_MAGIC, len(vertices), len(indexes)))
+        f.write(vertices.tobytes())
+        f.write(indexes.tobytes())
+
+
+def load_mesh(path: str):
+    """ Reads mesh built by compiler, returns (vertices, indexes) arrays """
+    with open(path, 'rb') as f:
+        content = f.read()
+    magic, n_vertices, n_indexes = _mesh_header.unpack_from(content)
+    if magic != MESH_MAGIC:
+        raise AssetError("not a mesh file: %s" % path)
+    offset = _mesh_header.size
+    vertices = np.frombuffer(content, np.float32, n_vertices * 5, offset)
+    indexes = np.frombuffer(content, np.uint32, n_indexes, offset + vertices.nbytes)
+    return vertices, indexes
+
+
+# --- Build -------------------------------------------------------------------
+
+# extension -> (step name, version, output extension, function)
+STEPS = {
+    '.glsl': ('shader', 1, '.glsl', build_shader),
+    '.png': ('texture', 2, '.mip', build_texture),
+    '.jpg': ('texture', 2, '.mip', build_texture),
+    '.jpeg': ('texture', 2, '.mip', build_texture),
+    '.obj': ('mesh', 1, '.mesh', build_mesh),
+}
+
+
+def _hash_files(paths):
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _run_step(ext, source, target, options):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = target + '.tmp'
+    STEPS[ext][3](source, tmp, options)
+    os.replace(tmp, target)
+    return target
+
+
+def plan(source_dir: str, output_dir: str, options: dict, manifest: dict):
+    """ Returns list of jobs (relative path, ext, source, target, record) to rebuild """
+    jobs = []
+    for root, _, files in os.walk(source_dir):
+        for name in sorted(files):
+            ext = os.path.splitext(name)[1].lower()
+            if ext not in STEPS:
+                continue
+            source = os.path.join(root, name)
+            rel = os.path.relpath(source, source_dir)
+            step, version, out_ext, _ = STEPS[ext]
+            try:
+                deps = shader_dependencies(source) if step == 'shader' else []
+                broken = False
+            except AssetError:
+                # step reports the error for this asset, other assets are still built
+                deps, broken = [], True
+            key = "%s:%d:%s:%s" % (step, version, json.dumps(options, sort_keys=True),
+                                   _hash_files([source] + deps))
+            target = os.path.join(output_dir, os.path.splitext(rel)[0] + out_ext)
+            record = {'key': key, 'step': step, 'output': os.path.relpath(target, output_dir),
+                      'deps': [os.path.relpath(d, source_dir) for d in deps]}
+            previous = manifest.get(rel)
+            if not broken and previous and previous['key'] == key and os.path.exists(target):
+                continue
+            jobs.append((rel, ext, source, target, record))
+    return jobs
+
+
+def build(source_dir: str, output_dir: str, jobs: int=None, options: dict=None, log=print):
+    """ Rebuilds changed assets and returns list of rebuilt relative paths """
+    options = options or {}
+    manifest_path = os.path.join(output_dir, MANIFEST)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        manifest = {}
+
+    todo = plan(source_dir, output_dir, options, manifest)
+    rebuilt, errors = [], []
+    if todo:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [(job, pool.submit(_run_step, job[1], job[2], job[3], options))
+                       for job in todo]
+            for (rel, _, _, _, record), future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    errors.append("%s: %s" % (rel, e))
+                    manifest.pop(rel, None)
+                    continue
+                manifest[rel] = record
+                rebuilt.append(rel)
+                log("built %s" % rel)
+
+    os.makedirs(output_dir, exist_ok=True)
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    if errors:
+        raise AssetError("\n".join(errors))
+    return rebuilt
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Compiles assets into runtime ready files.")
+    parser.add_argument('source')
+    parser.add_argument('output')
+    parser.add_argument('-j', '--jobs', type=int, default=None)
+    parser.add_argument('--mip-filter', choices=['box', 'kaiser'], default='box')
+    parser.add_argument('--compression', choices=['bc1', 'bc3'], default=None)
+    args = parser.parse_args(args)
+    options = {'mip_filter': args.mip_filter, 'compression': args.compression}
+    try:
+        rebuilt = build(args.source, args.output, args.jobs, options)
+    except AssetError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    print("%d asset(s) rebuilt" % len(rebuilt))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
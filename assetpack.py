@@ -0,0 +1,191 @@
+"""
+Single file asset pack.
+
+Layout of pack file:
+
+    header      magic, version, number of entries, offset of names table
+    index       one fixed size record per entry, sorted by name
+    names       UTF-8 entry names, referenced from index
+    payloads    entry contents, every one aligned to `ALIGNMENT` bytes
+
+Pack is memory-mapped when opened. Uncompressed entries are returned as
+`memoryview`s over mapped file without copying; compressed (zlib) ones
+are inflated on every read.
+
+Usage:
+
+    python assetpack.py <pack file> <file or directory>... [--compress]
+"""
+
+import os
+import sys
+import mmap
+import zlib
+import struct
+import argparse
+
+
+ALIGNMENT = 64
+COMPRESSED = 1
+
+_header = struct.Struct('<8sIIQ')
+# name offset, name length, payload offset, stored size, original size, flags
+_entry = struct.Struct('<QIQQQI')
+
+
+class PackError(Exception):
+    pass
+
+
+def entry_name(path: str):
+    """ Pack entry name for file path: normalized, with forward slashes """
+    return os.path.normpath(path).replace(os.sep, '/')
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class PackWriter:
+    """ Collects entries and writes them into pack file """
+
+    def __init__(self):
+        self._entries = {}
+
+    def add(self, name: str, data: bytes, compress: bool=False):
+        """ Adds entry; compressed copy is kept only if it is actually smaller """
+        data = bytes(data)
+        flags, stored = 0, data
+        if compress:
+            packed = zlib.compress(data, 9)
+            if len(packed) < len(data):
+                flags, stored = COMPRESSED, packed
+        self._entries[entry_name(name)] = (stored, len(data), flags)
+
+    def add_file(self, path: str, name: str=None, compress: bool=False):
+        with open(path, 'rb') as f:
+            self.add(name or path, f.read(), compress)
+
+    def write(self, path: str):
+        names = sorted(self._entries)
+        encoded = [name.encode('utf-8') for name in names]
+        names_offset = _header.size + _entry.size * len(names)
+        offset = _align(names_offset + sum(len(name) for name in encoded))
+
+        index, name_offset = [], names_offset
+        for name, raw in zip(names, encoded):
+            stored, size, flags = self._entries[name]
+            index.append(_entry.pack(name_offset, len(raw), offset, len(stored), size, flags))
+            name_offset += len(raw)
+            offset = _align(offset + len(stored))
+
+        with open(path, 'wb') as f:
+            f.write(_header.pack(AssetPack.magic, AssetPack.version, len(names), names_offset))
+            f.write(b''.join(index))
+            f.write(b''.join(encoded))
+            for name in names:
+                stored = self._entries[name][0]
+                f.write(b'\0' * (_align(f.tell()) - f.tell()))
+                f.write(stored)
+
+
+class AssetPack:
+    """ Read-only memory-mapped pack.
+
+    Entry names use forward slashes, e.g. 'shaders/vs.glsl'.
+    """
+
+    magic = b'PYOGLPAK'
+    version = 1
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise PackError("empty pack file: %s" % path)
+        self._view = memoryview(self._map)
+        magic, version, count, _ = _header.unpack_from(self._map)
+        if magic != self.magic or version != self.version:
+            self.close()
+            raise PackError("not an asset pack: %s" % path)
+        self._index = {}
+        for i in range(count):
+            record = _entry.unpack_from(self._map, _header.size + i * _entry.size)
+            name_offset, name_length = record[:2]
+            name = bytes(self._view[name_offset:name_offset + name_length]).decode('utf-8')
+            self._index[name] = record[2:]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __contains__(self, name):
+        return entry_name(name) in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def names(self):
+        return sorted(self._index)
+
+    def read(self, name: str):
+        """ Returns entry contents: memoryview over mapping, or bytes if entry is compressed """
+        try:
+            offset, stored, size, flags = self._index[entry_name(name)]
+        except KeyError:
+            raise PackError("no such entry in %s: %s" % (self.path, name))
+        data = self._view[offset:offset + stored]
+        if flags & COMPRESSED:
+            return zlib.decompress(data, bufsize=size)
+        return data
+
+    def close(self):
+        """ Closes mapping; all views returned by `read` must be released before """
+        if self._map is not None:
+            try:
+                self._view.release()
+                self._map.close()
+            except BufferError:
+                # pack stays usable, so it can be closed once entries are released
+                self._view = memoryview(self._map)
+                raise PackError("cannot close %s: entries are still referenced" % self.path)
+            self._map = None
+            self._file.close()
+
+
+def read_bytes(filename: str, pack: AssetPack=None):
+    """ Reads file contents from pack if given, from file system otherwise """
+    if pack is not None:
+        return pack.read(filename)
+    with open(filename, 'rb') as f:
+        return f.read()
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Creates asset pack from files.")
+    parser.add_argument('pack')
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('--compress', action='store_true')
+    args = parser.parse_args(args)
+    writer = PackWriter()
+    for path in args.paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    writer.add_file(os.path.join(root, name), compress=args.compress)
+        elif os.path.isfile(path):
+            writer.add_file(path, compress=args.compress)
+        else:
+            print("no such file: %s" % path, file=sys.stderr)
+            return 1
+    writer.write(args.pack)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
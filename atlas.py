@@ -0,0 +1,161 @@
+"""
+Packs many small images into few large textures (atlas pages) and
+remaps mesh texture coordinates into atlas space.
+"""
+
+import os
+from collections import namedtuple
+
+import numpy as np
+
+
+AtlasRegion = namedtuple("AtlasRegion", ['page', 'u0', 'v0', 'u1', 'v1'])
+
+
+class SkylinePacker:
+    """ Bottom-left skyline rectangle packer.
+
+    Skyline is kept as a list of (x, y, width) segments describing
+    the top edge of already placed rectangles.
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.skyline = [(0, 0, width)]
+
+    def _fit(self, index, w, h):
+        x, y, _ = self.skyline[index]
+        if x + w > self.width:
+            return None
+        remaining, i = w, index
+        while remaining > 0:
+            sx, sy, sw = self.skyline[i]
+            y = max(y, sy)
+            if y + h > self.height:
+                return None
+            remaining -= sw
+            i += 1
+        return y
+
+    def insert(self, w: int, h: int):
+        """ Finds place for rectangle and returns its (x, y) or None if it doesn't fit """
+        best, best_y, best_w = None, None, None
+        for i, (x, _, sw) in enumerate(self.skyline):
+            y = self._fit(i, w, h)
+            if y is None:
+                continue
+            if best is None or y < best_y or (y == best_y and sw < best_w):
+                best, best_y, best_w = i, y, sw
+        if best is None:
+            return None
+        x = self.skyline[best][0]
+        self._add(best, x, best_y + h, w)
+        return x, best_y
+
+    def _add(self, index, x, y, w):
+        self.skyline.insert(index, (x, y, w))
+        right = x + w
+        i = index + 1
+        while i < len(self.skyline):
+            sx, sy, sw = self.skyline[i]
+            if sx >= right:
+                break
+            if sx + sw <= right:
+                del self.skyline[i]
+                continue
+            self.skyline[i] = (right, sy, sx + sw - right)
+            break
+        merged = [self.skyline[0]]
+        for sx, sy, sw in self.skyline[1:]:
+            px, py, pw = merged[-1]
+            if py == sy:
+                merged[-1] = (px, py, pw + sw)
+            else:
+                merged.append((sx, sy, sw))
+        self.skyline = merged
+
+
+def _extrude(image, gutter):
+    """ Repeats border pixels `gutter` times so filtering doesn't bleed neighbours """
+    if not gutter:
+        return image
+    return np.pad(image, [(gutter, gutter), (gutter, gutter), (0, 0)], mode='edge')
+
+
+class Atlas:
+    """ Builds atlas pages from named RGBA images.
+
+    Every image is surrounded by `gutter` pixels copied from its border and
+    placed at position aligned to `align` pixels, so a few first mip levels
+    don't mix texels of neighbouring images.
+    """
+
+    def __init__(self, page_size: int=2048, gutter: int=2, align: int=4):
+        self.page_size = page_size
+        self.gutter = gutter
+        self.align = align
+        self.pages = []
+        self.regions = {}
+
+    def _aligned(self, n):
+        return -(-n // self.align) * self.align
+
+    def build(self, images: dict):
+        """ Packs images (name -> (height, width, 4) array) and returns regions.
+
+        Every build starts from empty pages; pages of previous build are dropped.
+        """
+        packers = []
+        self.pages = []
+        self.regions = {}
+        order = sorted(images, key=lambda name: images[name].shape[0], reverse=True)
+        for name in order:
+            image = images[name]
+            h, w = image.shape[:2]
+            slot_w = self._aligned(w + 2 * self.gutter)
+            slot_h = self._aligned(h + 2 * self.gutter)
+            if slot_w > self.page_size or slot_h > self.page_size:
+                raise ValueError("image doesn't fit atlas page: %s" % name)
+
+            for page, packer in enumerate(packers):
+                place = packer.insert(slot_w, slot_h)
+                if place is not None:
+                    break
+            else:
+                packers.append(SkylinePacker(self.page_size, self.page_size))
+                self.pages.append(np.zeros((self.page_size, self.page_size, 4), dtype=np.uint8))
+                page = len(packers) - 1
+                place = packers[page].insert(slot_w, slot_h)
+
+            x, y = place
+            g = self.gutter
+            self.pages[page][y:y + h + 2 * g, x:x + w + 2 * g] = _extrude(image, g)
+            size = float(self.page_size)
+            self.regions[name] = AtlasRegion(
+                page, (x + g) / size, (y + g) / size, (x + g + w) / size, (y + g + h) / size)
+        return self.regions
+
+    def save(self, directory: str, prefix: str='atlas'):
+        """ Writes pages as PNG files and returns their paths """
+        from PIL import Image
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for i, page in enumerate(self.pages):
+            path = os.path.join(directory, "%s_%d.png" % (prefix, i))
+            Image.fromarray(page).save(path)
+            paths.append(path)
+        return paths
+
+
+def remap_texcoords(vertices, region: AtlasRegion, stride: int=5, offset: int=3):
+    """ Returns copy of interleaved vertex array with texture coordinates moved into region.
+
+    Stride and offset are given in floats, defaults match (x, y, z, u, v)
+    layout used by GlutWindow. Coordinates are expected in [0, 1] range.
+    """
+    result = np.array(vertices, dtype=np.float32)
+    uv = result.reshape(-1, stride)[:, offset:offset + 2]
+    uv *= (region.u1 - region.u0, region.v1 - region.v0)
+    uv += (region.u0, region.v0)
+    return result
@@ -0,0 +1,45 @@
+"""
+Measures CPU cost of assigning lights to clusters.
+
+Usage (from repository root):
+
+    python -m benchmarks.bench_clustered [--radius 5] [--repeat 5]
+"""
+
+import time
+import argparse
+
+import numpy as np
+
+from pipeline import ProjParams
+from techniques.clustered import ClusterGrid, make_lights, to_view_space
+
+
+def bench(grid, count, radius, repeat):
+    rng = np.random.RandomState(count)
+    lights = make_lights(count)
+    lights['position'] = rng.uniform([-60, -40, 0], [60, 40, 110], (count, 3))
+    lights['radius'] = rng.uniform(0.5, 2.0, count) * radius
+    view = np.eye(4)
+    best, assigned = float('inf'), 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        grid_data, indexes = grid.assign(to_view_space(lights['position'], view), lights['radius'])
+        best = min(best, time.perf_counter() - start)
+        assigned = len(indexes)
+    print("%6d lights %8.2f ms %9d assignments %6.1f per cluster" %
+          (count, best * 1000, assigned, assigned / grid.size))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--radius', type=float, default=5.0)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    grid = ClusterGrid(ProjParams(1920, 1080, 1.0, 100.0, 60.0))
+    for count in (100, 1000, 2500, 5000, 10000):
+        bench(grid, count, args.radius, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Measures Python overhead of per-draw OpenGL calls with PyOpenGL wrappers
+and with raw functions of fastgl module.
+
+Usage (from repository root):
+
+    python -m benchmarks.bench_fastgl [--draws 20000] [--repeat 5] [--debug] [--window]
+
+Without `--window` no context is created: GLVND dispatches calls to no-op
+stubs, so timings are pure call overhead. Use `--window` with other
+OpenGL libraries, which need current context; vertex attribute pointers
+are set up in every draw only then, PyOpenGL cannot do that without
+context.
+"""
+
+import sys
+import time
+import ctypes
+import argparse
+
+import numpy as np
+from OpenGL import GL
+
+from fastgl import FastGL
+
+
+def draw(gl, matrix, attributes):
+    """ The same calls as one draw of GlutWindow """
+    gl.glUseProgram(0)
+    gl.glBindVertexArray(0)
+    if attributes:
+        gl.glEnableVertexAttribArray(0)
+        gl.glVertexAttribPointer(0, 3, GL.GL_FLOAT, GL.GL_FALSE, 20, ctypes.c_void_p(0))
+        gl.glVertexAttribPointer(1, 2, GL.GL_FLOAT, GL.GL_FALSE, 20, ctypes.c_void_p(12))
+    gl.glUniformMatrix4fv(0, 1, GL.GL_TRUE, matrix)
+    gl.glUniform3f(1, 1.0, 1.0, 1.0)
+    gl.glUniform1f(2, 0.5)
+    gl.glActiveTexture(GL.GL_TEXTURE0)
+    gl.glBindTexture(GL.GL_TEXTURE_2D, 0)
+    gl.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, 0)
+    gl.glDrawElements(GL.GL_TRIANGLES, 18, GL.GL_UNSIGNED_INT, ctypes.c_void_p(0))
+
+
+def measure(gl, matrix, attributes, draws, repeat):
+    """ Best time of single draw """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(draws):
+            draw(gl, matrix, attributes)
+        best = min(best, time.perf_counter() - start)
+    return best / draws
+
+
+class Namespace:
+
+    def __init__(self, functions):
+        self.__dict__.update(functions)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--draws', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--debug', action='store_true')
+    parser.add_argument('--window', action='store_true')
+    args = parser.parse_args()
+
+    if args.window:
+        from OpenGL import GLUT
+        GLUT.glutInit(sys.argv[:1])
+        GLUT.glutInitDisplayMode(GLUT.GLUT_DOUBLE | GLUT.GLUT_RGBA)
+        GLUT.glutCreateWindow(b"bench_fastgl")
+
+    fast = FastGL(debug=args.debug)
+    if fast.missing:
+        print("not resolved: %s" % ", ".join(fast.missing))
+    fast_gl = Namespace(fast.functions)
+    for name, matrix in (("float32", np.eye(4, dtype=np.float32)), ("float64", np.eye(4))):
+        wrapped = measure(GL, matrix, args.window, args.draws, args.repeat)
+        raw = measure(fast_gl, matrix, args.window, args.draws, args.repeat)
+        print("%s matrix: PyOpenGL %.2f us, fastgl %.2f us per draw (%.1fx)" %
+              (name, wrapped * 1e6, raw * 1e6, wrapped / raw))
+
+
+if __name__ == '__main__':
+    main()
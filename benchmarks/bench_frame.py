@@ -0,0 +1,40 @@
+"""
+Measures CPU cost of GlutWindow frame with null OpenGL backend.
+
+Usage (from repository root):
+
+    python -m benchmarks.bench_frame [--frames 2000]
+
+No display or GPU is needed: all GL and GLUT calls are no-ops, so the
+result is pure Python overhead of the render loop.
+"""
+
+import time
+import argparse
+
+import glutwindow
+from camera import Camera
+from nullgl import NullGL
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--frames', type=int, default=2000)
+    args = parser.parse_args()
+
+    with NullGL().install() as gl:
+        window = glutwindow.GlutWindow((1024, 768))
+        window.camera = Camera([0.0, 1.0, 0.0], [0.0, -0.5, 1.0], [0.0, 1.0, 0.0], 1024, 768)
+        window.on_display()
+        gl.calls.clear()
+        start = time.perf_counter()
+        for _ in range(args.frames):
+            window.on_display()
+        elapsed = time.perf_counter() - start
+
+    print("%d frames, %.1f us per frame, %.1f GL calls per frame" %
+          (args.frames, elapsed / args.frames * 1e6, sum(gl.calls.values()) / args.frames))
+
+
+if __name__ == '__main__':
+    main()
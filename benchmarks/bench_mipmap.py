@@ -0,0 +1,100 @@
+"""
+Measures mipmap chain build time and texture upload time.
+
+Usage (from repository root):
+
+    python -m benchmarks.bench_mipmap [--size 2048] [--repeat 3] [--upload]
+
+Upload timings need a display and OpenGL context, so they are measured
+only when `--upload` flag is given.
+"""
+
+import sys
+import time
+import argparse
+
+import numpy as np
+
+import mipmap
+
+
+def timeit(func, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_build(image, repeat):
+    chains = {}
+    for mip_filter in ('box', 'kaiser'):
+        for compression in (None, 'bc1', 'bc3'):
+            elapsed, chain = timeit(
+                lambda: mipmap.build(image, mip_filter, True, compression), repeat)
+            size = sum(len(level.data) for level in chain.levels)
+            print("build  %-6s %-4s %8.1f ms %10d bytes" %
+                  (mip_filter, compression or 'raw', elapsed * 1000, size))
+            chains[(mip_filter, compression)] = chain
+    return chains
+
+
+def bench_upload(image, chains, repeat):
+    from OpenGL.GL import (glGenTextures, glBindTexture, glTexImage2D, glCompressedTexImage2D,
+                           glGenerateMipmap, glDeleteTextures, glFinish,
+                           GL_TEXTURE_2D, GL_RGBA, GL_UNSIGNED_BYTE)
+    from OpenGL.GLUT import (glutInit, glutInitDisplayMode, glutCreateWindow,
+                             GLUT_RGBA, GLUT_3_2_CORE_PROFILE)
+
+    glutInit(sys.argv[:1])
+    glutInitDisplayMode(GLUT_RGBA | GLUT_3_2_CORE_PROFILE)
+    glutCreateWindow(b"bench_mipmap")
+
+    def upload_runtime():
+        texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, texture)
+        h, w = image.shape[:2]
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, w, h, 0, GL_RGBA, GL_UNSIGNED_BYTE, image)
+        glGenerateMipmap(GL_TEXTURE_2D)
+        glFinish()
+        glDeleteTextures([texture])
+
+    def upload_prebuilt(chain):
+        texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, texture)
+        for i, level in enumerate(chain.levels):
+            if chain.compression:
+                glCompressedTexImage2D(GL_TEXTURE_2D, i, mipmap.COMPRESSION_FORMATS[chain.compression],
+                                       level.width, level.height, 0, len(level.data), level.data)
+            else:
+                glTexImage2D(GL_TEXTURE_2D, i, GL_RGBA, level.width, level.height,
+                             0, GL_RGBA, GL_UNSIGNED_BYTE, level.data)
+        glFinish()
+        glDeleteTextures([texture])
+
+    elapsed, _ = timeit(upload_runtime, repeat)
+    print("upload level 0 + glGenerateMipmap %8.1f ms" % (elapsed * 1000))
+    for compression in (None, 'bc1', 'bc3'):
+        chain = chains[('box', compression)]
+        elapsed, _ = timeit(lambda: upload_prebuilt(chain), repeat)
+        print("upload prebuilt %-4s %8.1f ms" % (compression or 'raw', elapsed * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=2048)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--upload', action='store_true')
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(0)
+    image = rng.randint(0, 256, size=(args.size, args.size, 4)).astype(np.uint8)
+    chains = bench_build(image, args.repeat)
+    if args.upload:
+        bench_upload(image, chains, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -16,13 +16,18 @@ class Camera:
 
     Configured camera position and orientation are used then
     in rendering pipeline.
+
+    Mouse motion events only accumulate rotation angles and edge states;
+    orientation vectors are recomputed once, when camera is rendered (or
+    its orientation is requested). Set `coalesce_mouse` to False to update
+    orientation on every event.
     """
 
     step_size = 1
     margin = 100
 
     def __init__(self, pos, target, up, window_width, window_height,
-                 warp_pointer=glut_warp_pointer):
+                 warp_pointer=glut_warp_pointer, coalesce_mouse: bool=True):
         self._pos = np.array(pos)
         self._target = normalize(np.array(target))
         self._up = normalize(np.array(up))
@@ -37,9 +42,14 @@ class Camera:
         self._mouse_pos_x = window_width // 2
         self._mouse_pos_y = window_height // 2
         self._warp_pointer = warp_pointer
+        self._pending_update = False
+        self.coalesce_mouse = coalesce_mouse
+        self.mouse_events = 0
+        self.camera_updates = 0
         self.setup()
 
     def setup(self):
+        self.apply_pending()
         # horizontal target
         h_target = np.array([self._target[0], 0, self._target[2]])
         h_target = normalize(h_target)
@@ -67,14 +77,23 @@ class Camera:
 
     @property
     def target(self):
+        self.apply_pending()
         return self._target
 
     @property
     def up(self):
+        self.apply_pending()
         return self._up
 
+    @property
+    def moving(self):
+        """ True while mouse pointer rests on screen edge and camera keeps turning """
+        return (self._on_left_edge or self._on_right_edge or
+                self._on_upper_edge or self._on_lower_edge)
+
     def keyboard(self, key):
         """ Moving camera position in horizontal plane relative to camera's target vector"""
+        self.apply_pending()
 
         if key == GLUT_KEY_UP:
             self._pos += (self._target * self.step_size)
@@ -127,9 +146,19 @@ class Camera:
             self._on_upper_edge = False
             self._on_lower_edge = False
 
-        self.update()
+        self.mouse_events += 1
+        if self.coalesce_mouse:
+            self._pending_update = True
+        else:
+            self.update()
+
+    def apply_pending(self):
+        """ Recomputes orientation if mouse has moved since last update """
+        if self._pending_update:
+            self.update()
 
     def render(self):
+        """ Turns camera if mouse is on screen edge; returns True if camera changed """
         update = False
         edge_step = 0.5
 
@@ -149,8 +178,10 @@ class Camera:
             self._v_angle += edge_step
             update = True
 
-        if update:
+        if update or self._pending_update:
             self.update()
+            update = True
+        return update
 
     def update(self):
         """ Applies changes of camera position and rotation """
@@ -168,4 +199,6 @@ class Camera:
         view = normalize(view)
 
         self._target = view
-        self._up = normalize(np.cross(self._target, h_axis))
\ No newline at end of file
+        self._up = normalize(np.cross(self._target, h_axis))
+        self._pending_update = False
+        self.camera_updates += 1
\ No newline at end of file
@@ -0,0 +1,166 @@
+"""
+Render command buffers.
+
+Worker threads record draw, bind and uniform commands into compact
+array backed buffers; the thread which owns OpenGL context replays them
+in submission order. No OpenGL calls are made while recording.
+"""
+
+import ctypes
+import threading
+
+import numpy as np
+
+
+# command codes
+(BIND_PROGRAM, BIND_VAO, BIND_BUFFER, BIND_TEXTURE, ENABLE_ATTRIB, DISABLE_ATTRIB,
+ ATTRIB_POINTER, UNIFORM_1I, UNIFORM_1F, UNIFORM_3F, UNIFORM_MATRIX4,
+ DRAW_ARRAYS, DRAW_ELEMENTS) = range(13)
+
+_command = np.dtype([('op', np.int32), ('a', np.int64), ('b', np.int64),
+                     ('c', np.int64), ('d', np.int64)])
+
+
+class CommandBuffer:
+    """ Growable array of fixed size commands plus pool of float arguments.
+
+    Every command is (op, a, b, c, d) tuple of integers; float arguments
+    (uniform values and matrices) are stored in payload pool and commands
+    refer to them by offset.
+    """
+
+    def __init__(self, capacity: int=256):
+        self._commands = np.zeros(capacity, dtype=_command)
+        self._payload = np.zeros(capacity * 4, dtype=np.float32)
+        self._count = 0
+        self._payload_size = 0
+
+    def __len__(self):
+        return self._count
+
+    def clear(self):
+        self._count = 0
+        self._payload_size = 0
+
+    def _push(self, op, a=0, b=0, c=0, d=0):
+        if self._count == len(self._commands):
+            self._commands = np.resize(self._commands, 2 * len(self._commands))
+        self._commands[self._count] = (op, a, b, c, d)
+        self._count += 1
+
+    def _push_floats(self, values):
+        values = np.asarray(values, dtype=np.float32).ravel()
+        start, end = self._payload_size, self._payload_size + len(values)
+        if end > len(self._payload):
+            payload = np.zeros(max(end, 2 * len(self._payload)), dtype=np.float32)
+            payload[:start] = self._payload[:start]
+            self._payload = payload
+        self._payload[start:end] = values
+        self._payload_size = end
+        return start
+
+    def bind_program(self, program):
+        self._push(BIND_PROGRAM, program)
+
+    def bind_vao(self, vao):
+        self._push(BIND_VAO, vao)
+
+    def bind_buffer(self, target, buffer):
+        self._push(BIND_BUFFER, target, buffer)
+
+    def bind_texture(self, texture_unit, target, texture):
+        self._push(BIND_TEXTURE, texture_unit, target, texture)
+
+    def enable_attrib(self, index):
+        self._push(ENABLE_ATTRIB, index)
+
+    def disable_attrib(self, index):
+        self._push(DISABLE_ATTRIB, index)
+
+    def attrib_pointer(self, index, size, stride, offset):
+        """ Float vertex attribute located in currently bound array buffer """
+        self._push(ATTRIB_POINTER, index, size, stride, offset)
+
+    def uniform_1i(self, location, value):
+        self._push(UNIFORM_1I, location, value)
+
+    def uniform_1f(self, location, value):
+        self._push(UNIFORM_1F, location, self._push_floats([value]))
+
+    def uniform_3f(self, location, x, y, z):
+        self._push(UNIFORM_3F, location, self._push_floats([x, y, z]))
+
+    def uniform_matrix4(self, location, matrix):
+        """ Row-major matrix (or stack of them), uploaded with transposition like in Technique """
+        matrix = np.asarray(matrix, dtype=np.float32)
+        count = matrix.size // 16
+        self._push(UNIFORM_MATRIX4, location, self._push_floats(matrix), count)
+
+    def draw_arrays(self, mode, first, count):
+        self._push(DRAW_ARRAYS, mode, first, count)
+
+    def draw_elements(self, mode, count, index_type, offset=0):
+        self._push(DRAW_ELEMENTS, mode, count, index_type, offset)
+
+    def execute(self, gl=None):
+        """ Issues recorded commands; must be called on OpenGL thread.
+
+        Argument `gl` is a module providing OpenGL functions (OpenGL.GL by default).
+        """
+        if gl is None:
+            from OpenGL import GL as gl
+        payload = self._payload
+        for op, a, b, c, d in self._commands[:self._count].tolist():
+            if op == DRAW_ELEMENTS:
+                gl.glDrawElements(a, b, c, ctypes.c_void_p(d))
+            elif op == UNIFORM_MATRIX4:
+                gl.glUniformMatrix4fv(a, c, gl.GL_TRUE, payload[b:b + 16 * c])
+            elif op == BIND_TEXTURE:
+                gl.glActiveTexture(a)
+                gl.glBindTexture(b, c)
+            elif op == BIND_BUFFER:
+                gl.glBindBuffer(a, b)
+            elif op == ATTRIB_POINTER:
+                gl.glVertexAttribPointer(a, b, gl.GL_FLOAT, gl.GL_FALSE, c, ctypes.c_void_p(d))
+            elif op == ENABLE_ATTRIB:
+                gl.glEnableVertexAttribArray(a)
+            elif op == DISABLE_ATTRIB:
+                gl.glDisableVertexAttribArray(a)
+            elif op == UNIFORM_1I:
+                gl.glUniform1i(a, b)
+            elif op == UNIFORM_1F:
+                gl.glUniform1f(a, float(payload[b]))
+            elif op == UNIFORM_3F:
+                x, y, z = payload[b:b + 3].tolist()
+                gl.glUniform3f(a, x, y, z)
+            elif op == BIND_PROGRAM:
+                gl.glUseProgram(a)
+            elif op == BIND_VAO:
+                gl.glBindVertexArray(a)
+            elif op == DRAW_ARRAYS:
+                gl.glDrawArrays(a, b, c)
+
+
+class CommandQueue:
+    """ Collects buffers recorded by worker threads.
+
+    Buffers are replayed ordered by `order` given on submission (e.g. index
+    of scene chunk), not by the time recording has finished.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._submitted = []
+
+    def submit(self, order, buffer: CommandBuffer):
+        with self._lock:
+            self._submitted.append((order, buffer))
+
+    def execute(self, gl=None):
+        """ Replays and forgets all submitted buffers; returns them for reuse """
+        with self._lock:
+            submitted, self._submitted = self._submitted, []
+        submitted.sort(key=lambda item: item[0])
+        for _, buffer in submitted:
+            buffer.execute(gl)
+        return [buffer for _, buffer in submitted]
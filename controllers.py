@@ -0,0 +1,232 @@
+"""
+Camera controllers with cached view matrices.
+
+Every controller keeps its state in a small array of floats and
+recomputes view matrix only after state was changed. Controllers can be
+passed to `Pipeline.set_camera` directly.
+"""
+
+import math
+from array import array
+
+import numpy as np
+
+from utils import to_radian
+
+
+def _quat_mul(a, b):
+    ax, ay, az, aw = a
+    bx, by, bz, bw = b
+    return (aw*bx + ax*bw + ay*bz - az*by,
+            aw*by + ay*bw + az*bx - ax*bz,
+            aw*bz + az*bw + ax*by - ay*bx,
+            aw*bw - ax*bx - ay*by - az*bz)
+
+
+def _quat_rotate(q, v):
+    """ Rotates vector v by unit quaternion q """
+    x, y, z, w = q
+    vx, vy, vz = v
+    # t = 2 * cross(q.xyz, v)
+    tx = 2.0 * (y*vz - z*vy)
+    ty = 2.0 * (z*vx - x*vz)
+    tz = 2.0 * (x*vy - y*vx)
+    return (vx + w*tx + y*tz - z*ty,
+            vy + w*ty + z*tx - x*tz,
+            vz + w*tz + x*ty - y*tx)
+
+
+def _forward(yaw, pitch):
+    """ Unit "look at" vector for angles given in degrees; zero yaw looks along Z """
+    yaw, pitch = to_radian(yaw), to_radian(pitch)
+    cp = math.cos(pitch)
+    return cp * math.sin(yaw), math.sin(pitch), cp * math.cos(yaw)
+
+
+class CameraController:
+    """ Base class of controllers.
+
+    Subclasses describe their state with `fields` and implement
+    `_orientation` returning camera position and its (right, up, look at)
+    unit vectors.
+    """
+
+    __slots__ = ('_state', '_view', '_dirty', 'version')
+
+    fields = ()
+
+    def __init__(self, *values):
+        self._state = array('d', values)
+        self._view = np.eye(4)
+        self._dirty = True
+        self.version = 0
+
+    def _changed(self):
+        self._dirty = True
+        self.version += 1
+
+    def _orientation(self):
+        raise NotImplementedError()
+
+    @property
+    def pos(self):
+        return self._orientation()[0]
+
+    @property
+    def view_matrix(self):
+        """ World -> camera transformation, recomputed only if state changed """
+        if self._dirty:
+            pos, u, v, n = self._orientation()
+            view = self._view
+            for row, axis in enumerate((u, v, n)):
+                view[row, :3] = axis
+                view[row, 3] = -(axis[0]*pos[0] + axis[1]*pos[1] + axis[2]*pos[2])
+            self._dirty = False
+        return self._view
+
+
+def _basis(n, world_up=(0.0, 1.0, 0.0)):
+    """ Right and up vectors for look at vector n, same handedness as Matrix4x4.camera_rotation """
+    ux, uy, uz = world_up
+    nx, ny, nz = n
+    rx, ry, rz = uy*nz - uz*ny, uz*nx - ux*nz, ux*ny - uy*nx
+    length = math.sqrt(rx*rx + ry*ry + rz*rz) or 1.0
+    rx, ry, rz = rx / length, ry / length, rz / length
+    return (rx, ry, rz), (ny*rz - nz*ry, nz*rx - nx*rz, nx*ry - ny*rx)
+
+
+class FPSController(CameraController):
+    """ First person camera: position plus yaw and pitch angles (degrees) """
+
+    __slots__ = ()
+
+    fields = ('x', 'y', 'z', 'yaw', 'pitch')
+    max_pitch = 89.0
+
+    def __init__(self, pos=(0.0, 0.0, 0.0), yaw=0.0, pitch=0.0):
+        super(FPSController, self).__init__(*pos, yaw, pitch)
+
+    def rotate(self, d_yaw, d_pitch):
+        if not d_yaw and not d_pitch:
+            return
+        s = self._state
+        s[3] = (s[3] + d_yaw) % 360.0
+        s[4] = max(-self.max_pitch, min(self.max_pitch, s[4] + d_pitch))
+        self._changed()
+
+    def move(self, forward=0.0, right=0.0, up=0.0):
+        """ Moves camera relative to its horizontal orientation """
+        if not forward and not right and not up:
+            return
+        s = self._state
+        yaw = to_radian(s[3])
+        sy, cy = math.sin(yaw), math.cos(yaw)
+        s[0] += forward * sy + right * cy
+        s[1] += up
+        s[2] += forward * cy - right * sy
+        self._changed()
+
+    def _orientation(self):
+        s = self._state
+        n = _forward(s[3], s[4])
+        u, v = _basis(n)
+        return (s[0], s[1], s[2]), u, v, n
+
+
+class OrbitController(CameraController):
+    """ Camera looking at center point from given distance and angles (degrees) """
+
+    __slots__ = ()
+
+    fields = ('cx', 'cy', 'cz', 'distance', 'yaw', 'pitch')
+    max_pitch = 89.0
+    min_distance = 1e-3
+
+    def __init__(self, center=(0.0, 0.0, 0.0), distance=5.0, yaw=0.0, pitch=0.0):
+        super(OrbitController, self).__init__(*center, distance, yaw, pitch)
+
+    def rotate(self, d_yaw, d_pitch):
+        if not d_yaw and not d_pitch:
+            return
+        s = self._state
+        s[4] = (s[4] + d_yaw) % 360.0
+        s[5] = max(-self.max_pitch, min(self.max_pitch, s[5] + d_pitch))
+        self._changed()
+
+    def zoom(self, factor):
+        if factor == 1.0:
+            return
+        s = self._state
+        s[3] = max(self.min_distance, s[3] * factor)
+        self._changed()
+
+    def pan(self, dx, dy):
+        """ Moves center in camera plane """
+        if not dx and not dy:
+            return
+        _, u, v, _ = self._orientation()
+        s = self._state
+        for i in range(3):
+            s[i] += u[i] * dx + v[i] * dy
+        self._changed()
+
+    def _orientation(self):
+        s = self._state
+        n = _forward(s[4], s[5])
+        u, v = _basis(n)
+        d = s[3]
+        return (s[0] - n[0]*d, s[1] - n[1]*d, s[2] - n[2]*d), u, v, n
+
+
+class TrackballController(CameraController):
+    """ Camera rotating freely around center, orientation kept as quaternion """
+
+    __slots__ = ()
+
+    fields = ('cx', 'cy', 'cz', 'distance', 'qx', 'qy', 'qz', 'qw')
+
+    def __init__(self, center=(0.0, 0.0, 0.0), distance=5.0, rotation=(0.0, 0.0, 0.0, 1.0)):
+        super(TrackballController, self).__init__(*center, distance, *rotation)
+
+    @staticmethod
+    def _project(x, y):
+        """ Maps point from [-1, 1] square onto virtual trackball sphere """
+        d = x*x + y*y
+        if d <= 0.5:
+            return x, y, math.sqrt(1.0 - d)
+        return x, y, 0.5 / math.sqrt(d)
+
+    def drag(self, x0, y0, x1, y1):
+        """ Rotates camera by mouse drag given in normalized device coordinates """
+        if x0 == x1 and y0 == y1:
+            return
+        a, b = self._project(x0, y0), self._project(x1, y1)
+        # dragging rotates the scene, so the camera turns the opposite way
+        ax, ay, az = b[1]*a[2] - b[2]*a[1], b[2]*a[0] - b[0]*a[2], b[0]*a[1] - b[1]*a[0]
+        length = math.sqrt(ax*ax + ay*ay + az*az)
+        if length < 1e-12:
+            return
+        cos_angle = (a[0]*b[0] + a[1]*b[1] + a[2]*b[2]) / (
+            math.sqrt(sum(c*c for c in a)) * math.sqrt(sum(c*c for c in b)))
+        half = 0.5 * math.acos(max(-1.0, min(1.0, cos_angle)))
+        k = math.sin(half) / length
+        s = self._state
+        q = _quat_mul(tuple(s[4:8]), (ax*k, ay*k, az*k, math.cos(half)))
+        norm = math.sqrt(sum(c*c for c in q))
+        s[4:8] = array('d', (c / norm for c in q))
+        self._changed()
+
+    def zoom(self, factor):
+        if factor == 1.0:
+            return
+        self._state[3] *= factor
+        self._changed()
+
+    def _orientation(self):
+        s = self._state
+        q = tuple(s[4:8])
+        u = _quat_rotate(q, (1.0, 0.0, 0.0))
+        v = _quat_rotate(q, (0.0, 1.0, 0.0))
+        n = _quat_rotate(q, (0.0, 0.0, 1.0))
+        d = s[3]
+        return (s[0] - n[0]*d, s[1] - n[1]*d, s[2] - n[2]*d), u, v, n
@@ -0,0 +1,181 @@
+"""
+Fast dispatch of per-frame OpenGL calls.
+
+Every PyOpenGL call goes through argument conversion, error checking and
+logging wrappers, which for simple binds and uniforms cost several times
+more than the call itself. This module resolves raw entry points of the
+hot functions once with ctypes and puts them into module namespaces
+instead of PyOpenGL wrappers (see gltrace.patch_modules), so state
+changes and draws are single foreign calls. Functions with integer
+arguments only are called without argument types, which halves cost of
+the call; arguments ctypes cannot pass as they are (e.g. NumPy scalars
+returned by glGenBuffers) are converted to int on slow path.
+
+Pointer arguments take ctypes objects (arrays, pointers, c_void_p
+offsets, None) or NumPy arrays; C contiguous float32 arrays are passed
+without copy, other arrays are converted on every call. Errors are
+checked with glGetError after every call only in debug mode, which is
+enabled by PYOGL_GL_DEBUG environment variable.
+
+    FastGL().install()      # after modules to patch were imported
+
+Entry points do not depend on context with GLX and EGL; on Windows
+functions newer than OpenGL 1.1 resolve only when context is current.
+"""
+
+import os
+import ctypes
+
+import numpy as np
+
+from gltrace import DEFAULT_MODULES, patch_modules, restore
+
+
+DEBUG = bool(os.environ.get("PYOGL_GL_DEBUG"))
+
+_enum, _uint, _int, _sizei = ctypes.c_uint, ctypes.c_uint, ctypes.c_int, ctypes.c_int
+_float, _boolean, _pointer = ctypes.c_float, ctypes.c_ubyte, ctypes.c_void_p
+
+# name: (restype, argtypes)
+SIGNATURES = {
+    'glUseProgram': (None, (_uint,)),
+    'glBindVertexArray': (None, (_uint,)),
+    'glBindBuffer': (None, (_enum, _uint)),
+    'glActiveTexture': (None, (_enum,)),
+    'glBindTexture': (None, (_enum, _uint)),
+    'glEnableVertexAttribArray': (None, (_uint,)),
+    'glDisableVertexAttribArray': (None, (_uint,)),
+    'glVertexAttribPointer': (None, (_uint, _int, _enum, _boolean, _sizei, _pointer)),
+    'glDrawArrays': (None, (_enum, _int, _sizei)),
+    'glDrawElements': (None, (_enum, _sizei, _enum, _pointer)),
+    'glDrawArraysInstanced': (None, (_enum, _int, _sizei, _sizei)),
+    'glDrawElementsInstanced': (None, (_enum, _sizei, _enum, _pointer, _sizei)),
+    'glUniform1i': (None, (_int, _int)),
+    'glUniform2i': (None, (_int, _int, _int)),
+    'glUniform3i': (None, (_int, _int, _int, _int)),
+    'glUniform1f': (None, (_int, _float)),
+    'glUniform2f': (None, (_int, _float, _float)),
+    'glUniform3f': (None, (_int, _float, _float, _float)),
+    'glUniform4f': (None, (_int, _float, _float, _float, _float)),
+    'glUniform1fv': (None, (_int, _sizei, _pointer)),
+    'glUniform3fv': (None, (_int, _sizei, _pointer)),
+    'glUniform4fv': (None, (_int, _sizei, _pointer)),
+    'glUniformMatrix3fv': (None, (_int, _sizei, _boolean, _pointer)),
+    'glUniformMatrix4fv': (None, (_int, _sizei, _boolean, _pointer)),
+}
+
+# functions which last argument is GLfloat array
+FLOAT_ARRAYS = {'glUniform1fv', 'glUniform3fv', 'glUniform4fv', 'glUniformMatrix3fv', 'glUniformMatrix4fv'}
+
+_integers = (ctypes.c_uint, ctypes.c_int, ctypes.c_ubyte)
+_float32 = np.dtype(np.float32)
+
+
+def load_function(name: str, restype, argtypes):
+    """ Raw ctypes function of OpenGL entry point, None if it is not available """
+    from OpenGL import platform
+    library = platform.PLATFORM.GL
+    function_type = platform.PLATFORM.functionTypeFor(library)(restype, *argtypes)
+    try:
+        address = ctypes.cast(getattr(library, name), ctypes.c_void_p).value
+    except AttributeError:
+        # not exported by library, e.g. functions newer than OpenGL 1.1 on Windows
+        address = platform.PLATFORM.getExtensionProcedure(name.encode())
+    if not address:
+        return None
+    return function_type(address)
+
+
+def float_array(value):
+    """ Argument for GLfloat array parameter """
+    if isinstance(value, np.ndarray):
+        if value.dtype != _float32 or not value.flags.c_contiguous:
+            value = np.ascontiguousarray(value, dtype=np.float32)
+        # ctypes object sharing memory with array keeps it alive during call
+        try:
+            return ctypes.byref(ctypes.c_char.from_buffer(value))
+        except TypeError:  # read-only array
+            return ctypes.byref(ctypes.c_char.from_buffer(value.copy()))
+    if isinstance(value, (list, tuple)):
+        return float_array(np.array(value, dtype=np.float32))
+    return value
+
+
+class FastGL:
+    """ Raw OpenGL functions which replace PyOpenGL ones in module namespaces.
+
+    Argument `loader(name, restype, argtypes)` returns callable for
+    entry point or None (load_function by default); `debug` turns on
+    glGetError check after every call, DEBUG by default. Functions which
+    cannot be resolved are left to PyOpenGL and listed in `missing`.
+    """
+
+    def __init__(self, debug: bool=None, loader=None):
+        self.debug = DEBUG if debug is None else debug
+        loader = loader or load_function
+        self.functions = {}
+        self.missing = []
+        self._patches = []
+        self._get_error = loader('glGetError', _enum, ()) if self.debug else None
+        for name, (restype, argtypes) in SIGNATURES.items():
+            untyped = all(argtype in _integers for argtype in argtypes)
+            function = loader(name, restype, () if untyped else argtypes)
+            if function is None:
+                self.missing.append(name)
+                continue
+            if untyped:
+                function = self._with_integers(function)
+            elif name in FLOAT_ARRAYS:
+                function = self._with_float_array(function, len(argtypes))
+            if self._get_error is not None:
+                function = self._checked(name, function)
+            self.functions[name] = function
+
+    @staticmethod
+    def _with_integers(function):
+        def call(*args):
+            try:
+                return function(*args)
+            except ctypes.ArgumentError:
+                return function(*map(int, args))
+        return call
+
+    @staticmethod
+    def _with_float_array(function, arguments):
+        if arguments == 4:  # glUniformMatrix*fv
+            def call(location, count, transpose, value):
+                return function(location, count, transpose, float_array(value))
+        else:
+            def call(location, count, value):
+                return function(location, count, float_array(value))
+        return call
+
+    def _checked(self, name, function):
+        get_error = self._get_error
+
+        def call(*args):
+            result = function(*args)
+            error = get_error()
+            if error:
+                from OpenGL.error import GLError
+                raise GLError(err=error, baseOperation=name, cArguments=args)
+            return result
+
+        call.__name__ = name
+        return call
+
+    def install(self, modules=DEFAULT_MODULES):
+        """ Replaces PyOpenGL functions of modules (names or objects) with raw ones """
+        self._patches.extend(patch_modules(modules, lambda name, original: self.functions.get(name),
+                                           list(self.functions)))
+        return self
+
+    def uninstall(self):
+        restore(self._patches)
+        self._patches = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.uninstall()
@@ -35,53 +35,44 @@
 # This source has been modified from its original form by the vispy dev team
 
 import os
+import ctypes
 import ctypes.util
 from ctypes import (Structure, POINTER, CFUNCTYPE, byref, c_char_p, c_int,
-                    c_uint, c_double, c_float, c_ushort)
+                    c_uint, c_double, c_float, c_ushort, c_ubyte, c_void_p)
 
+import numpy as np
 
-_glfw_file = None
 
-# First if there is an environment variable pointing to the library
-if 'GLFW_LIBRARY' in os.environ:
-    if os.path.exists(os.environ['GLFW_LIBRARY']):
-        _glfw_file = os.path.realpath(os.environ['GLFW_LIBRARY'])
+def _find_library():
+    # First if there is an environment variable pointing to the library
+    if 'GLFW_LIBRARY' in os.environ:
+        if os.path.exists(os.environ['GLFW_LIBRARY']):
+            return os.path.realpath(os.environ['GLFW_LIBRARY'])
 
-# Else, try to find it
-if _glfw_file is None:
-    order = ['glfw', 'glfw3']
-    for check in order:
-        _glfw_file = ctypes.util.find_library(check)
-        if _glfw_file is not None:
-            break
+    # Else, try to find it
+    for check in ('glfw', 'glfw3'):
+        path = ctypes.util.find_library(check)
+        if path is not None:
+            return path
 
-# Else, we failed and exit
-if _glfw_file is None:
+    # Else, we failed and exit
     raise OSError('GLFW library not found')
 
-print(_glfw_file)
-# Load it
-_glfw = ctypes.CDLL(_glfw_file)
 
+# Library is loaded on first call of any GLFW function, see _load below
+_glfw = None
+_version = None
 
-# Ensure it's new enough
-def glfwGetVersion():
-    major, minor, rev = c_int(0), c_int(0), c_int(0)
-    _glfw.glfwGetVersion(byref(major), byref(minor), byref(rev))
-    return major.value, minor.value, rev.value
-
-version = glfwGetVersion()
-
-if version[0] != 3:
-    version = '.'.join([str(v) for v in version])
-    raise OSError('Need GLFW library version 3, found version %s' % version)
 
+def __getattr__(name):
+    """ Version constants are only known after the library is loaded """
+    versions = {'GLFW_VERSION_MAJOR': 0, 'GLFW_VERSION_MINOR': 1, 'GLFW_VERSION_REVISION': 2}
+    if name in versions:
+        return _load_version()[versions[name]]
+    if name == '__version__':
+        return _load_version()
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
-# --- Version -----------------------------------------------------------------
-GLFW_VERSION_MAJOR      = version[0]
-GLFW_VERSION_MINOR      = version[1]
-GLFW_VERSION_REVISION   = version[2]
-__version__ = GLFW_VERSION_MAJOR, GLFW_VERSION_MINOR, GLFW_VERSION_REVISION
 
 # --- Input handling definitions ----------------------------------------------
 GLFW_RELEASE            = 0
@@ -369,279 +360,330 @@ keyfun             = CFUNCTYPE(None, POINTER(GLFWwindow), c_int, c_int, c_int, c
 charfun            = CFUNCTYPE(None, POINTER(GLFWwindow), c_uint)
 monitorfun         = CFUNCTYPE(None, POINTER(GLFWmonitor), c_int)
 
-# --- Init --------------------------------------------------------------------
-glfwInit                        = _glfw.glfwInit
-glfwTerminate                   = _glfw.glfwTerminate
-#glfwGetVersion                 = _glfw.glfwGetVersion
-
-# --- Error -------------------------------------------------------------------
-#glfwSetErrorCallback            = _glfw.glfwSetErrorCallback
-
-# --- Monitor -----------------------------------------------------------------
-# glfwGetMonitors                 = _glfw.glfwGetMonitors
-# glfwGetMonitors.restype         = POINTER(GLFWmonitor)
-glfwGetPrimaryMonitor           = _glfw.glfwGetPrimaryMonitor
-# glfwGetMonitorPos               = _glfw.glfwGetMonitorPos
-# glfwGetMonitorPhysicalSize      = _glfw.glfwGetMonitorPhysicalSize
-glfwGetMonitorName              = _glfw.glfwGetMonitorName
-glfwGetMonitorName.restype = c_char_p
-# glfwSetMonitorCallback          = _glfw.glfwSetMonitorCallback
-# glfwGetVideoModes               = _glfw.glfwGetVideoModes
-# glfwGetVideoMode                = _glfw.glfwGetVideoMode
-
-# --- Gama --------------------------------------------------------------------
-glfwSetGamma                   = _glfw.glfwSetGamma
-# glfwGetGammaRamp               = _glfw.glfwGetGammaRamp
-# glfwSetGammaRamp               = _glfw.glfwSetGammaRamp
-
-# --- Window ------------------------------------------------------------------
-glfwDefaultWindowHints         = _glfw.glfwDefaultWindowHints
-glfwWindowHint                 = _glfw.glfwWindowHint
-# glfwCreateWindow              = _glfw.glfwCreateWindow
-# glfwDestroyWindow              = _glfw.glfwDestroyWindow
-glfwWindowShouldClose          = _glfw.glfwWindowShouldClose
-glfwSetWindowShouldClose       = _glfw.glfwSetWindowShouldClose
-glfwSetWindowTitle             = _glfw.glfwSetWindowTitle
-# glfwGetWindowPos              = _glfw.glfwGetWindowPos
-glfwSetWindowPos               = _glfw.glfwSetWindowPos
-# glfwGetWindowSize             = _glfw.glfwGetWindowSize
-glfwSetWindowSize              = _glfw.glfwSetWindowSize
-# glfwGetFramebufferSize        = _glfw.glfwGetFramebufferSize
-glfwIconifyWindow              = _glfw.glfwIconifyWindow
-glfwRestoreWindow              = _glfw.glfwRestoreWindow
-glfwShowWindow                 = _glfw.glfwShowWindow
-glfwHideWindow                 = _glfw.glfwHideWindow
-glfwGetWindowMonitor           = _glfw.glfwGetWindowMonitor
-glfwGetWindowAttrib            = _glfw.glfwGetWindowAttrib
-glfwSetWindowUserPointer       = _glfw.glfwSetWindowUserPointer
-glfwGetWindowUserPointer       = _glfw.glfwGetWindowUserPointer
-# glfwSetWindowPosCallback       = _glfw.glfwSetWindowPosCallback
-# glfwSetWindowSizeCallback      = _glfw.glfwSetWindowSizeCallback
-# glfwSetWindowCloseCallback     = _glfw.glfwSetWindowCloseCallback
-# glfwSetWindowRefreshCallback   = _glfw.glfwSetWindowRefreshCallback
-# glfwSetWindowFocusCallback     = _glfw.glfwSetWindowFocusCallback
-# glfwSetWindowIconifyCallback   = _glfw.glfwSetWindowIconifyCallback
-# glfwSetFramebufferSizeCallback = _glfw.glfwSetFramebufferSizeCallback
-glfwPollEvents                 = _glfw.glfwPollEvents
-glfwWaitEvents                 = _glfw.glfwWaitEvents
-
-# --- Input -------------------------------------------------------------------
-glfwGetInputMode               = _glfw.glfwGetInputMode
-glfwSetInputMode               = _glfw.glfwSetInputMode
-glfwGetKey                     = _glfw.glfwGetKey
-glfwGetMouseButton             = _glfw.glfwGetMouseButton
-# glfwGetCursorPos               = _glfw.glfwGetCursorPos
-glfwSetCursorPos               = _glfw.glfwSetCursorPos
-# glfwSetKeyCallback             = _glfw.glfwSetKeyCallback
-# glfwSetCharCallback            = _glfw.glfwSetCharCallback
-# glfwSetMouseButtonCallback     = _glfw.glfwSetMouseButtonCallback
-# glfwSetCursorPosCallback       = _glfw.glfwSetCursorPosCallback
-# glfwSetCursorEnterCallback     = _glfw.glfwSetCursorEnterCallback
-# glfwSetScrollCallback          = _glfw.glfwSetScrollCallback
-glfwJoystickPresent            = _glfw.glfwJoystickPresent
-# glfwGetJoystickAxes            = _glfw.glfwGetJoystickAxes
-# glfwGetJoystickButtons         = _glfw.glfwGetJoystickButtons
-glfwGetJoystickName            = _glfw.glfwGetJoystickName
-glfwGetJoystickName.restype = c_char_p
-
-# --- Clipboard ---------------------------------------------------------------
-glfwSetClipboardString         = _glfw.glfwSetClipboardString
-glfwGetClipboardString         = _glfw.glfwGetClipboardString
-glfwGetClipboardString.restype = c_char_p
-
-# --- Timer -------------------------------------------------------------------
-glfwGetTime                    = _glfw.glfwGetTime
-glfwGetTime.restype = c_double
-glfwSetTime                    = _glfw.glfwSetTime
-
-# --- Context -----------------------------------------------------------------
-glfwMakeContextCurrent         = _glfw.glfwMakeContextCurrent
-glfwGetCurrentContext          = _glfw.glfwGetCurrentContext
-glfwSwapBuffers                = _glfw.glfwSwapBuffers
-glfwSwapInterval               = _glfw.glfwSwapInterval
-glfwExtensionSupported         = _glfw.glfwExtensionSupported
-glfwGetProcAddress             = _glfw.glfwGetProcAddress
 
+_window_p = POINTER(GLFWwindow)
+_monitor_p = POINTER(GLFWmonitor)
+_int_p = POINTER(c_int)
+_double_p = POINTER(c_double)
+
+
+# --- Prototypes --------------------------------------------------------------
+
+# Functions exported as they are: name -> (restype, argtypes)
+_exported = {
+    # Init
+    'glfwInit':                  (c_int, []),
+    'glfwTerminate':             (None, []),
+    # Monitor
+    'glfwGetPrimaryMonitor':     (_monitor_p, []),
+    'glfwGetMonitorName':        (c_char_p, [_monitor_p]),
+    # Gamma
+    'glfwSetGamma':              (None, [_monitor_p, c_float]),
+    # Window
+    'glfwDefaultWindowHints':    (None, []),
+    'glfwWindowHint':            (None, [c_int, c_int]),
+    'glfwWindowShouldClose':     (c_int, [_window_p]),
+    'glfwSetWindowShouldClose':  (None, [_window_p, c_int]),
+    'glfwSetWindowTitle':        (None, [_window_p, c_char_p]),
+    'glfwSetWindowPos':          (None, [_window_p, c_int, c_int]),
+    'glfwSetWindowSize':         (None, [_window_p, c_int, c_int]),
+    'glfwIconifyWindow':         (None, [_window_p]),
+    'glfwRestoreWindow':         (None, [_window_p]),
+    'glfwShowWindow':            (None, [_window_p]),
+    'glfwHideWindow':            (None, [_window_p]),
+    'glfwGetWindowMonitor':      (_monitor_p, [_window_p]),
+    'glfwGetWindowAttrib':       (c_int, [_window_p, c_int]),
+    'glfwSetWindowUserPointer':  (None, [_window_p, c_void_p]),
+    'glfwGetWindowUserPointer':  (c_void_p, [_window_p]),
+    'glfwPollEvents':            (None, []),
+    'glfwWaitEvents':            (None, []),
+    # Input
+    'glfwGetInputMode':          (c_int, [_window_p, c_int]),
+    'glfwSetInputMode':          (None, [_window_p, c_int, c_int]),
+    'glfwGetKey':                (c_int, [_window_p, c_int]),
+    'glfwGetMouseButton':        (c_int, [_window_p, c_int]),
+    'glfwSetCursorPos':          (None, [_window_p, c_double, c_double]),
+    'glfwJoystickPresent':       (c_int, [c_int]),
+    'glfwGetJoystickName':       (c_char_p, [c_int]),
+    # Clipboard
+    'glfwSetClipboardString':    (None, [_window_p, c_char_p]),
+    'glfwGetClipboardString':    (c_char_p, [_window_p]),
+    # Timer
+    'glfwGetTime':               (c_double, []),
+    'glfwSetTime':               (None, [c_double]),
+    # Context
+    'glfwMakeContextCurrent':    (None, [_window_p]),
+    'glfwGetCurrentContext':     (_window_p, []),
+    'glfwSwapBuffers':           (None, [_window_p]),
+    'glfwSwapInterval':          (None, [c_int]),
+    'glfwExtensionSupported':    (c_int, [c_char_p]),
+    'glfwGetProcAddress':        (c_void_p, [c_char_p]),
+}
+
+# Functions wrapped by Python code below
+_wrapped = {
+    'glfwGetVersion':            (None, [_int_p, _int_p, _int_p]),
+    'glfwCreateWindow':          (_window_p, [c_int, c_int, c_char_p, _monitor_p, _window_p]),
+    'glfwDestroyWindow':         (None, [_window_p]),
+    'glfwGetWindowPos':          (None, [_window_p, _int_p, _int_p]),
+    'glfwGetWindowSize':         (None, [_window_p, _int_p, _int_p]),
+    'glfwGetFramebufferSize':    (None, [_window_p, _int_p, _int_p]),
+    'glfwGetCursorPos':          (None, [_window_p, _double_p, _double_p]),
+    'glfwGetMonitors':           (POINTER(_monitor_p), [_int_p]),
+    'glfwGetMonitorPos':         (None, [_monitor_p, _int_p, _int_p]),
+    'glfwGetMonitorPhysicalSize': (None, [_monitor_p, _int_p, _int_p]),
+    'glfwGetVideoModes':         (POINTER(GLFWvidmode), [_monitor_p, _int_p]),
+    'glfwGetVideoMode':          (POINTER(GLFWvidmode), [_monitor_p]),
+    'glfwGetGammaRamp':          (POINTER(GLFWgammaramp), [_monitor_p]),
+    'glfwSetGammaRamp':          (None, [_monitor_p, POINTER(GLFWgammaramp)]),
+    'glfwGetJoystickAxes':       (POINTER(c_float), [c_int, _int_p]),
+    'glfwGetJoystickButtons':    (POINTER(c_ubyte), [c_int, _int_p]),
+    'glfwSetErrorCallback':      (errorfun, [errorfun]),
+    'glfwSetMonitorCallback':    (monitorfun, [monitorfun]),
+}
+
+# Per-window callbacks: name -> C function type
+_window_callbacks = {
+    'WindowPos':        windowposfun,
+    'WindowSize':       windowsizefun,
+    'WindowClose':      windowclosefun,
+    'WindowRefresh':    windowrefreshfun,
+    'WindowFocus':      windowfocusfun,
+    'WindowIconify':    windowiconifyfun,
+    'FramebufferSize':  framebuffersizefun,
+    'Key':              keyfun,
+    'Char':             charfun,
+    'MouseButton':      mousebuttonfun,
+    'CursorPos':        cursorposfun,
+    'CursorEnter':      cursorenterfun,
+    'Scroll':           scrollfun,
+}
+
+for _name, _fun in _window_callbacks.items():
+    _wrapped['glfwSet%sCallback' % _name] = (_fun, [_window_p, _fun])
+
+
+def _load():
+    """ Loads library and declares prototypes of all used functions once """
+    global _glfw
+    if _glfw is not None:
+        return _glfw
+    library = ctypes.CDLL(_find_library())
+    for table in (_exported, _wrapped):
+        for name, (restype, argtypes) in table.items():
+            function = getattr(library, name)
+            function.restype = restype
+            function.argtypes = argtypes
+    _glfw = library
+    _load_version()
+    # replace lazy stubs with raw ctypes functions
+    module = globals()
+    for name in _exported:
+        module[name] = getattr(library, name)
+    return library
+
+
+def _load_version():
+    global _version
+    if _version is None:
+        library = _load()
+        major, minor, rev = c_int(0), c_int(0), c_int(0)
+        library.glfwGetVersion(byref(major), byref(minor), byref(rev))
+        _version = major.value, minor.value, rev.value
+        # Ensure it's new enough
+        if _version[0] != 3:
+            raise OSError('Need GLFW library version 3, found version %s'
+                          % '.'.join(str(v) for v in _version))
+    return _version
+
+
+class _LazyFunction:
+    """ Stub which loads library on first call.
+
+    After loading, module attributes refer to ctypes functions directly;
+    the stub only remains in namespaces which imported it earlier.
+    """
+
+    __slots__ = ('name', '_function')
+
+    def __init__(self, name):
+        self.name = name
+        self._function = None
+
+    def __call__(self, *args):
+        if self._function is None:
+            self._function = getattr(_load(), self.name)
+        return self._function(*args)
+
+    def __repr__(self):
+        return '<lazy GLFW function %s>' % self.name
+
+
+for _name in _exported:
+    globals()[_name] = _LazyFunction(_name)
+
+
+def glfwGetVersion():
+    return _load_version()
 
 
 # --- Pythonizer --------------------------------------------------------------
 
-# This keeps track of current windows
-__windows__ = []
-__destroyed__ = []
+# Windows and their callbacks (kept to prevent garbage collection),
+# looked up by address of native window handle
+_windows = {}
+_c_error_callback = None
+_c_monitor_callback = None
+
+
+def _handle(window):
+    return ctypes.cast(window, c_void_p).value
 
-# This is to prevent garbage collection on callbacks
-__c_callbacks__ = {}
-__py_callbacks__ = {}
-__c_error_callback__ = None
 
 def glfwCreateWindow(width=640, height=480, title="GLFW Window",
                      monitor=None, share=None):
-    _glfw.glfwCreateWindow.restype = POINTER(GLFWwindow)
-    window = _glfw.glfwCreateWindow(width,height,title,monitor,share)
-    __windows__.append(window)
-    __destroyed__.append(False)
-    index = __windows__.index(window)
-    __c_callbacks__[index] = {}
-    __py_callbacks__[index] = { 'errorfun'           : None,
-                                'monitorfun'         : None,
-                                'windowposfun'       : None,
-                                'windowsizefun'      : None,
-                                'windowclosefun'     : None,
-                                'windowrefreshfun'   : None,
-                                'windowfocusfun'     : None,
-                                'windowiconifyfun'   : None,
-                                'framebuffersizefun' : None,
-                                'keyfun'             : None,
-                                'charfun'            : None,
-                                'mousebuttonfun'     : None,
-                                'cursorposfun'       : None,
-                                'cursorenterfun'     : None,
-                                'scrollfun'          : None }
+    if isinstance(title, str):
+        title = title.encode()
+    window = _load().glfwCreateWindow(width, height, title, monitor, share)
+    if window:
+        _windows[_handle(window)] = {}
     return window
 
 
 def glfwDestroyWindow(window):
-    index = __windows__.index(window)
-    if not __destroyed__[index]:
-        _glfw.glfwDestroyWindow(window)
-        # We do not delete window from the list (or it would impact numbering)
-        del __c_callbacks__[index]
-        del __py_callbacks__[index]
-        # del __windows__[index]
-    __destroyed__[index] = True
+    callbacks = _windows.pop(_handle(window), None)
+    if callbacks is not None:
+        _load().glfwDestroyWindow(window)
+
+
+def _get_pair(name, handle, c_type=c_int):
+    a, b = c_type(0), c_type(0)
+    getattr(_load(), name)(handle, byref(a), byref(b))
+    return a.value, b.value
 
 
 def glfwGetWindowPos(window):
-    xpos, ypos = c_int(0), c_int(0)
-    _glfw.glfwGetWindowPos(window, byref(xpos), byref(ypos))
-    return xpos.value, ypos.value
+    return _get_pair('glfwGetWindowPos', window)
 
 
 def glfwGetCursorPos(window):
-    xpos, ypos = c_double(0), c_double(0)
-    _glfw.glfwGetCursorPos(window, byref(xpos), byref(ypos))
-    return int(xpos.value), int(ypos.value)
+    xpos, ypos = _get_pair('glfwGetCursorPos', window, c_double)
+    return int(xpos), int(ypos)
 
 
 def glfwGetWindowSize(window):
-    width, height = c_int(0), c_int(0)
-    _glfw.glfwGetWindowSize(window, byref(width), byref(height))
-    return width.value, height.value
+    return _get_pair('glfwGetWindowSize', window)
 
 
 def glfwGetFramebufferSize(window):
-    width, height = c_int(0), c_int(0)
-    _glfw.glfwGetFramebufferSize(window, byref(width), byref(height))
-    return width.value, height.value
+    return _get_pair('glfwGetFramebufferSize', window)
 
 
-def glfwGetMonitors():
-    count = c_int(0)
-    _glfw.glfwGetMonitors.restype = POINTER(POINTER(GLFWmonitor))
-    c_monitors = _glfw.glfwGetMonitors( byref(count) )
-    return [c_monitors[i] for i in range(count.value)]
+def glfwGetMonitorPos(monitor):
+    return _get_pair('glfwGetMonitorPos', monitor)
 
 
-def glfwGetVideoModes(monitor):
-    count = c_int(0)
-    _glfw.glfwGetVideoModes.restype = POINTER(GLFWvidmode)
-    c_modes = _glfw.glfwGetVideoModes( monitor, byref(count) )
-    modes = []
-    for i in range(count.value):
-        modes.append( (c_modes[i].width,
-                       c_modes[i].height,
-                       c_modes[i].redBits,
-                       c_modes[i].blueBits,
-                       c_modes[i].greenBits,
-                       c_modes[i].refreshRate ) )
-    return modes
+def glfwGetMonitorPhysicalSize(monitor):
+    return _get_pair('glfwGetMonitorPhysicalSize', monitor)
 
 
-def glfwGetMonitorPos(monitor):
-    xpos, ypos = c_int(0), c_int(0)
-    _glfw.glfwGetMonitorPos(monitor, byref(xpos), byref(ypos))
-    return xpos.value, ypos.value
+def glfwGetMonitors():
+    count = c_int(0)
+    c_monitors = _load().glfwGetMonitors(byref(count))
+    return c_monitors[:count.value]
 
 
-def glfwGetMonitorPhysicalSize(monitor):
-    width, height = c_int(0), c_int(0)
-    _glfw.glfwGetMonitorPhysicalSize(monitor, byref(width), byref(height))
-    return width.value, height.value
+def glfwGetVideoModes(monitor):
+    """ Returns structured array (width, height, redBits, greenBits, blueBits,
+    refreshRate) viewing memory owned by GLFW """
+    count = c_int(0)
+    c_modes = _load().glfwGetVideoModes(monitor, byref(count))
+    if not c_modes:
+        return np.empty(0, dtype=np.dtype(GLFWvidmode))
+    return np.ctypeslib.as_array(c_modes, shape=(count.value,))
 
 
 def glfwGetVideoMode(monitor):
-    _glfw.glfwGetVideoMode.restype = POINTER(GLFWvidmode)
-    c_mode = _glfw.glfwGetVideoMode(monitor)
+    c_mode = _load().glfwGetVideoMode(monitor).contents
     return (c_mode.width,
             c_mode.height,
             c_mode.redBits,
-            c_mode.blueBits,
             c_mode.greenBits,
-            c_mode.refreshRate )
+            c_mode.blueBits,
+            c_mode.refreshRate)
+
+
+def glfwGetGammaRamp(monitor):
+    """ Returns dict of red, green and blue arrays viewing memory owned by GLFW """
+    c_gamma = _load().glfwGetGammaRamp(monitor)
+    if not c_gamma:
+        return {'red': np.empty(0, np.uint16),
+                'green': np.empty(0, np.uint16),
+                'blue': np.empty(0, np.uint16)}
+    ramp = c_gamma.contents
+    return {color: np.ctypeslib.as_array(getattr(ramp, color), shape=(ramp.size,))
+            for color in ('red', 'green', 'blue')}
+
 
+def glfwSetGammaRamp(monitor, red, green, blue):
+    red, green, blue = (np.ascontiguousarray(c, dtype=np.uint16) for c in (red, green, blue))
+    ramp = GLFWgammaramp(red.ctypes.data_as(POINTER(c_ushort)),
+                         green.ctypes.data_as(POINTER(c_ushort)),
+                         blue.ctypes.data_as(POINTER(c_ushort)),
+                         len(red))
+    _load().glfwSetGammaRamp(monitor, byref(ramp))
 
-def GetGammaRamp(monitor):
-    _glfw.glfwGetGammaRamp.restype = POINTER(GLFWgammaramp)
-    c_gamma = _glfw.glfwGetGammaRamp(monitor).contents
-    gamma = {'red':[], 'green':[], 'blue':[]}
-    if c_gamma:
-        for i in range(c_gamma.size):
-            gamma['red'].append(c_gamma.red[i])
-            gamma['green'].append(c_gamma.green[i])
-            gamma['blue'].append(c_gamma.blue[i])
-    return gamma
+
+GetGammaRamp = glfwGetGammaRamp
 
 
 def glfwGetJoystickAxes(joy):
+    """ Returns float32 array viewing GLFW memory, valid until next call """
     count = c_int(0)
-    _glfw.glfwGetJoystickAxes.restype = POINTER(c_float)
-    c_axes = _glfw.glfwGetJoystickAxes(joy, byref(count))
-    axes = [c_axes[i].value for i in range(count)]
-    return axes
+    c_axes = _load().glfwGetJoystickAxes(joy, byref(count))
+    if not c_axes:
+        return np.empty(0, dtype=np.float32)
+    return np.ctypeslib.as_array(c_axes, shape=(count.value,))
 
 
 def glfwGetJoystickButtons(joy):
+    """ Returns uint8 array viewing GLFW memory, valid until next call """
     count = c_int(0)
-    _glfw.glfwGetJoystickButtons.restype = POINTER(c_int)
-    c_buttons = _glfw.glfwGetJoystickButtons(joy, byref(count))
-    buttons = [c_buttons[i].value for i in range(count)]
-    return buttons
+    c_buttons = _load().glfwGetJoystickButtons(joy, byref(count))
+    if not c_buttons:
+        return np.empty(0, dtype=np.uint8)
+    return np.ctypeslib.as_array(c_buttons, shape=(count.value,))
 
 
 # --- Callbacks ---------------------------------------------------------------
 
-def __callback__(name):
-    callback = 'glfwSet%sCallback' % name
-    fun      = '%sfun' % name.lower()
-    code = """
-def %(callback)s(window, callback = None):
-    index = __windows__.index(window)
-    old_callback = __py_callbacks__[index]['%(fun)s']
-    __py_callbacks__[index]['%(fun)s'] = callback
-    if callback: callback = %(fun)s(callback)
-    __c_callbacks__[index]['%(fun)s'] = callback
-    _glfw.%(callback)s(window, callback)
-    return old_callback"""  % {'callback': callback, 'fun': fun}
-    return code
-
-exec(__callback__('Monitor'))
-exec(__callback__('WindowPos'))
-exec(__callback__('WindowSize'))
-exec(__callback__('WindowClose'))
-exec(__callback__('WindowRefresh'))
-exec(__callback__('WindowFocus'))
-exec(__callback__('WindowIconify'))
-exec(__callback__('FramebufferSize'))
-exec(__callback__('Key'))
-exec(__callback__('Char'))
-exec(__callback__('MouseButton'))
-exec(__callback__('CursorPos'))
-exec(__callback__('Scroll'))
-
-
-# Error callback does not take window parameter
-def glfwSetErrorCallback(callback = None):
-    global __c_error_callback__
-    __c_error_callback__ = errorfun(callback)
-    _glfw.glfwSetErrorCallback(__c_error_callback__)
\ No newline at end of file
+def _make_callback_setter(name, fun):
+    setter = 'glfwSet%sCallback' % name
+
+    def set_callback(window, callback=None):
+        callbacks = _windows[_handle(window)]
+        old_callback = callbacks.get(name, (None, None))[0]
+        c_callback = fun(callback) if callback else fun()
+        callbacks[name] = (callback, c_callback)
+        getattr(_load(), setter)(window, c_callback)
+        return old_callback
+
+    set_callback.__name__ = setter
+    return set_callback
+
+
+for _name, _fun in _window_callbacks.items():
+    globals()['glfwSet%sCallback' % _name] = _make_callback_setter(_name, _fun)
+
+
+# Error and monitor callbacks do not take window parameter
+def glfwSetErrorCallback(callback=None):
+    global _c_error_callback
+    _c_error_callback = errorfun(callback) if callback else errorfun()
+    _load().glfwSetErrorCallback(_c_error_callback)
+
+
+def glfwSetMonitorCallback(callback=None):
+    global _c_monitor_callback
+    _c_monitor_callback = monitorfun(callback) if callback else monitorfun()
+    _load().glfwSetMonitorCallback(_c_monitor_callback)
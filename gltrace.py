@@ -0,0 +1,226 @@
+"""
+Tracing of OpenGL calls.
+
+Modules of this package import OpenGL functions with `from OpenGL.GL
+import *`, so tracer replaces them right in module namespaces. Every call
+is counted and timed per frame, and calls which do not change OpenGL
+state (binding already bound object, enabling enabled attribute, setting
+uniform to the same value, uploading the same data again) are reported
+as redundant.
+
+    tracer = GLTracer(out=sys.stderr)
+    tracer.install()        # after modules to trace were imported
+    ...
+    tracer.end_frame()      # after every swap
+"""
+
+import sys
+import time
+import hashlib
+from collections import Counter, defaultdict
+
+
+DEFAULT_MODULES = ('texture', 'techniques.technique', 'techniques.lighting',
+                   'techniques.clustered', 'techniques.deferred', 'techniques.shadow',
+                   'glutwindow', 'triangle', 'qtwindow.pyqtwindow')
+
+_TEXTURE0, _ELEMENT_ARRAY_BUFFER = 0x84C0, 0x8893
+
+
+def gl_functions(module):
+    """ Names of OpenGL functions imported into module namespace """
+    from OpenGL import GL
+    return [name for name, value in vars(module).items()
+            if name.startswith('gl') and callable(value) and getattr(GL, name, None) is value]
+
+
+def patch_modules(modules, replace, names=None):
+    """ Replaces OpenGL functions in namespaces of given modules.
+
+    Modules are module objects or names (missing ones are skipped);
+    `replace(name, function)` returns substitute, or None to keep
+    original. Only `names` are patched if given. Returns list of patches
+    to pass to `restore`.
+    """
+    patches = []
+    for module in modules:
+        if isinstance(module, str):
+            module = sys.modules.get(module)
+            if module is None:
+                continue
+        for name in (gl_functions(module) if names is None else names):
+            original = getattr(module, name, None)
+            if original is None:
+                continue
+            substitute = replace(name, original)
+            if substitute is not None:
+                setattr(module, name, substitute)
+                patches.append((module, name, original))
+    return patches
+
+
+def restore(patches):
+    for module, name, original in reversed(patches):
+        setattr(module, name, original)
+
+
+def _fingerprint(value):
+    """ Hashable representation of call argument """
+    if hasattr(value, 'tobytes'):
+        return hashlib.sha1(value.tobytes()).digest()
+    if isinstance(value, (list, tuple)):
+        return tuple(_fingerprint(v) for v in value)
+    if hasattr(value, 'value'):  # ctypes scalars and pointers
+        return value.value
+    return value
+
+
+class FrameStats:
+
+    def __init__(self, index):
+        self.index = index
+        self.calls = Counter()
+        self.time = defaultdict(float)
+        self.redundant = Counter()
+
+    @property
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    @property
+    def total_time(self):
+        return sum(self.time.values())
+
+
+class GLTracer:
+    """ Counts, times and checks OpenGL calls made through patched modules """
+
+    def __init__(self, out=None, top: int=5, clock=time.perf_counter):
+        self.out = out
+        self.top = top
+        self.frames = []
+        self.current = FrameStats(0)
+        self._clock = clock
+        self._patches = []
+        self._reset_state()
+
+    def _reset_state(self):
+        self._program = None
+        self._vao = 0
+        self._unit = _TEXTURE0
+        self._buffers = {}
+        self._textures = {}
+        self._attribs = defaultdict(set)  # enabled attributes per vertex array
+        self._caps = {}
+        self._uniforms = {}
+        self._uploads = {}
+        self._simple = {}
+
+    def install(self, modules=DEFAULT_MODULES, names=None):
+        """ Wraps OpenGL functions of modules, see `patch_modules` """
+        self._patches.extend(patch_modules(modules, self._wrap, names))
+        return self
+
+    def uninstall(self):
+        restore(self._patches)
+        self._patches = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.uninstall()
+
+    def _wrap(self, name, function):
+        check = self._check
+        clock = self._clock
+
+        def traced(*args):
+            stats = self.current
+            if check(name, args):
+                stats.redundant[name] += 1
+            start = clock()
+            try:
+                return function(*args)
+            finally:
+                stats.time[name] += clock() - start
+                stats.calls[name] += 1
+
+        traced.__name__ = name
+        traced.__wrapped__ = function
+        return traced
+
+    def _check(self, name, args):
+        """ Updates shadow state; returns True if call would not change anything """
+        if name == 'glUseProgram':
+            return self._set('program', args[0])
+        if name == 'glBindVertexArray':
+            return self._set('vao', args[0])
+        if name == 'glActiveTexture':
+            return self._set('unit', args[0])
+        if name == 'glBindBuffer':
+            return self._set_in(self._buffers, self._buffer_key(args[0]), args[1])
+        if name == 'glBindTexture':
+            return self._set_in(self._textures, (self._unit, args[0]), args[1])
+        if name in ('glEnableVertexAttribArray', 'glDisableVertexAttribArray'):
+            enabled = self._attribs[self._vao]
+            enable = name == 'glEnableVertexAttribArray'
+            redundant = (args[0] in enabled) == enable
+            (enabled.add if enable else enabled.discard)(args[0])
+            return redundant
+        if name in ('glEnable', 'glDisable'):
+            return self._set_in(self._caps, args[0], name == 'glEnable')
+        if name.startswith('glUniform'):
+            return self._set_in(self._uniforms, (self._program, args[0]), _fingerprint(args[1:]))
+        if name in ('glBufferData', 'glTexImage2D', 'glBufferSubData', 'glTexSubImage2D'):
+            target = args[0]
+            bound = self._buffers.get(self._buffer_key(target)) if name.startswith('glBuffer') \
+                else self._textures.get((self._unit, target))
+            data = args[2] if name == 'glBufferData' else args[-1]
+            if data is None:
+                # storage allocation or orphaning, contents uploaded before are gone
+                for key in [key for key in self._uploads if key[1:] == (target, bound)]:
+                    del self._uploads[key]
+                return False
+            return self._set_in(self._uploads, (name, target, bound), _fingerprint(args[1:]))
+        if name in ('glClearColor', 'glDepthFunc', 'glCullFace', 'glFrontFace', 'glViewport',
+                    'glPixelStorei', 'glBlendFunc', 'glDepthMask'):
+            key = (name, args[0]) if name == 'glPixelStorei' else name
+            return self._set_in(self._simple, key, args)
+        return False
+
+    def _buffer_key(self, target):
+        # element array binding is part of vertex array state
+        return (self._vao, target) if target == _ELEMENT_ARRAY_BUFFER else target
+
+    def _set(self, attribute, value):
+        attribute = '_' + attribute
+        value = _fingerprint(value)
+        redundant = getattr(self, attribute) == value
+        setattr(self, attribute, value)
+        return redundant
+
+    @staticmethod
+    def _set_in(state, key, value):
+        value = _fingerprint(value)
+        redundant = key in state and state[key] == value
+        state[key] = value
+        return redundant
+
+    def end_frame(self):
+        """ Finishes statistics of current frame, writes its summary if `out` is set """
+        stats = self.current
+        self.frames.append(stats)
+        self.current = FrameStats(stats.index + 1)
+        if self.out is not None:
+            self.write_frame(stats, self.out)
+        return stats
+
+    def write_frame(self, stats: FrameStats, out=sys.stderr):
+        out.write("frame %d: %d calls, %.3f ms, %d redundant\n" %
+                  (stats.index, stats.total_calls, stats.total_time * 1000.0,
+                   sum(stats.redundant.values())))
+        for name, count in stats.calls.most_common(self.top):
+            out.write("  %-28s %5d calls %8.3f ms %5d redundant\n" %
+                      (name, count, stats.time[name] * 1000.0, stats.redundant[name]))
+
@@ -1,4 +1,6 @@
+import startup
 import ctypes
+from contextlib import contextmanager
 import numpy as np
 from OpenGL.GL import *
 from OpenGL.GLUT import *
@@ -6,6 +8,7 @@ from pipeline import Pipeline, ProjParams
 from camera import Camera
 from texture import Texture
 from callback import WindowCallback
+from scheduler import FrameScheduler
 from techniques.lighting import LightingTechnique
 
 
@@ -28,9 +31,13 @@ class GlutWindow(WindowCallback):
         self._vao = None
         self._ibo = None
         self._program = None
+        self._effect = None
         self._texture = None
         self._vertices = None
         self._indexes = None
+        # compiled assets (see assetc), built-in pyramid and test texture by default
+        self._mesh_path = params.get("mesh", None)
+        self._texture_path = params.get("texture", "resources/test.png")
         self._camera = None
         self._pipeline = None
         self._scale = 0.0
@@ -42,20 +49,54 @@ class GlutWindow(WindowCallback):
         self._log = params.get("log", print)
         self._clear_color = params.get("clearcolor", (0, 0, 0, 0))
         self._vertex_attributes = {"Position": -1, "TexCoord": -1}
+        self._scheduler = FrameScheduler(params.get("fps", 60.0))
+        self._timer_pending = False
+        self._profile = params.get("profile", False)
+        self._tracer = params.get("gl_tracer", None)
+        # frames are driven by input replayer only, see replay module
+        self._replaying = params.get("replaying", False)
+        self._profiler = None
+        if params.get("animate", True):
+            self._scheduler.start_animation("rotation")
 
-        self._init_glut()
-        self._init_gl()
-        self._create_vertex_buffer()
-        self._create_index_buffer()
+        with startup.stage("glut init"):
+            self._init_glut()
+        with startup.stage("gl init"):
+            self._init_gl()
+        with startup.stage("buffers"):
+            self._create_vertex_buffer()
+            self._create_index_buffer()
+        # shaders and texture are created on first frame, see _init_resources
 
-        self._effect = LightingTechnique("shaders/vs.glsl", "shaders/fs_lighting.glsl")
-        self._effect.init()
-        self._effect.enable()
-        self._effect.set_texture_unit(0)
+    def _init_resources(self):
+        """
+        Compiles shaders and uploads texture; deferred until they are needed.
+        """
+        with startup.stage("shaders"):
+            self._effect = LightingTechnique("shaders/vs.glsl", "shaders/fs_lighting.glsl")
+            self._effect.init()
+            self._effect.enable()
+            self._effect.set_texture_unit(0)
+
+        with startup.stage("texture"):
+            self._texture = Texture(GL_TEXTURE_2D, self._texture_path)
+            if not self._texture.load():
+                raise ValueError("cannot load texture")
 
-        self._texture = Texture(GL_TEXTURE_2D, "resources/test.png")
-        if not self._texture.load():
-            raise ValueError("cannot load texture")
+        if self._profile:
+            from gpuprofiler import GpuProfiler
+            self._profiler = GpuProfiler()
+
+    @contextmanager
+    def _scope(self, name):
+        """
+        Profiled part of frame, see gpuprofiler module.
+        """
+        if self._profiler is None:
+            yield
+        else:
+            with self._profiler.scope(name):
+                yield
 
     def _init_glut(self):
         """
@@ -71,8 +112,8 @@ class GlutWindow(WindowCallback):
             glutCreateWindow(self.title.encode())
             glutInitWindowPosition(*self.screen_pos)
         # callbacks binding
+        # no idle callback: frames are requested through scheduler
         glutDisplayFunc(self.on_display)
-        glutIdleFunc(self.on_display)
         glutPassiveMotionFunc(self.on_mouse)
         glutSpecialFunc(self.on_keyboard)
 
@@ -92,16 +133,20 @@ class GlutWindow(WindowCallback):
         """
         Creates vertex array and vertex buffer and fills last one with data.
         """
-        self._vertices = np.array([
-            -1.0, -1.0, 0.5773, 0.0, 0.0,
-            0.0, -1.0, -1.15475, 0.5, 0.0,
-            1.0, -1.0, 0.5773, 1.0, 0.0,
-            0.0, 1.0, 0.0, 0.5, 1.0
-        ], dtype=np.float32)
+        if self._mesh_path is not None:
+            from assetc import load_mesh
+            self._vertices, self._indexes = load_mesh(self._mesh_path)
+        else:
+            self._vertices = np.array([
+                -1.0, -1.0, 0.5773, 0.0, 0.0,
+                0.0, -1.0, -1.15475, 0.5, 0.0,
+                1.0, -1.0, 0.5773, 1.0, 0.0,
+                0.0, 1.0, 0.0, 0.5, 1.0
+            ], dtype=np.float32)
 
-        self._vao = glGenVertexArrays(1)
+        self._vao = int(glGenVertexArrays(1))  # names are kept as ints, see fastgl
         glBindVertexArray(self._vao)
-        self._vbo = glGenBuffers(1)
+        self._vbo = int(glGenBuffers(1))
         glBindBuffer(GL_ARRAY_BUFFER, self._vbo)
         glBufferData(GL_ARRAY_BUFFER, self._vertices.nbytes, self._vertices, GL_STATIC_DRAW)
 
@@ -109,14 +154,15 @@ class GlutWindow(WindowCallback):
         """
         Creates index buffer.
         """
-        self._indexes = np.array([
-            0, 3, 1,
-            1, 3, 2,
-            2, 3, 0,
-            0, 1, 2
-        ], dtype=np.uint32)
+        if self._indexes is None:
+            self._indexes = np.array([
+                0, 3, 1,
+                1, 3, 2,
+                2, 3, 0,
+                0, 1, 2
+            ], dtype=np.uint32)
 
-        self._ibo = glGenBuffers(1)
+        self._ibo = int(glGenBuffers(1))
         glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self._ibo)
         glBufferData(GL_ELEMENT_ARRAY_BUFFER, self._indexes.nbytes, self._indexes, GL_STATIC_DRAW)
 
@@ -128,14 +174,55 @@ class GlutWindow(WindowCallback):
     def camera(self, value):
         self._camera = value
 
+    @property
+    def scheduler(self):
+        return self._scheduler
+
+    def request_redisplay(self):
+        """
+        Arms GLUT timer for the next frame if scheduler has anything to render.
+        """
+        if self._timer_pending or self._replaying:
+            return
+        delay = self._scheduler.delay()
+        if delay is None:
+            return
+        self._timer_pending = True
+        glutTimerFunc(int(delay * 1000), self._on_timer, 0)
+
+    def _on_timer(self, value):
+        self._timer_pending = False
+        glutPostRedisplay()
+
     def on_display(self):
         """
         Rendering callback.
         """
+        if self._effect is None:
+            self._init_resources()
+        if self._profiler is not None:
+            self._profiler.begin_frame()
+        self._scheduler.begin_frame()
         self._camera.render()
+        if self._camera.moving:
+            self._scheduler.invalidate()
 
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        with self._scope("clear"):
+            glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        with self._scope("scene"):
+            self._draw_scene()
+        glutSwapBuffers()
+        if self._profiler is not None:
+            self._profiler.end_frame()
+        if self._tracer is not None:
+            self._tracer.end_frame()
+        startup.first_frame()
+        self.request_redisplay()
 
+    def _draw_scene(self):
+        """
+        Sets uniforms and draws the mesh.
+        """
         self._scale += 0.1
         pipeline = Pipeline(rotation=[0, self._scale, 0],
                             translation=[0, 0, 6],
@@ -156,22 +243,25 @@ class GlutWindow(WindowCallback):
         glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self._ibo)
 
         self._texture.bind(GL_TEXTURE0)
-        glDrawElements(GL_TRIANGLES, 18, GL_UNSIGNED_INT, ctypes.c_void_p(0))
+        glDrawElements(GL_TRIANGLES, len(self._indexes), GL_UNSIGNED_INT, ctypes.c_void_p(0))
         glDisableVertexAttribArray(position)
         glDisableVertexAttribArray(tex_coord)
-        glutSwapBuffers()
 
     def on_mouse(self, x, y):
         """
         Mouse moving events handler.
         """
         self._camera.mouse(x, y)
+        self._scheduler.invalidate()
+        self.request_redisplay()
 
     def on_keyboard(self, key, x, y):
         """
         Keyboard events handler.
         """
         if key == GLUT_KEY_F1:
+            if self._profiler is not None:
+                self._profiler.report()
             if not bool(glutLeaveMainLoop):
                 sys.exit(0)
             glutLeaveMainLoop()
@@ -181,11 +271,23 @@ class GlutWindow(WindowCallback):
             self._dir_light_ambient_intensity -= 0.05
         if self._camera:
             self._camera.keyboard(key)
+        self._scheduler.invalidate()
+        self.request_redisplay()
 
     def run(self):
         glutMainLoop()
 
 
+def gl_modules():
+    """
+    Modules which OpenGL functions are replaced by --fast-gl and --trace-gl.
+    This module is included under its actual name, it is __main__ when run as script.
+    """
+    from gltrace import DEFAULT_MODULES
+    modules = [sys.modules.get(name) for name in DEFAULT_MODULES] + [sys.modules[__name__]]
+    return list(dict.fromkeys(module for module in modules if module is not None))
+
+
 SCREEN_SIZE = WINDOW_WIDTH, WINDOW_HEIGHT = 1024, 768
 
 
@@ -194,10 +296,44 @@ if __name__ == "__main__":
         os.path.join("shaders", "vs.glsl"): GL_VERTEX_SHADER,
         os.path.join("shaders", "fs.glsl"): GL_FRAGMENT_SHADER
     }
-    window = GlutWindow(SCREEN_SIZE, game_mode=False, shaders=shaders)
+    tracer = None
+    if "--trace-gl" in sys.argv:
+        from gltrace import GLTracer
+        tracer = GLTracer(out=sys.stderr).install(gl_modules())
+    if "--fast-gl" in sys.argv:
+        from fastgl import FastGL
+        if tracer is not None:
+            tracer.uninstall()  # tracer has to wrap raw functions, not the other way round
+        FastGL().install(gl_modules())
+        if tracer is not None:
+            tracer.install(gl_modules())
+    replaying = "--replay" in sys.argv
+    assets = {}
+    for option in ("--mesh", "--texture"):
+        if option in sys.argv:
+            assets[option[2:]] = sys.argv[sys.argv.index(option) + 1]
+    window = GlutWindow(SCREEN_SIZE, game_mode=False, shaders=shaders,
+                        profile="--profile" in sys.argv, gl_tracer=tracer,
+                        animate=not replaying, replaying=replaying, **assets)
     camera_pos = [0.0, 1.0, 0.0]  # camera position
     camera_target = [0.0, -0.5, 1.0]  # "look at" direction
     camera_up = [0.0, 1.0, 0.0]  # camera vertical axis
     camera = Camera(camera_pos, camera_target, camera_up, WINDOW_WIDTH, WINDOW_HEIGHT)
     window.camera = camera
-    window.run()
+    if "--replay" in sys.argv or "--record" in sys.argv:
+        from replay import InputRecorder, InputReplayer, Recording
+    if replaying:
+        # ignore live input and redisplays so that replay stays deterministic
+        glutDisplayFunc(lambda: None)
+        glutPassiveMotionFunc(lambda x, y: None)
+        glutSpecialFunc(lambda key, x, y: None)
+        recording = Recording.load(sys.argv[sys.argv.index("--replay") + 1])
+        replayer = InputReplayer(recording, window)
+        replayer.run_glut()
+        replayer.write_timings()
+    elif "--record" in sys.argv:
+        with InputRecorder(window, sys.argv[sys.argv.index("--record") + 1]) as recorder:
+            recorder.attach_glut()
+            window.run()
+    else:
+        window.run()
@@ -0,0 +1,155 @@
+"""
+GPU time profiling with timer queries.
+
+Named scopes put GL_TIMESTAMP queries around recorded commands, so scopes
+can be nested. Results are read a few frames later, only when driver says
+they are available, so profiling never waits for GPU. Every scope is
+timed on CPU side as well and both timings are reported together.
+
+    profiler = GpuProfiler()
+    ...
+    profiler.begin_frame()
+    with profiler.scope("shadows"):
+        ...
+    with profiler.scope("lighting"):
+        ...
+    profiler.end_frame()
+    profiler.report()
+"""
+
+import sys
+import time
+import ctypes
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+
+
+class _Scope:
+
+    __slots__ = ('name', 'depth', 'start_query', 'end_query', 'cpu')
+
+    def __init__(self, name, depth, start_query):
+        self.name = name
+        self.depth = depth
+        self.start_query = start_query
+        self.end_query = None
+        self.cpu = 0.0
+
+
+class GpuProfiler:
+    """ Collects CPU and GPU durations of named scopes.
+
+    Argument `gl` is a module providing OpenGL functions (OpenGL.GL by
+    default); `history` is number of completed frames kept for report.
+    """
+
+    def __init__(self, gl=None, history: int=120, batch: int=32, clock=time.perf_counter):
+        if gl is None:
+            from OpenGL import GL as gl
+        self._gl = gl
+        self._clock = clock
+        self._batch = batch
+        self._free = []
+        self._pending = deque()
+        self._frame = None
+        self._last_query = None
+        self._stack = []
+        self.frames = deque(maxlen=history)
+        self.queries = 0
+
+    def _query(self):
+        if not self._free:
+            names = self._gl.glGenQueries(self._batch)
+            self._free.extend(int(name) for name in names)
+            self.queries += self._batch
+        query = self._free.pop()
+        self._gl.glQueryCounter(query, self._gl.GL_TIMESTAMP)
+        self._last_query = query
+        return query
+
+    def begin_frame(self):
+        self.collect()
+        self._frame = []
+
+    @contextmanager
+    def scope(self, name: str):
+        if self._frame is None:
+            yield
+            return
+        scope = _Scope(name, len(self._stack), self._query())
+        self._frame.append(scope)
+        self._stack.append(scope)
+        start = self._clock()
+        try:
+            yield
+        finally:
+            scope.cpu = self._clock() - start
+            scope.end_query = self._query()
+            self._stack.pop()
+
+    def end_frame(self):
+        if self._frame is not None:
+            if self._frame:
+                # outer scopes end after inner ones, so the last issued query is not frame[-1]
+                self._pending.append((self._frame, self._last_query))
+            self._frame = None
+        self.collect()
+
+    def _available(self, query):
+        available = ctypes.c_int(0)
+        self._gl.glGetQueryObjectiv(query, self._gl.GL_QUERY_RESULT_AVAILABLE, available)
+        return bool(available.value)
+
+    def _result(self, query):
+        value = ctypes.c_uint64(0)
+        self._gl.glGetQueryObjectui64v(query, self._gl.GL_QUERY_RESULT, value)
+        return value.value
+
+    def collect(self):
+        """ Reads results of finished frames without blocking; returns number of them """
+        done = 0
+        while self._pending:
+            frame, last_query = self._pending[0]
+            # queries complete in order, so the last one tells about whole frame
+            if not self._available(last_query):
+                break
+            self._pending.popleft()
+            results = []
+            for scope in frame:
+                gpu = (self._result(scope.end_query) - self._result(scope.start_query)) * 1e-9
+                results.append((scope.name, scope.depth, scope.cpu, gpu))
+                self._free.extend((scope.start_query, scope.end_query))
+            self.frames.append(results)
+            done += 1
+        return done
+
+    @property
+    def latency(self):
+        """ Number of frames which results are not available yet """
+        return len(self._pending)
+
+    def summary(self):
+        """ Returns {name: (depth, calls, average cpu ms, average gpu ms)} over kept frames """
+        totals = OrderedDict()
+        for frame in self.frames:
+            for name, depth, cpu, gpu in frame:
+                entry = totals.setdefault(name, [depth, 0, 0.0, 0.0])
+                entry[1] += 1
+                entry[2] += cpu
+                entry[3] += gpu
+        frames = max(len(self.frames), 1)
+        return OrderedDict((name, (depth, calls, cpu * 1000.0 / frames, gpu * 1000.0 / frames))
+                           for name, (depth, calls, cpu, gpu) in totals.items())
+
+    def report(self, out=sys.stderr):
+        out.write("%-24s %8s %8s %8s\n" % ("scope", "calls", "cpu ms", "gpu ms"))
+        frames = max(len(self.frames), 1)
+        for name, (depth, calls, cpu, gpu) in self.summary().items():
+            out.write("%-24s %8.1f %8.3f %8.3f\n" % ("  " * depth + name, calls / frames, cpu, gpu))
+
+    def dispose(self):
+        queries = self._free + [q for frame, _ in self._pending
+                                for scope in frame for q in (scope.start_query, scope.end_query)]
+        if queries:
+            self._gl.glDeleteQueries(len(queries), queries)
+        self._free, self._pending = [], deque()
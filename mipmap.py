@@ -0,0 +1,316 @@
+"""
+CPU side mipmap chain generation, block compression and on-disk cache
+of prebuilt mipmap chains.
+"""
+
+import os
+import struct
+import hashlib
+from collections import namedtuple
+
+import numpy as np
+
+
+GL_COMPRESSED_RGBA_S3TC_DXT1_EXT = 0x83F1
+GL_COMPRESSED_RGBA_S3TC_DXT5_EXT = 0x83F3
+
+COMPRESSION_FORMATS = {
+    'bc1': GL_COMPRESSED_RGBA_S3TC_DXT1_EXT,
+    'bc3': GL_COMPRESSED_RGBA_S3TC_DXT5_EXT,
+}
+
+
+MipLevel = namedtuple("MipLevel", ['width', 'height', 'data'])
+MipChain = namedtuple("MipChain", ['compression', 'levels'])
+
+
+# --- Color space -------------------------------------------------------------
+
+def srgb_to_linear(x):
+    """ Converts sRGB encoded values from [0, 1] range into linear ones """
+    return np.where(x <= 0.04045, x / 12.92, ((x + 0.055) / 1.055) ** 2.4)
+
+
+def linear_to_srgb(x):
+    """ Converts linear values from [0, 1] range into sRGB encoded ones """
+    x = np.clip(x, 0.0, 1.0)
+    return np.where(x <= 0.0031308, x * 12.92, 1.055 * x ** (1.0 / 2.4) - 0.055)
+
+
+def _to_float(image, srgb):
+    pixels = image.astype(np.float32) / 255.0
+    if srgb:
+        pixels[..., :3] = srgb_to_linear(pixels[..., :3])
+    return pixels
+
+
+def _to_bytes(pixels, srgb):
+    pixels = pixels.copy()
+    if srgb:
+        pixels[..., :3] = linear_to_srgb(pixels[..., :3])
+    return np.round(np.clip(pixels, 0.0, 1.0) * 255.0).astype(np.uint8)
+
+
+# --- Filters -----------------------------------------------------------------
+
+def _halve_axis(pixels, axis):
+    n = pixels.shape[axis]
+    if n == 1:
+        return pixels
+    pixels = np.moveaxis(pixels, axis, 0)
+    out = n // 2
+    result = (pixels[0:2 * out:2] + pixels[1:2 * out:2]) * 0.5
+    if n % 2:
+        # odd last row is folded into the last average
+        result[-1] = (pixels[-3] + pixels[-2] + pixels[-1]) / 3.0
+    return np.moveaxis(result, 0, axis)
+
+
+def downsample_box(pixels):
+    """ Halves image size averaging 2x2 blocks of pixels.
+
+    Sizes are rounded down as OpenGL expects, odd last row or column is
+    averaged together with the last block.
+    """
+    return _halve_axis(_halve_axis(pixels, 0), 1)
+
+
+def kaiser_kernel(taps: int=8, alpha: float=4.0):
+    """ Kaiser windowed sinc kernel for 2x decimation """
+    x = np.arange(taps) - (taps - 1) / 2.0
+    kernel = np.sinc(x / 2.0) * np.kaiser(taps, alpha)
+    return (kernel / kernel.sum()).astype(np.float32)
+
+
+def _decimate_axis(pixels, kernel, axis):
+    n = pixels.shape[axis]
+    if n == 1:
+        return pixels
+    taps = len(kernel)
+    out = max(1, n // 2)
+    before = taps // 2 - 1
+    after = taps + 2 * out - n - before
+    pad = [(0, 0)] * pixels.ndim
+    pad[axis] = (before, max(0, after))
+    padded = np.pad(pixels, pad, mode='edge')
+    result = 0
+    for k, weight in enumerate(kernel):
+        index = [slice(None)] * pixels.ndim
+        index[axis] = slice(k, k + 2 * out, 2)
+        result = result + weight * padded[tuple(index)]
+    return result
+
+
+def downsample_kaiser(pixels, taps: int=8, alpha: float=4.0):
+    """ Halves image size with separable Kaiser windowed sinc filter """
+    kernel = kaiser_kernel(taps, alpha)
+    pixels = _decimate_axis(pixels, kernel, 0)
+    return _decimate_axis(pixels, kernel, 1)
+
+
+FILTERS = {
+    'box': downsample_box,
+    'kaiser': downsample_kaiser,
+}
+
+
+def build_mip_chain(image, mip_filter: str='box', srgb: bool=True):
+    """ Builds list of images from full size one down to 1x1.
+
+    Filtering is performed in linear space when `srgb` is True (alpha
+    channel is always treated as linear).
+    """
+    downsample = FILTERS[mip_filter]
+    pixels = _to_float(image, srgb)
+    levels = [image]
+    while pixels.shape[0] > 1 or pixels.shape[1] > 1:
+        pixels = downsample(pixels)
+        levels.append(_to_bytes(pixels, srgb))
+    return levels
+
+
+# --- Block compression -------------------------------------------------------
+
+def _blocks(image):
+    """ Splits RGBA image into (N, 16, 4) array of 4x4 blocks """
+    h, w = image.shape[:2]
+    ph, pw = (-h) % 4, (-w) % 4
+    if ph or pw:
+        image = np.pad(image, [(0, ph), (0, pw), (0, 0)], mode='edge')
+    bh, bw = image.shape[0] // 4, image.shape[1] // 4
+    blocks = image.reshape(bh, 4, bw, 4, 4).swapaxes(1, 2)
+    return blocks.reshape(bh * bw, 16, 4)
+
+
+def _pack_565(rgb):
+    rgb = rgb.astype(np.uint32)
+    return ((rgb[:, 0] * 31 + 127) // 255 << 11 |
+            (rgb[:, 1] * 63 + 127) // 255 << 5 |
+            (rgb[:, 2] * 31 + 127) // 255).astype(np.uint16)
+
+
+def _unpack_565(c):
+    c = c.astype(np.uint32)
+    r, g, b = (c >> 11) & 31, (c >> 5) & 63, c & 31
+    return np.stack([(r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)],
+                    axis=-1).astype(np.float32)
+
+
+def _encode_color(blocks):
+    """ Encodes color part of blocks in four colors BC1 mode (8 bytes per block) """
+    rgb = blocks[..., :3]
+    c0 = _pack_565(rgb.max(axis=1))
+    c1 = _pack_565(rgb.min(axis=1))
+    swap = c0 < c1
+    c0, c1 = np.where(swap, c1, c0), np.where(swap, c0, c1)
+
+    e0, e1 = _unpack_565(c0), _unpack_565(c1)
+    palette = np.stack([e0, e1, (2 * e0 + e1) / 3.0, (e0 + 2 * e1) / 3.0], axis=1)
+    distance = ((rgb[:, :, None, :].astype(np.float32) - palette[:, None]) ** 2).sum(-1)
+    indexes = distance.argmin(axis=2).astype(np.uint32)
+    indexes[c0 == c1] = 0
+
+    shifts = np.arange(16, dtype=np.uint32) * 2
+    bits = (indexes << shifts).sum(axis=1, dtype=np.uint64).astype(np.uint32)
+
+    out = np.empty((len(blocks), 8), dtype=np.uint8)
+    out[:, 0:2] = c0.astype('<u2').view(np.uint8).reshape(-1, 2)
+    out[:, 2:4] = c1.astype('<u2').view(np.uint8).reshape(-1, 2)
+    out[:, 4:8] = bits.astype('<u4').view(np.uint8).reshape(-1, 4)
+    return out
+
+
+def _encode_alpha(blocks):
+    """ Encodes alpha channel of blocks in eight values BC3 mode (8 bytes per block) """
+    alpha = blocks[..., 3].astype(np.float32)
+    a0, a1 = alpha.max(axis=1), alpha.min(axis=1)
+    # palette order: a0, a1, then six values interpolated from a0 to a1
+    weights = np.array([0, 7, 1, 2, 3, 4, 5, 6], dtype=np.float32) / 7.0
+    palette = np.floor(a0[:, None] * (1.0 - weights) + a1[:, None] * weights + 0.5)
+    distance = np.abs(alpha[:, :, None] - palette[:, None])
+    indexes = distance.argmin(axis=2).astype(np.uint64)
+    indexes[a0 == a1] = 0
+
+    shifts = np.arange(16, dtype=np.uint64) * 3
+    bits = (indexes << shifts).sum(axis=1, dtype=np.uint64)
+
+    out = np.empty((len(blocks), 8), dtype=np.uint8)
+    out[:, 0] = a0.astype(np.uint8)
+    out[:, 1] = a1.astype(np.uint8)
+    out[:, 2:8] = bits.astype('<u8').view(np.uint8).reshape(-1, 8)[:, :6]
+    return out
+
+
+def compress(image, compression: str):
+    """ Compresses RGBA image with BC1 or BC3 and returns raw block bytes """
+    blocks = _blocks(image)
+    if compression == 'bc1':
+        return _encode_color(blocks).tobytes()
+    if compression == 'bc3':
+        return np.hstack([_encode_alpha(blocks), _encode_color(blocks)]).tobytes()
+    raise ValueError("unsupported compression: %s" % compression)
+
+
+# --- Cache -------------------------------------------------------------------
+
+class MipCache:
+    """ Stores prebuilt mipmap chains in directory, keyed by source content hash.
+
+    Every chain is kept in a single file: header, level descriptions and
+    level payloads following each other.
+    """
+
+    magic = b'PYOGLMIP'
+    version = 2  # 2: box filter rounds odd sizes down
+    header = struct.Struct('<8sHH8s')
+    level_header = struct.Struct('<III')
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def key(self, source: bytes, mip_filter: str, srgb: bool, compression: str):
+        digest = hashlib.sha1(source)
+        digest.update(("%s:%d:%s:%d" % (mip_filter, srgb, compression, self.version)).encode())
+        return digest.hexdigest()
+
+    def path(self, key: str):
+        return os.path.join(self.directory, key + '.mip')
+
+    def load(self, key: str):
+        """ Returns cached chain or None if there is no entry for key """
+        try:
+            with open(self.path(key), 'rb') as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        return self.unpack(content)
+
+    def save(self, key: str, chain: MipChain):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = self.path(key) + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(self.pack(chain))
+        os.replace(tmp, self.path(key))
+
+    def pack(self, chain: MipChain) -> bytes:
+        compression = (chain.compression or '').encode()
+        parts = [self.header.pack(self.magic, self.version, len(chain.levels), compression)]
+        for level in chain.levels:
+            parts.append(self.level_header.pack(level.width, level.height, len(level.data)))
+        parts.extend(bytes(level.data) for level in chain.levels)
+        return b''.join(parts)
+
+    def unpack(self, content: bytes):
+        magic, version, count, compression = self.header.unpack_from(content)
+        if magic != self.magic or version != self.version:
+            return None
+        offset = self.header.size
+        sizes = []
+        for _ in range(count):
+            sizes.append(self.level_header.unpack_from(content, offset))
+            offset += self.level_header.size
+        levels = []
+        for width, height, nbytes in sizes:
+            levels.append(MipLevel(width, height, content[offset:offset + nbytes]))
+            offset += nbytes
+        return MipChain(compression.rstrip(b'\0').decode() or None, levels)
+
+
+def unpack_chain(content: bytes) -> MipChain:
+    """ Reads chain stored in MipCache container, e.g. .mip file produced by assetc """
+    chain = MipCache('').unpack(content)
+    if chain is None:
+        raise ValueError("not a mipmap chain or unsupported version")
+    return chain
+
+
+def build(image, mip_filter: str='box', srgb: bool=True, compression: str=None) -> MipChain:
+    """ Builds ready to upload mipmap chain, optionally block compressed """
+    levels = []
+    for level in build_mip_chain(image, mip_filter, srgb):
+        h, w = level.shape[:2]
+        data = compress(level, compression) if compression else level.tobytes()
+        levels.append(MipLevel(w, h, data))
+    return MipChain(compression, levels)
+
+
+def load_or_build(filename: str, decode, cache: MipCache=None, mip_filter: str='box',
+                  srgb: bool=True, compression: str=None, read=None) -> MipChain:
+    """ Returns mipmap chain for image file, using cache when it is given.
+
+    Argument `decode` is a function converting file name into RGBA array,
+    `read` returns raw file contents (file is read from disk by default).
+    """
+    if cache is None:
+        return build(decode(filename), mip_filter, srgb, compression)
+    if read is None:
+        with open(filename, 'rb') as f:
+            content = f.read()
+    else:
+        content = read(filename)
+    key = cache.key(content, mip_filter, srgb, compression)
+    chain = cache.load(key)
+    if chain is None:
+        chain = build(decode(filename), mip_filter, srgb, compression)
+        cache.save(key, chain)
+    return chain
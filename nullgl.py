@@ -0,0 +1,230 @@
+"""
+Null OpenGL backend.
+
+Replaces OpenGL, GLU and GLUT functions in module namespaces (see
+gltrace.patch_modules) with implementations which do nothing but return
+plausible values: fresh object names, successful compile and link
+statuses, uniform locations of uniforms declared in shader sources. It
+makes possible to run render code with no GPU or display, measuring
+pure Python side cost of a frame.
+
+    with NullGL().install():
+        window = GlutWindow((640, 480))
+        window.camera = camera
+        window.on_display()
+"""
+
+import re
+import sys
+import ctypes
+from collections import Counter
+
+import numpy as np
+
+from gltrace import DEFAULT_MODULES, patch_modules, restore
+
+
+MODULES = DEFAULT_MODULES + ('camera', 'streaming', 'texture_loader', 'pointcloud')
+
+_struct = re.compile(r'struct\s+(\w+)\s*\{([^}]*)\}')
+_member = re.compile(r'(\w+)\s+(\w+)\s*(?:\[\s*\w+\s*\])?\s*;')
+_uniform = re.compile(r'uniform\s+(\w+)\s+(\w+)\s*(?:\[\s*\w+\s*\])?\s*;')
+
+
+def uniform_names(source: str):
+    """ Names of uniforms declared in shader source, struct members included """
+    structs = {name: [member for _, member in _member.findall(body)]
+               for name, body in _struct.findall(source)}
+    names = []
+    for kind, name in _uniform.findall(source):
+        if kind in structs:
+            names.extend("%s.%s" % (name, member) for member in structs[kind])
+        else:
+            names.append(name)
+    return names
+
+
+class NullGL:
+    """ Stand-in for OpenGL.GL and GLUT modules.
+
+    Functions without explicit implementation are no-ops returning None;
+    `calls` counts all calls by function name.
+    """
+
+    def __init__(self):
+        from OpenGL import GL
+        self._gl = GL
+        self.calls = Counter()
+        self._next_name = 1
+        self._sources = {}
+        self._attached = {}
+        self._locations = {}
+        self._mapped = {}
+        self._patches = []
+
+    def __getattr__(self, name):
+        if name.startswith('GL_'):
+            return getattr(self._gl, name)
+        if not name.startswith('gl'):
+            raise AttributeError(name)
+        calls = self.calls
+
+        def noop(*args, **kwargs):
+            calls[name] += 1
+
+        noop.__name__ = name
+        setattr(self, name, noop)
+        return noop
+
+    def install(self, modules=MODULES):
+        """ Patches GL, GLU and GLUT functions of given modules (names or objects) """
+        def replace(name, function):
+            return getattr(self, name)
+
+        for module in modules:
+            module = sys.modules.get(module) if isinstance(module, str) else module
+            if module is None:
+                continue
+            names = [name for name, value in vars(module).items()
+                     if name.startswith('gl') and callable(value)]
+            self._patches.extend(patch_modules([module], replace, names))
+        return self
+
+    def uninstall(self):
+        restore(self._patches)
+        self._patches = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.uninstall()
+
+    def _names(self, n):
+        first = self._next_name
+        self._next_name += n
+        if n == 1:
+            return first
+        return np.arange(first, first + n, dtype=np.uint32)
+
+    def _generator(name):
+        def generate(self, n=1, *args):
+            self.calls[name] += 1
+            return self._names(n)
+        generate.__name__ = name
+        return generate
+
+    glGenBuffers = _generator('glGenBuffers')
+    glGenTextures = _generator('glGenTextures')
+    glGenVertexArrays = _generator('glGenVertexArrays')
+    glGenFramebuffers = _generator('glGenFramebuffers')
+    glGenQueries = _generator('glGenQueries')
+    del _generator
+
+    def glCreateProgram(self):
+        self.calls['glCreateProgram'] += 1
+        program = self._names(1)
+        self._attached[program] = []
+        return program
+
+    def glCreateShader(self, shader_type):
+        self.calls['glCreateShader'] += 1
+        return self._names(1)
+
+    def glShaderSource(self, shader, source):
+        self.calls['glShaderSource'] += 1
+        if isinstance(source, (list, tuple)):
+            source = "".join(s.decode() if isinstance(s, bytes) else s for s in source)
+        self._sources[shader] = source.decode() if isinstance(source, bytes) else source
+
+    def glAttachShader(self, program, shader):
+        self.calls['glAttachShader'] += 1
+        self._attached.setdefault(program, []).append(shader)
+
+    def glLinkProgram(self, program):
+        self.calls['glLinkProgram'] += 1
+        locations = {}
+        for shader in self._attached.get(program, []):
+            for name in uniform_names(self._sources.get(shader, "")):
+                locations.setdefault(name, len(locations))
+        self._locations[program] = locations
+
+    def glGetUniformLocation(self, program, name):
+        self.calls['glGetUniformLocation'] += 1
+        name = name.decode() if isinstance(name, bytes) else name
+        return self._locations.get(program, {}).get(name, -1)
+
+    def glGetShaderiv(self, shader, pname):
+        self.calls['glGetShaderiv'] += 1
+        return self._gl.GL_TRUE
+
+    def glGetProgramiv(self, program, pname):
+        self.calls['glGetProgramiv'] += 1
+        return self._gl.GL_TRUE
+
+    def glGetShaderInfoLog(self, shader):
+        self.calls['glGetShaderInfoLog'] += 1
+        return b""
+
+    glGetProgramInfoLog = glGetShaderInfoLog
+
+    def glGetError(self):
+        self.calls['glGetError'] += 1
+        return self._gl.GL_NO_ERROR
+
+    def glCheckFramebufferStatus(self, target):
+        self.calls['glCheckFramebufferStatus'] += 1
+        return self._gl.GL_FRAMEBUFFER_COMPLETE
+
+    def glIsEnabled(self, cap):
+        self.calls['glIsEnabled'] += 1
+        return False
+
+    def glGetIntegerv(self, pname):
+        self.calls['glGetIntegerv'] += 1
+        return 0
+
+    def glReadPixels(self, x, y, width, height, fmt, kind):
+        self.calls['glReadPixels'] += 1
+        channels = 1 if fmt == self._gl.GL_DEPTH_COMPONENT else 4
+        size = 1 if kind == self._gl.GL_UNSIGNED_BYTE else 4
+        return bytes(width * height * channels * size)
+
+    def glMapBufferRange(self, target, offset, length, access):
+        self.calls['glMapBufferRange'] += 1
+        # memory stays alive until target is mapped again, arrays may still refer to it
+        memory = (ctypes.c_ubyte * length)()
+        self._mapped[target] = memory
+        return ctypes.addressof(memory)
+
+    def glUnmapBuffer(self, target):
+        self.calls['glUnmapBuffer'] += 1
+        return True
+
+    def glFenceSync(self, condition, flags):
+        self.calls['glFenceSync'] += 1
+        return self._names(1)
+
+    def glClientWaitSync(self, sync, flags, timeout):
+        self.calls['glClientWaitSync'] += 1
+        return self._gl.GL_ALREADY_SIGNALED
+
+    def glGetQueryObjectiv(self, query, pname, params):
+        self.calls['glGetQueryObjectiv'] += 1
+        params.value = 1
+
+    def glGetQueryObjectui64v(self, query, pname, params):
+        self.calls['glGetQueryObjectui64v'] += 1
+        params.value = 0
+
+    def gluErrorString(self, error):
+        self.calls['gluErrorString'] += 1
+        return b"no error"
+
+    def glutCreateWindow(self, title):
+        self.calls['glutCreateWindow'] += 1
+        return 1
+
+    def glutGet(self, state):
+        self.calls['glutGet'] += 1
+        return 0
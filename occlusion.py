@@ -0,0 +1,162 @@
+"""
+Software occlusion culling.
+
+Few large occluder meshes are rasterized on CPU into low resolution depth
+buffer, which is then reduced into hierarchical pyramid of maximal
+depths. Bounding boxes of objects are projected with the same WVP matrix
+and tested against pyramid level where their screen rectangle covers at
+most 2x2 texels. Nothing is read back from GPU, so the test never stalls
+rendering.
+
+Depth values are window depths in [0, 1] range, 1 is far plane.
+"""
+
+import numpy as np
+
+
+_box_corners = np.array([[x, y, z] for x in (0, 1) for y in (0, 1) for z in (0, 1)], dtype=np.float64)
+
+
+def _project(points, wvp):
+    """ Returns homogeneous clip coordinates of (N, 3) points for row-major matrix """
+    points = np.asarray(points, dtype=np.float64)
+    m = np.asarray(wvp, dtype=np.float64)
+    return points.dot(m[:, :3].T) + m[:, 3]
+
+
+class OcclusionCuller:
+    """ Depth buffer of occluders with max-depth pyramid.
+
+    Usage per frame:
+
+        culler.clear()
+        culler.add_occluder(vertices, indexes, wvp)
+        culler.build_pyramid()
+        visible = culler.test(box_min, box_max, vp)
+    """
+
+    near_w = 1e-5
+
+    def __init__(self, width: int=256, height: int=128):
+        self.width = width
+        self.height = height
+        self.depth = np.ones((height, width), dtype=np.float32)
+        self.pyramid = []
+        self.rasterized = 0
+
+    def clear(self):
+        self.depth.fill(1.0)
+        self.pyramid = []
+        self.rasterized = 0
+
+    def _to_window(self, clip):
+        w = clip[:, 3]
+        x = (clip[:, 0] / w * 0.5 + 0.5) * self.width
+        y = (clip[:, 1] / w * 0.5 + 0.5) * self.height
+        z = clip[:, 2] / w * 0.5 + 0.5
+        return x, y, z
+
+    def add_occluder(self, vertices, indexes, wvp):
+        """ Rasterizes triangles (vertices are (N, 3) positions) into depth buffer.
+
+        Triangles crossing near plane are skipped: that can only make
+        occlusion weaker, never hide visible object.
+        """
+        clip = _project(np.asarray(vertices).reshape(-1, 3), wvp)
+        triangles = np.asarray(indexes, dtype=np.int64).reshape(-1, 3)
+        triangles = triangles[(clip[triangles, 3] > self.near_w).all(axis=1)]
+        if not len(triangles):
+            return
+        x, y, z = self._to_window(clip)
+        x, y, z = x[triangles], y[triangles], z[triangles]
+
+        area = (x[:, 1] - x[:, 0]) * (y[:, 2] - y[:, 0]) - (x[:, 2] - x[:, 0]) * (y[:, 1] - y[:, 0])
+        # pixel centers inside triangle bounding box
+        x0 = np.maximum(np.ceil(x.min(axis=1) - 0.5), 0).astype(np.int64)
+        x1 = np.minimum(np.floor(x.max(axis=1) - 0.5), self.width - 1).astype(np.int64)
+        y0 = np.maximum(np.ceil(y.min(axis=1) - 0.5), 0).astype(np.int64)
+        y1 = np.minimum(np.floor(y.max(axis=1) - 0.5), self.height - 1).astype(np.int64)
+        nx, ny = x1 - x0 + 1, y1 - y0 + 1
+        keep = (np.abs(area) > 1e-12) & (nx > 0) & (ny > 0) & (z.min(axis=1) <= 1.0)
+        count = np.where(keep, nx * ny, 0)
+        if not count.sum():
+            return
+
+        tri = np.repeat(np.arange(len(count)), count)
+        local = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+        dy, dx = np.divmod(local, nx[tri])
+        px, py = x0[tri] + dx, y0[tri] + dy
+        cx, cy = px + 0.5, py + 0.5
+
+        tx, ty, inv_area = x[tri], y[tri], 1.0 / area[tri]
+        # barycentric coordinates, sign of area makes them positive for both windings
+        w0 = ((tx[:, 1] - cx) * (ty[:, 2] - cy) - (tx[:, 2] - cx) * (ty[:, 1] - cy)) * inv_area
+        w1 = ((tx[:, 2] - cx) * (ty[:, 0] - cy) - (tx[:, 0] - cx) * (ty[:, 2] - cy)) * inv_area
+        w2 = 1.0 - w0 - w1
+        inside = (w0 >= 0) & (w1 >= 0) & (w2 >= 0)
+        tz = z[tri[inside]]
+        depth = np.maximum(w0[inside] * tz[:, 0] + w1[inside] * tz[:, 1] + w2[inside] * tz[:, 2], 0.0)
+        np.minimum.at(self.depth.reshape(-1), py[inside] * self.width + px[inside], depth)
+        self.rasterized += int(inside.sum())
+
+    def build_pyramid(self):
+        """ Builds levels of maximal depths down to single texel """
+        level = self.depth
+        self.pyramid = [level]
+        while level.shape != (1, 1):
+            h, w = level.shape
+            # odd sizes are padded with far depth, which is conservative for max
+            padded = np.ones((h + h % 2, w + w % 2), dtype=np.float32)
+            padded[:h, :w] = level
+            level = padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2).max(axis=(1, 3))
+            self.pyramid.append(level)
+        return self.pyramid
+
+    def test(self, box_min, box_max, wvp):
+        """ Returns boolean mask of boxes which may be visible.
+
+        Boxes are given by (N, 3) minimal and maximal corners in space
+        which `wvp` matrix transforms into clip space (e.g. world space
+        boxes and projection * view matrix from Pipeline).
+        """
+        if not self.pyramid:
+            self.build_pyramid()
+        box_min = np.asarray(box_min, dtype=np.float64).reshape(-1, 3)
+        box_max = np.asarray(box_max, dtype=np.float64).reshape(-1, 3)
+        corners = box_min[:, None] + (box_max - box_min)[:, None] * _box_corners
+        clip = _project(corners.reshape(-1, 3), wvp)
+        x, y, z = self._to_window(np.where(clip[:, 3:] > self.near_w, clip, 1.0))
+        x, y, z = x.reshape(-1, 8), y.reshape(-1, 8), z.reshape(-1, 8)
+        front = (clip[:, 3] > self.near_w).reshape(-1, 8)
+
+        # boxes crossing near plane are always visible, boxes behind camera never
+        crossing = front.any(axis=1) & ~front.all(axis=1)
+        x0, x1 = x.min(axis=1), x.max(axis=1)
+        y0, y1 = y.min(axis=1), y.max(axis=1)
+        nearest = z.min(axis=1)
+        on_screen = (front.all(axis=1) & (x1 >= 0) & (x0 < self.width) & (y1 >= 0) &
+                     (y0 < self.height) & (nearest <= 1.0))
+
+        visible = crossing.copy()
+        candidates = np.nonzero(on_screen)[0]
+        if not len(candidates):
+            return visible
+        px0 = np.clip(np.floor(x0[candidates]), 0, self.width - 1).astype(np.int64)
+        px1 = np.clip(np.floor(x1[candidates]), 0, self.width - 1).astype(np.int64)
+        py0 = np.clip(np.floor(y0[candidates]), 0, self.height - 1).astype(np.int64)
+        py1 = np.clip(np.floor(y1[candidates]), 0, self.height - 1).astype(np.int64)
+        extent = np.maximum(px1 - px0, py1 - py0)
+        # at this level rectangle touches at most two texels along each axis
+        levels = np.minimum(np.ceil(np.log2(np.maximum(extent, 1))).astype(np.int64),
+                            len(self.pyramid) - 1)
+
+        occluder = np.empty(len(candidates), dtype=np.float32)
+        for level in np.unique(levels):
+            mask = levels == level
+            depth = self.pyramid[level]
+            a, b = px0[mask] >> level, px1[mask] >> level
+            c, d = py0[mask] >> level, py1[mask] >> level
+            occluder[mask] = np.maximum(np.maximum(depth[c, a], depth[c, b]),
+                                        np.maximum(depth[d, a], depth[d, b]))
+        visible[candidates] = nearest[candidates] <= occluder
+        return visible
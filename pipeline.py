@@ -116,6 +116,10 @@ class Pipeline:
     """ Rendering pipeline.
 
     Nothing more then matrix composition dependant on specified camera.
+
+    Camera is either `Camera` instance or controller providing cached
+    `view_matrix` (see controllers module); for the latter WVP matrix is
+    recomputed only when controller state changes.
     """
 
     def __init__(self, **params):
@@ -124,9 +128,19 @@ class Pipeline:
         self.rotation = Matrix4x4.rotation(params.get('rotation', None))
         self.projection = Matrix4x4.perspective_proj(params.get('projection', None))
         self._camera = None
+        self._world = None
+        self._wvp = None
+        self._wvp_version = None
 
     def set_camera(self, camera):
         self._camera = camera
+        self._wvp_version = None
+
+    @property
+    def world(self):
+        if self._world is None:
+            self._world = self.translation.dot(self.rotation).dot(self.scaling)
+        return self._world
 
     def get_trans(self):
         P, T, R, S = self.projection, self.translation, self.rotation, self.scaling
@@ -139,6 +153,13 @@ class Pipeline:
         if not self._camera:
             return P.dot(T).dot(R).dot(S)
 
+        elif hasattr(self._camera, 'view_matrix'):
+            version = self._camera.version
+            if version != self._wvp_version:
+                self._wvp = P.dot(self._camera.view_matrix).dot(self.world)
+                self._wvp_version = version
+            return self._wvp
+
         else:
             cx, cy, cz = self._camera.pos
             camera_trans = Matrix4x4.translation([-cx, -cy, -cz])
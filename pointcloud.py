@@ -0,0 +1,145 @@
+"""
+Large point clouds: chunked incremental upload and level of detail
+selection by binning points into screen pixels.
+"""
+
+import ctypes
+
+import numpy as np
+from OpenGL.GL import *
+
+
+def project(points, wvp):
+    """ Projects (N, 3) points with row-major WVP matrix into normalized device coordinates.
+
+    Returns (N, 3) array of NDC coordinates and boolean mask of points lying
+    inside view frustum.
+    """
+    wvp = np.asarray(wvp, dtype=np.float32)
+    clip = points @ wvp[:, :3].T + wvp[:, 3]
+    w = clip[:, 3]
+    visible = w > 1e-6
+    ndc = np.zeros((len(points), 3), dtype=np.float32)
+    ndc[visible] = clip[visible, :3] / w[visible, None]
+    visible &= (np.abs(ndc) <= 1.0).all(axis=1)
+    return ndc, visible
+
+
+def screen_space_decimate(points, wvp, width: int, height: int, cell: int=1):
+    """ Keeps at most one point per `cell` x `cell` block of screen pixels.
+
+    Returns sorted indexes of selected points. Runs in linear time: points
+    are scattered into pixel table, so the last point written to a pixel
+    represents it.
+    """
+    ndc, visible = project(points, wvp)
+    index = np.flatnonzero(visible)
+    if len(index) == 0:
+        return index.astype(np.uint32)
+    cols, rows = -(-width // cell), -(-height // cell)
+    px = ((ndc[index, 0] + 1.0) * 0.5 * (cols - 1) + 0.5).astype(np.int64)
+    py = ((ndc[index, 1] + 1.0) * 0.5 * (rows - 1) + 0.5).astype(np.int64)
+    owner = np.full(cols * rows, -1, dtype=np.int64)
+    owner[py * cols + px] = index
+    selected = owner[owner >= 0]
+    selected.sort()
+    return selected.astype(np.uint32)
+
+
+class PointCloud:
+    """ Stores points in fixed size vertex buffer chunks.
+
+    Appending fills the last chunk with glBufferSubData and allocates new
+    chunks when needed, so existing data is never uploaded again. CPU copy
+    of points is kept for level of detail selection.
+    """
+
+    def __init__(self, chunk_size: int=1 << 20):
+        self.chunk_size = chunk_size
+        self.chunks = []
+        self.count = 0
+        self._points = np.empty((0, 3), dtype=np.float32)
+        self._ibo = None
+        self._ranges = None
+
+    @property
+    def points(self):
+        return self._points[:self.count]
+
+    def append(self, points):
+        """ Uploads new points, shuffled so that any prefix of a chunk is a uniform sample """
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+        points = points[np.random.permutation(len(points))]
+        self._reserve(self.count + len(points))
+        self._points[self.count:self.count + len(points)] = points
+
+        done = 0
+        while done < len(points):
+            chunk, offset = divmod(self.count, self.chunk_size)
+            if chunk == len(self.chunks):
+                self.chunks.append(self._create_chunk())
+            n = min(len(points) - done, self.chunk_size - offset)
+            part = points[done:done + n]
+            glBindBuffer(GL_ARRAY_BUFFER, self.chunks[chunk])
+            glBufferSubData(GL_ARRAY_BUFFER, offset * 12, part.nbytes, part)
+            self.count += n
+            done += n
+        self._ranges = None
+
+    def dispose(self):
+        if self.chunks:
+            glDeleteBuffers(len(self.chunks), self.chunks)
+            self.chunks = []
+        if self._ibo is not None:
+            glDeleteBuffers(1, [self._ibo])
+            self._ibo = None
+        self.count = 0
+
+    def select(self, indexes):
+        """ Uploads indexes of points to draw instead of the whole cloud """
+        indexes = np.asarray(indexes, dtype=np.uint32)
+        chunk_of = indexes // self.chunk_size
+        bounds = np.searchsorted(chunk_of, np.arange(len(self.chunks) + 1))
+        local = indexes - chunk_of * self.chunk_size
+        if self._ibo is None:
+            self._ibo = glGenBuffers(1)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self._ibo)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, local.nbytes, local, GL_DYNAMIC_DRAW)
+        self._ranges = list(zip(bounds[:-1], bounds[1:]))
+
+    def clear_selection(self):
+        self._ranges = None
+
+    def draw(self, budget: int=None):
+        """ Draws selected points, or up to `budget` points of every chunk if no selection """
+        glEnableVertexAttribArray(0)
+        if self._ranges is not None:
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self._ibo)
+        for i, vbo in enumerate(self.chunks):
+            glBindBuffer(GL_ARRAY_BUFFER, vbo)
+            glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 0, ctypes.c_void_p(0))
+            if self._ranges is not None:
+                first, last = self._ranges[i]
+                if last > first:
+                    glDrawElements(GL_POINTS, int(last - first), GL_UNSIGNED_INT,
+                                   ctypes.c_void_p(int(first) * 4))
+            else:
+                count = min(self.chunk_size, self.count - i * self.chunk_size)
+                if budget is not None:
+                    count = min(count, budget // len(self.chunks))
+                glDrawArrays(GL_POINTS, 0, count)
+        glDisableVertexAttribArray(0)
+
+    def _reserve(self, size):
+        if size <= len(self._points):
+            return
+        capacity = max(size, 2 * len(self._points))
+        points = np.empty((capacity, 3), dtype=np.float32)
+        points[:self.count] = self._points[:self.count]
+        self._points = points
+
+    def _create_chunk(self):
+        vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.chunk_size * 12, None, GL_STATIC_DRAW)
+        return vbo
@@ -9,13 +9,14 @@ from OpenGL.GLUT import *
 
 from pipeline import Pipeline, ProjParams
 from camera import Camera
+from pointcloud import PointCloud, screen_space_decimate
+from scheduler import FrameScheduler
 
 
 class QtGlWindow(QMainWindow):
 
-    def __init__(self):
+    def __init__(self, points: int=0):
         super(QtGlWindow, self).__init__()
-        # self.data = np.array(.2*np.random.randn(100000, 2), dtype=np.float32)
         self.data = np.array([
             -0.5, 0.0, 0.5,
             0.5, 0.0, 0.5,
@@ -31,23 +32,39 @@ class QtGlWindow(QMainWindow):
             1, 2, 3,
             2, 3, 4
         ], dtype=np.uint32)
-        self.widget = GlPlotWidget()
-        self.widget.set_data(self.data, self.index)
+        if points:
+            self.widget = GlPlotWidget(mode='points')
+            self.widget.append_points(np.array(.2*np.random.randn(points, 3), dtype=np.float32))
+        else:
+            self.widget = GlPlotWidget()
+            self.widget.set_data(self.data, self.index)
         self.setGeometry(100, 100, self.widget.width, self.widget.height)
         self.setCentralWidget(self.widget)
 
-        # automatically update window
-        timer = QTimer(self)
-        timer.timeout.connect(self.widget.updateGL)
-        timer.start(1)
-
 
 class GlPlotWidget(QGLWidget):
+    """ Draws either indexed triangles (`mode='mesh'`) or large point clouds
+    (`mode='points'`).
+
+    In points mode, while camera moves only `interactive_budget` points are
+    drawn; once it stops, points are decimated to one per screen pixel.
+    """
 
     width, height = 600, 600
+    interactive_budget = 1 << 20
 
-    def __init__(self):
+    def __init__(self, mode: str='mesh'):
         super(GlPlotWidget, self).__init__()
+        self.mode = mode
+        self.cloud = PointCloud()
+        self.scheduler = FrameScheduler()
+        if mode == 'mesh':
+            self.scheduler.start_animation('rotation')
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.updateGL)
+        self._last_wvp = None
+        self._lod_dirty = True
         self.vbo = None
         self.ibo = None
         self.pipeline = None
@@ -68,6 +85,20 @@ class GlPlotWidget(QGLWidget):
         self.index = index
         self.count = data.shape[0]
 
+    def append_points(self, points):
+        """ Adds points to cloud uploading only new ones """
+        self.cloud.append(points)
+        self._lod_dirty = True
+        self.scheduler.invalidate()
+        self.request_redisplay()
+
+    def request_redisplay(self):
+        """ Starts timer for the next frame if scheduler has anything to render """
+        delay = self.scheduler.delay()
+        if delay is None or self._timer.isActive():
+            return
+        self._timer.start(int(delay * 1000))
+
     def initializeGL(self):
         glClear(GL_COLOR_BUFFER_BIT)
         glClearColor(0, 0, 0, 1)
@@ -116,6 +147,14 @@ class GlPlotWidget(QGLWidget):
         #self.pipeline.set_camera(self.camera)
 
     def paintGL(self):
+        self.scheduler.begin_frame()
+        if self.mode == 'points':
+            self._paint_points()
+        else:
+            self._paint_mesh()
+        self.request_redisplay()
+
+    def _paint_mesh(self):
         self.step += 0.1
         self.camera.render()
         projection = ProjParams(self.width, self.height, 1.0, 100.0, 60.0)
@@ -131,14 +170,41 @@ class GlPlotWidget(QGLWidget):
                        GL_UNSIGNED_INT, ctypes.c_void_p(0))
         glDisableVertexAttribArray(0)
 
+    def _paint_points(self):
+        self.camera.render()
+        projection = ProjParams(self.width, self.height, 1.0, 100.0, 60.0)
+        self.pipeline = Pipeline(translation=[0, 0, 3], projection=projection)
+        self.pipeline.set_camera(self.camera)
+        wvp = self.pipeline.get_wvp()
+
+        moving = self._last_wvp is None or not np.array_equal(wvp, self._last_wvp)
+        self._last_wvp = wvp
+        if moving:
+            self.cloud.clear_selection()
+            self._lod_dirty = True
+            # one more frame to notice that camera stopped
+            self.scheduler.invalidate()
+        elif self._lod_dirty:
+            self.cloud.select(screen_space_decimate(
+                self.cloud.points, wvp, self.width, self.height))
+            self._lod_dirty = False
+
+        glClear(GL_COLOR_BUFFER_BIT)
+        world_location = glGetUniformLocation(self.program, "gWorld")
+        glUniformMatrix4fv(world_location, 1, GL_TRUE, wvp)
+        self.cloud.draw(self.interactive_budget)
+
     def resizeGL(self, width, height):
         self.width, self.height = width, height
+        self._lod_dirty = True
+        self._last_wvp = None
+        self.scheduler.invalidate()
         glViewport(0, 0, self.width, self.height)
 
 
 if __name__ == "__main__":
     import sys
     app = QtGui.QApplication(sys.argv)
-    window = QtGlWindow()
+    window = QtGlWindow(int(sys.argv[1]) if len(sys.argv) > 1 else 0)
     window.show()
     app.exec_()
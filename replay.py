@@ -0,0 +1,180 @@
+"""
+Recording of input events and deterministic replay.
+
+Recorder sits between windowing toolkit and window callbacks and writes
+timestamped events to compact binary file, together with camera state
+at every frame. Replayer feeds recorded events back frame by frame and
+measures how long every frame takes, so different builds could be
+compared on exactly the same camera path.
+"""
+
+import sys
+import time
+import struct
+
+import numpy as np
+
+
+MOUSE, KEYBOARD, FRAME = 1, 2, 3
+
+_header = struct.Struct('<8sHd')
+_event = struct.Struct('<Bdiii')
+_camera = struct.Struct('<9d')
+
+
+class ReplayFormatError(Exception):
+    pass
+
+
+def _camera_state(window):
+    camera = getattr(window, 'camera', None)
+    if camera is None:
+        return (0.0,) * 9
+    return tuple(float(c) for v in (camera.pos, camera.target, camera.up) for c in v)
+
+
+class InputRecorder:
+    """ Proxy callback which records events before passing them to window.
+
+    Every event is stored as (type, time, a, b, c) record: (x, y, 0) for
+    mouse motion, (key, x, y) for keyboard; frame records are followed
+    by nine floats of camera position, target and up vectors.
+    """
+
+    magic = b'PYOGLREC'
+    version = 1
+
+    def __init__(self, window, path: str, step: float=1.0 / 60.0, clock=time.perf_counter):
+        self.window = window
+        self.frames = 0
+        self._clock = clock
+        self._start = clock()
+        self._file = open(path, 'wb')
+        self._file.write(_header.pack(self.magic, self.version, step))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def _write(self, kind, a=0, b=0, c=0):
+        self._file.write(_event.pack(kind, self._clock() - self._start, a, b, c))
+
+    def on_mouse(self, x, y):
+        self._write(MOUSE, x, y)
+        self.window.on_mouse(x, y)
+
+    def on_keyboard(self, key, x=0, y=0):
+        self._write(KEYBOARD, int(key), x, y)
+        self.window.on_keyboard(key, x, y)
+
+    def on_display(self):
+        self.window.on_display()
+        self._write(FRAME, self.frames)
+        self._file.write(_camera.pack(*_camera_state(self.window)))
+        self.frames += 1
+
+    def attach_glut(self):
+        """ Routes GLUT callbacks of current window through recorder """
+        from OpenGL.GLUT import glutDisplayFunc, glutPassiveMotionFunc, glutSpecialFunc
+        glutDisplayFunc(self.on_display)
+        glutPassiveMotionFunc(self.on_mouse)
+        glutSpecialFunc(self.on_keyboard)
+
+
+class Recording:
+    """ Events read from file, grouped by frames """
+
+    def __init__(self, step, frames, cameras):
+        self.step = step
+        self.frames = frames
+        self.cameras = cameras
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, 'rb') as f:
+            content = f.read()
+        magic, version, step = _header.unpack_from(content)
+        if magic != InputRecorder.magic or version != InputRecorder.version:
+            raise ReplayFormatError("not a recording: %s" % path)
+        offset = _header.size
+        frames, cameras, events = [], [], []
+        while offset < len(content):
+            kind, t, a, b, c = _event.unpack_from(content, offset)
+            offset += _event.size
+            if kind == FRAME:
+                frames.append(events)
+                cameras.append(_camera.unpack_from(content, offset))
+                offset += _camera.size
+                events = []
+            else:
+                events.append((kind, t, a, b, c))
+        return cls(step, frames, np.array(cameras).reshape(-1, 9))
+
+
+class InputReplayer:
+    """ Feeds recorded events to window at fixed timestep and times every frame.
+
+    In headless mode frames are rendered back to back by calling
+    `on_display` directly; otherwise GLUT timer drives them at recorded step.
+    """
+
+    def __init__(self, recording: Recording, window, clock=time.perf_counter):
+        self.recording = recording
+        self.window = window
+        self.timings = []
+        self.cameras = []
+        self._clock = clock
+        self._frame = 0
+
+    def _replay_frame(self):
+        for kind, _, a, b, c in self.recording.frames[self._frame]:
+            if kind == MOUSE:
+                self.window.on_mouse(a, b)
+            elif kind == KEYBOARD:
+                self.window.on_keyboard(a, b, c)
+        start = self._clock()
+        self.window.on_display()
+        self.timings.append(self._clock() - start)
+        self.cameras.append(_camera_state(self.window))
+        self._frame += 1
+
+    def run_headless(self):
+        while self._frame < len(self.recording.frames):
+            self._replay_frame()
+        return self.timings
+
+    def run_glut(self):
+        """ Replays inside GLUT main loop, leaving it when recording is over """
+        from OpenGL.GLUT import glutTimerFunc, glutLeaveMainLoop, glutMainLoop
+        period = int(self.recording.step * 1000)
+
+        def tick(value):
+            if self._frame >= len(self.recording.frames):
+                glutLeaveMainLoop()
+                return
+            self._replay_frame()
+            glutTimerFunc(period, tick, 0)
+
+        glutTimerFunc(period, tick, 0)
+        glutMainLoop()
+        return self.timings
+
+    def divergence(self):
+        """ Largest difference between recorded and replayed camera states """
+        replayed = np.array(self.cameras).reshape(-1, 9)
+        n = min(len(replayed), len(self.recording.cameras))
+        if n == 0:
+            return 0.0
+        return float(np.abs(replayed[:n] - self.recording.cameras[:n]).max())
+
+    def write_timings(self, out=sys.stdout):
+        """ Writes per-frame timings in milliseconds as CSV """
+        out.write("frame,ms\n")
+        for i, t in enumerate(self.timings):
+            out.write("%d,%.4f\n" % (i, t * 1000.0))
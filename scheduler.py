@@ -0,0 +1,70 @@
+"""
+Decides when next frame should be rendered.
+
+Frames are rendered only when something was changed (camera moved,
+scene updated, window resized) or while animation is running, and never
+more often than target frame rate allows.
+"""
+
+import time
+
+
+class FrameScheduler:
+    """ Keeps track of dirty state and running animations.
+
+    Typical usage from windowing toolkit callbacks:
+
+        scheduler.invalidate()              # on input or data change
+        delay = scheduler.delay()           # None means nothing to render
+        ... arm timer for `delay` seconds, then redraw ...
+        scheduler.begin_frame()             # at the start of rendering
+
+    Target frame rate of zero means frames are not limited by scheduler
+    (e.g. when buffer swap is synchronized with vertical retrace).
+    """
+
+    def __init__(self, target_fps: float=60.0, clock=time.perf_counter):
+        self.frame_interval = 1.0 / target_fps if target_fps else 0.0
+        self.frames = 0
+        self._clock = clock
+        self._dirty = True
+        self._animations = set()
+        self._last_frame = None
+
+    @property
+    def active(self):
+        """ True if there is a reason to render another frame """
+        return self._dirty or bool(self._animations)
+
+    def invalidate(self):
+        """ Marks scene as changed so one more frame is rendered """
+        self._dirty = True
+
+    def start_animation(self, key='default'):
+        self._animations.add(key)
+
+    def stop_animation(self, key='default'):
+        self._animations.discard(key)
+
+    def delay(self):
+        """ Returns seconds to wait before next frame, or None if nothing to render """
+        if not self.active:
+            return None
+        if self._last_frame is None:
+            return 0.0
+        return max(0.0, self._last_frame + self.frame_interval - self._clock())
+
+    def begin_frame(self):
+        """ Should be called when frame rendering starts """
+        self._dirty = False
+        self._last_frame = self._clock()
+        self.frames += 1
+
+    def wait(self, sleep=time.sleep):
+        """ Blocks until next frame is due; returns False if nothing to render """
+        delay = self.delay()
+        if delay is None:
+            return False
+        if delay > 0:
+            sleep(delay)
+        return True
@@ -0,0 +1,45 @@
+#version 400
+
+in vec2 TexCoord0;
+in vec3 WorldPos0;
+in vec3 Normal0;
+in float ViewDepth;
+out vec4 FragColor;
+
+uniform sampler2D gSampler;
+uniform samplerBuffer gLights;          // 3 texels per light, see LIGHT_DTYPE
+uniform usamplerBuffer gClusters;       // offset and count of cluster lights
+uniform usamplerBuffer gLightIndexes;
+uniform ivec3 gClusterCount;
+uniform vec2 gTileSize;
+uniform float gSliceScale;
+uniform float gSliceBias;
+uniform vec3 gAmbient;
+
+void main()
+{
+    ivec2 tile = clamp(ivec2(gl_FragCoord.xy / gTileSize), ivec2(0), gClusterCount.xy - 1);
+    int slice = clamp(int(log(ViewDepth) * gSliceScale - gSliceBias), 0, gClusterCount.z - 1);
+    int cluster = (slice * gClusterCount.y + tile.y) * gClusterCount.x + tile.x;
+    uvec2 range = texelFetch(gClusters, cluster).xy;
+
+    vec3 normal = normalize(Normal0);
+    vec3 light = gAmbient;
+    for (uint i = 0u; i < range.y; ++i) {
+        int index = int(texelFetch(gLightIndexes, int(range.x + i)).x) * 3;
+        vec4 positionRadius = texelFetch(gLights, index);
+        vec4 colorIntensity = texelFetch(gLights, index + 1);
+        vec4 directionCutoff = texelFetch(gLights, index + 2);
+
+        vec3 toLight = positionRadius.xyz - WorldPos0;
+        float dist = length(toLight);
+        if (dist >= positionRadius.w)
+            continue;
+        vec3 L = toLight / dist;
+        if (dot(-L, directionCutoff.xyz) < directionCutoff.w)
+            continue;
+        float falloff = 1.0 - dist * dist / (positionRadius.w * positionRadius.w);
+        light += colorIntensity.rgb * colorIntensity.a * max(dot(normal, L), 0.0) * falloff * falloff;
+    }
+    FragColor = texture(gSampler, TexCoord0.xy) * vec4(light, 1.0);
+}
@@ -0,0 +1,27 @@
+#version 400
+
+out vec4 FragColor;
+
+struct DirectionalLight
+{
+  vec3 Color;
+  float AmbientIntensity;
+  float DiffuseIntensity;
+  vec3 Direction;
+};
+
+uniform DirectionalLight gDirectionalLight;
+uniform sampler2D gAlbedo;
+uniform sampler2D gNormal;
+uniform vec2 gScreenSize;
+
+void main()
+{
+    vec2 uv = gl_FragCoord.xy / gScreenSize;
+    vec4 normal = texture(gNormal, uv);
+    if (normal.w == 0.0)
+        discard;
+    float diffuse = max(dot(normal.xyz, -gDirectionalLight.Direction), 0.0);
+    float intensity = gDirectionalLight.AmbientIntensity + gDirectionalLight.DiffuseIntensity * diffuse;
+    FragColor = texture(gAlbedo, uv) * vec4(gDirectionalLight.Color * intensity, 1.0);
+}
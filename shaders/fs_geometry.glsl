@@ -0,0 +1,16 @@
+#version 400
+
+in vec2 TexCoord0;
+in vec3 Normal0;
+
+layout (location=0) out vec4 Albedo;
+layout (location=1) out vec4 Normal;
+
+uniform sampler2D gSampler;
+
+void main()
+{
+    Albedo = texture(gSampler, TexCoord0.xy);
+    // w marks covered pixels, background keeps cleared zero
+    Normal = vec4(normalize(Normal0), 1.0);
+}
@@ -0,0 +1,33 @@
+#version 400
+
+flat in vec4 LightPositionRadius;
+flat in vec4 LightColorIntensity;
+flat in vec4 LightDirectionCutoff;
+out vec4 FragColor;
+
+uniform sampler2D gAlbedo;
+uniform sampler2D gNormal;
+uniform sampler2D gDepth;
+uniform vec2 gScreenSize;
+uniform mat4 gInverseViewProj;
+
+void main()
+{
+    vec2 uv = gl_FragCoord.xy / gScreenSize;
+    vec4 normal = texture(gNormal, uv);
+    if (normal.w == 0.0)
+        discard;
+    vec4 ndc = vec4(vec3(uv, texture(gDepth, uv).r) * 2.0 - 1.0, 1.0);
+    vec4 world = gInverseViewProj * ndc;
+    vec3 toLight = LightPositionRadius.xyz - world.xyz / world.w;
+
+    float dist = length(toLight);
+    if (dist >= LightPositionRadius.w)
+        discard;
+    vec3 L = toLight / dist;
+    if (dot(-L, LightDirectionCutoff.xyz) < LightDirectionCutoff.w)
+        discard;
+    float falloff = 1.0 - dist * dist / (LightPositionRadius.w * LightPositionRadius.w);
+    float diffuse = max(dot(normal.xyz, L), 0.0) * falloff * falloff;
+    FragColor = texture(gAlbedo, uv) * vec4(LightColorIntensity.rgb * LightColorIntensity.a * diffuse, 1.0);
+}
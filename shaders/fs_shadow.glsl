@@ -0,0 +1,6 @@
+#version 400
+
+// depth is written by fixed function stage
+void main()
+{
+}
@@ -0,0 +1,27 @@
+#version 400
+#include "shadow.inc"
+
+in vec2 TexCoord0;
+in vec3 Normal0;
+in vec3 WorldPos0;
+in float ViewDepth0;
+out vec4 FragColor;
+
+struct DirectionalLight
+{
+  vec3 Color;
+  float AmbientIntensity;
+  float DiffuseIntensity;
+  vec3 Direction;
+};
+
+uniform DirectionalLight gDirectionalLight;
+uniform sampler2D gSampler;
+
+void main()
+{
+    float diffuse = max(dot(normalize(Normal0), -gDirectionalLight.Direction), 0.0) *
+        gDirectionalLight.DiffuseIntensity * ShadowFactor(WorldPos0, ViewDepth0);
+    FragColor = texture(gSampler, TexCoord0.xy) *
+        vec4(gDirectionalLight.Color * (gDirectionalLight.AmbientIntensity + diffuse), 1.0);
+}
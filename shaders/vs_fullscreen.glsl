@@ -0,0 +1,7 @@
+#version 400
+
+// single triangle covering the screen, no vertex attributes needed
+void main() {
+    vec2 position = vec2((gl_VertexID << 1) & 2, gl_VertexID & 2);
+    gl_Position = vec4(position * 2.0 - 1.0, 0.0, 1.0);
+}
@@ -0,0 +1,19 @@
+#version 400
+layout (location=0) in vec3 Position;
+// per instance light data, see LIGHT_DTYPE
+layout (location=1) in vec4 PositionRadius;
+layout (location=2) in vec4 ColorIntensity;
+layout (location=3) in vec4 DirectionCutoff;
+
+uniform mat4 gViewProj;
+
+flat out vec4 LightPositionRadius;
+flat out vec4 LightColorIntensity;
+flat out vec4 LightDirectionCutoff;
+
+void main() {
+    gl_Position = gViewProj * vec4(PositionRadius.xyz + Position * PositionRadius.w, 1.0);
+    LightPositionRadius = PositionRadius;
+    LightColorIntensity = ColorIntensity;
+    LightDirectionCutoff = DirectionCutoff;
+}
@@ -0,0 +1,8 @@
+#version 400
+layout (location=0) in vec3 Position;
+
+uniform mat4 gLightWVP;
+
+void main() {
+    gl_Position = gLightWVP * vec4(Position, 1.0);
+}
@@ -0,0 +1,127 @@
+"""
+Startup tracing.
+
+Records time spent on module imports and on named initialization stages,
+keeping their nesting, and writes it as Chrome trace JSON (open it with
+chrome://tracing or https://ui.perfetto.dev).
+
+Tracing is off unless environment variable PYOGL_STARTUP_TRACE holds path
+of output file; module should be imported before others to see their
+imports:
+
+    PYOGL_STARTUP_TRACE=startup.json python glutwindow.py
+"""
+
+import os
+import sys
+import json
+import time
+import builtins
+import threading
+from contextlib import contextmanager
+
+
+ENVIRONMENT_VARIABLE = 'PYOGL_STARTUP_TRACE'
+
+
+class StartupTracer:
+    """ Collects (category, name, start, duration, depth) records of nested stages """
+
+    def __init__(self, clock=time.perf_counter):
+        self.records = []
+        self._clock = clock
+        self._origin = clock()
+        self._depth = 0
+        self._import = None
+        self._thread = threading.get_ident()
+
+    @contextmanager
+    def stage(self, name: str, category: str='stage'):
+        start = self._clock()
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            self.records.append((category, name, start - self._origin,
+                                 self._clock() - start, self._depth))
+
+    def mark(self, name: str):
+        """ Records instant event, e.g. first frame presented """
+        self.records.append(('mark', name, self._clock() - self._origin, 0.0, self._depth))
+
+    def trace_imports(self):
+        """ Starts timing imports of modules which were not imported yet """
+        if self._import is not None:
+            return
+        original = self._import = builtins.__import__
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in sys.modules or threading.get_ident() != self._thread:
+                return original(name, globals, locals, fromlist, level)
+            with self.stage(name, 'import'):
+                return original(name, globals, locals, fromlist, level)
+
+        builtins.__import__ = timed_import
+
+    def stop_imports(self):
+        if self._import is not None:
+            builtins.__import__ = self._import
+            self._import = None
+
+    def elapsed(self):
+        return self._clock() - self._origin
+
+    def chrome_trace(self):
+        """ Returns records as list of Chrome trace events (times in microseconds) """
+        pid = os.getpid()
+        events = []
+        for category, name, start, duration, _ in sorted(self.records, key=lambda r: (r[2], r[4])):
+            event = {'name': name, 'cat': category, 'pid': pid, 'tid': 0,
+                     'ts': start * 1e6}
+            if category == 'mark':
+                event.update(ph='i', s='g')
+            else:
+                event.update(ph='X', dur=duration * 1e6)
+            events.append(event)
+        return events
+
+    def write(self, path: str):
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.chrome_trace(), 'displayTimeUnit': 'ms'}, f)
+
+    def summary(self, out=sys.stderr, limit: int=15):
+        """ Writes slowest stages and imports as indented list """
+        out.write("startup: %.1f ms\n" % (self.elapsed() * 1000.0))
+        slowest = sorted(self.records, key=lambda r: -r[3])[:limit]
+        for category, name, start, duration, depth in sorted(slowest, key=lambda r: r[2]):
+            out.write("%8.1f ms  %s%s %s\n" % (duration * 1000.0, "  " * depth, category, name))
+
+
+TRACER = StartupTracer() if os.environ.get(ENVIRONMENT_VARIABLE) else None
+_finished = False
+
+if TRACER is not None:
+    TRACER.trace_imports()
+
+
+@contextmanager
+def stage(name: str):
+    """ Times initialization stage if tracing is enabled """
+    if TRACER is None:
+        yield
+    else:
+        with TRACER.stage(name):
+            yield
+
+
+def first_frame():
+    """ Called after first frame was presented: finishes tracing and writes report """
+    global _finished
+    if TRACER is None or _finished:
+        return
+    _finished = True
+    TRACER.mark('first frame')
+    TRACER.stop_imports()
+    TRACER.write(os.environ[ENVIRONMENT_VARIABLE])
+    TRACER.summary()
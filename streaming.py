@@ -0,0 +1,158 @@
+"""
+Ring buffer for vertex data which changes every frame.
+"""
+
+import ctypes
+
+import numpy as np
+from OpenGL.GL import *
+
+
+class StreamingBufferError(Exception):
+    pass
+
+
+def _mapped_array(address, nbytes):
+    if not address:
+        raise StreamingBufferError("cannot map buffer")
+    return np.frombuffer((ctypes.c_ubyte * nbytes).from_address(address), dtype=np.uint8)
+
+
+class StreamingBuffer:
+    """ Buffer object split into `frames` regions which are written in turn.
+
+    When persistent mapping is available (OpenGL 4.4 or ARB_buffer_storage)
+    the whole buffer is mapped once with coherent persistent mapping, and
+    every region is guarded by a fence, so CPU writes only into regions
+    which GPU has finished reading. Otherwise the buffer is orphaned each
+    frame and mapped with invalidation.
+
+    Usage per frame:
+
+        buffer.begin_frame()
+        offset = buffer.write(vertices)      # or: offset, view = buffer.reserve(...)
+        buffer.flush()
+        glVertexAttribPointer(..., ctypes.c_void_p(offset))
+        glDrawArrays(...)
+        buffer.end_frame()
+    """
+
+    alignment = 16
+
+    def __init__(self, region_size: int, target=GL_ARRAY_BUFFER, frames: int=3,
+                 persistent: bool=None):
+        self.target = target
+        self.region_size = region_size
+        self.frames = frames
+        self.persistent = bool(glBufferStorage) if persistent is None else persistent
+        self.buffer = None
+        self.stalls = 0
+        self._region = -1
+        self._cursor = 0
+        self._view = None
+        self._fences = [None] * frames
+
+    def __enter__(self):
+        self.init()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.dispose()
+
+    def init(self):
+        self.buffer = glGenBuffers(1)
+        glBindBuffer(self.target, self.buffer)
+        if self.persistent:
+            total = self.region_size * self.frames
+            flags = GL_MAP_WRITE_BIT | GL_MAP_PERSISTENT_BIT | GL_MAP_COHERENT_BIT
+            glBufferStorage(self.target, total, None, flags)
+            self._view = _mapped_array(glMapBufferRange(self.target, 0, total, flags), total)
+        else:
+            glBufferData(self.target, self.region_size, None, GL_STREAM_DRAW)
+
+    def dispose(self):
+        for fence in self._fences:
+            if fence is not None:
+                glDeleteSync(fence)
+        self._fences = [None] * self.frames
+        if self.buffer is not None:
+            glBindBuffer(self.target, self.buffer)
+            if self._view is not None:
+                glUnmapBuffer(self.target)
+                self._view = None
+            glDeleteBuffers(1, [self.buffer])
+            self.buffer = None
+
+    @property
+    def base(self):
+        """ Offset of current region from the start of buffer object """
+        return self._region * self.region_size if self.persistent else 0
+
+    def begin_frame(self):
+        """ Moves to next region and makes it writable """
+        self._region = (self._region + 1) % self.frames
+        self._cursor = 0
+        glBindBuffer(self.target, self.buffer)
+        if self.persistent:
+            self._wait(self._region)
+        else:
+            # orphan previous storage so driver doesn't synchronize with GPU
+            glBufferData(self.target, self.region_size, None, GL_STREAM_DRAW)
+            flags = GL_MAP_WRITE_BIT | GL_MAP_INVALIDATE_BUFFER_BIT
+            address = glMapBufferRange(self.target, 0, self.region_size, flags)
+            self._view = _mapped_array(address, self.region_size)
+
+    def reserve(self, shape, dtype=np.float32):
+        """ Allocates space in current region.
+
+        Returns offset of allocated space inside buffer object and array
+        which refers to mapped memory, so it could be filled in place.
+        """
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        start = -(-self._cursor // self.alignment) * self.alignment
+        if start + nbytes > self.region_size:
+            raise StreamingBufferError(
+                "region overflow: %d bytes requested, %d available"
+                % (nbytes, self.region_size - start))
+        self._cursor = start + nbytes
+        offset = self.base + start
+        view = self._view[offset:offset + nbytes] if self.persistent \
+            else self._view[start:start + nbytes]
+        return offset, view.view(dtype).reshape(shape)
+
+    def write(self, data) -> int:
+        """ Copies array into current region and returns its offset in buffer """
+        data = np.ascontiguousarray(data)
+        offset, view = self.reserve(data.shape, data.dtype)
+        view[...] = data
+        return offset
+
+    def flush(self):
+        """ Makes written data visible to GPU; call before issuing draw calls """
+        if not self.persistent and self._view is not None:
+            glBindBuffer(self.target, self.buffer)
+            glUnmapBuffer(self.target)
+            self._view = None
+
+    def end_frame(self):
+        """ Marks current region as used by commands submitted so far """
+        self.flush()
+        if self.persistent:
+            fence = self._fences[self._region]
+            if fence is not None:
+                glDeleteSync(fence)
+            self._fences[self._region] = glFenceSync(GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+
+    def _wait(self, region):
+        fence = self._fences[region]
+        if fence is None:
+            return
+        status = glClientWaitSync(fence, 0, 0)
+        if status not in (GL_ALREADY_SIGNALED, GL_CONDITION_SATISFIED):
+            # GPU is more than `frames` frames behind, nothing to do but wait
+            self.stalls += 1
+            while status not in (GL_ALREADY_SIGNALED, GL_CONDITION_SATISFIED, GL_WAIT_FAILED):
+                status = glClientWaitSync(fence, GL_SYNC_FLUSH_COMMANDS_BIT, 1000000)
+        glDeleteSync(fence)
+        self._fences[region] = None
@@ -0,0 +1,213 @@
+"""
+Clustered forward lighting.
+
+View frustum is split into tiles on screen and exponential slices in
+depth. Every frame lights are assigned to clusters on CPU and resulting
+per-cluster lists are uploaded into texture buffers, so that fragment
+shader iterates only over lights touching fragment's cluster.
+"""
+
+import math
+
+import numpy as np
+from OpenGL.GL import *
+
+from utils import to_radian
+from .technique import Technique
+
+
+# three RGBA32F texels per light: position and radius, color and intensity,
+# spot direction and cosine of cone half angle (-1 for point lights)
+LIGHT_DTYPE = np.dtype([('position', np.float32, 3), ('radius', np.float32),
+                        ('color', np.float32, 3), ('intensity', np.float32),
+                        ('direction', np.float32, 3), ('cutoff', np.float32)])
+
+
+def make_lights(count: int):
+    """ Returns array of point lights with white color and zero radius """
+    lights = np.zeros(count, dtype=LIGHT_DTYPE)
+    lights['color'] = 1.0
+    lights['intensity'] = 1.0
+    lights['cutoff'] = -1.0
+    return lights
+
+
+def to_view_space(positions, view_matrix):
+    """ Transforms (N, 3) world positions with row-major view matrix """
+    view = np.asarray(view_matrix, dtype=np.float64)
+    return positions @ view[:3, :3].T + view[:3, 3]
+
+
+class ClusterGrid:
+    """ Cluster layout for perspective projection described by ProjParams.
+
+    Camera looks along positive Z of view space, tile (0, 0) is in bottom
+    left corner of the screen like gl_FragCoord origin.
+    """
+
+    def __init__(self, proj, tiles_x: int=16, tiles_y: int=9, slices: int=24):
+        self.proj = proj
+        self.shape = tiles_x, tiles_y, slices
+        self.size = tiles_x * tiles_y * slices
+        self.tile_size = proj.width / tiles_x, proj.height / tiles_y
+        thf = math.tan(to_radian(proj.fov / 2.0))
+        ar = proj.width / proj.height
+        self._planes_x = self._planes(tiles_x, thf * ar)
+        self._planes_y = self._planes(tiles_y, thf)
+        log_ratio = math.log(proj.z_far / proj.z_near)
+        self.slice_scale = slices / log_ratio
+        self.slice_bias = slices * math.log(proj.z_near) / log_ratio
+
+    @staticmethod
+    def _planes(tiles, k):
+        """ Slopes and normalization factors of planes between tiles """
+        slopes = np.linspace(-1.0, 1.0, tiles + 1) * k
+        return slopes, 1.0 / np.sqrt(1.0 + slopes * slopes)
+
+    @staticmethod
+    def _tile_range(coord, depth, radius, planes):
+        """ First and last tile touched by spheres along one screen axis """
+        slopes, norm = planes
+        dist = (coord[:, None] - depth[:, None] * slopes) * norm
+        overlap = (dist[:, :-1] >= -radius[:, None]) & (dist[:, 1:] <= radius[:, None])
+        first = overlap.argmax(axis=1)
+        last = overlap.shape[1] - 1 - overlap[:, ::-1].argmax(axis=1)
+        return first, last, overlap.any(axis=1)
+
+    def slice_of(self, depth):
+        s = np.floor(np.log(depth) * self.slice_scale - self.slice_bias)
+        return np.clip(s, 0, self.shape[2] - 1).astype(np.int64)
+
+    def assign(self, positions, radii):
+        """ Assigns lights given by view space positions to clusters.
+
+        Returns (grid, indexes): grid is (clusters, 2) array of offset and
+        count of cluster's lights in `indexes` array of light numbers.
+        """
+        tx, ty, tz = self.shape
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        radii = np.asarray(radii, dtype=np.float64)
+        x, y, z = positions[:, 0], positions[:, 1], positions[:, 2]
+
+        x0, x1, in_x = self._tile_range(x, z, radii, self._planes_x)
+        y0, y1, in_y = self._tile_range(y, z, radii, self._planes_y)
+        z_near, z_far = self.proj.z_near, self.proj.z_far
+        z0 = self.slice_of(np.clip(z - radii, z_near, z_far))
+        z1 = self.slice_of(np.clip(z + radii, z_near, z_far))
+        visible = in_x & in_y & (z + radii >= z_near) & (z - radii <= z_far)
+
+        nx, ny, nz = x1 - x0 + 1, y1 - y0 + 1, z1 - z0 + 1
+        volume = np.where(visible, nx * ny * nz, 0)
+        total = int(volume.sum())
+
+        # expand every light into the box of clusters it touches
+        light = np.repeat(np.arange(len(radii)), volume)
+        local = np.arange(total) - np.repeat(np.cumsum(volume) - volume, volume)
+        row, layer = np.repeat(nx, volume), np.repeat(nx * ny, volume)
+        dz, rest = np.divmod(local, layer)
+        dy, dx = np.divmod(rest, row)
+        cluster = ((z0[light] + dz) * ty + y0[light] + dy) * tx + x0[light] + dx
+
+        # stable sort of 16 bit keys is radix sort, several times faster
+        key = cluster.astype(np.uint16) if self.size <= 1 << 16 else cluster
+        order = np.argsort(key, kind='stable')
+        counts = np.bincount(cluster, minlength=self.size)
+        grid = np.empty((self.size, 2), dtype=np.uint32)
+        grid[:, 0] = np.cumsum(counts) - counts
+        grid[:, 1] = counts
+        return grid, light[order].astype(np.uint32)
+
+
+class ClusteredLightingTechnique(Technique):
+    """ Shades textured geometry with many point and spot lights.
+
+    Expects position, texture coordinates and normal attributes at
+    locations 0, 1 and 2.
+    """
+
+    def __init__(self, vs_path: str, fs_path: str, proj, tiles_x: int=16,
+                 tiles_y: int=9, slices: int=24):
+        super(ClusteredLightingTechnique, self).__init__()
+        self._vs_path = vs_path
+        self._fs_path = fs_path
+        self.grid = ClusterGrid(proj, tiles_x, tiles_y, slices)
+        self.light_count = 0
+        self.assigned = 0
+        self._buffers = []
+        self._textures = []
+        self._light_unit = None
+        self._locations = {}
+
+    def init(self):
+        super().init()
+        self.add_shader(GL_VERTEX_SHADER, self._vs_path)
+        self.add_shader(GL_FRAGMENT_SHADER, self._fs_path)
+        self.finalize()
+        for name in ("gWVP", "gWorld", "gSampler", "gLights", "gClusters", "gLightIndexes",
+                     "gClusterCount", "gTileSize", "gSliceScale", "gSliceBias", "gAmbient"):
+            self._locations[name] = self.get_uniform_location(name)
+
+        self._buffers = list(glGenBuffers(3))
+        self._textures = list(glGenTextures(3))
+        for buffer, texture, fmt in zip(self._buffers, self._textures,
+                                        (GL_RGBA32F, GL_RG32UI, GL_R32UI)):
+            glBindBuffer(GL_TEXTURE_BUFFER, buffer)
+            glBufferData(GL_TEXTURE_BUFFER, 16, None, GL_STREAM_DRAW)
+            glBindTexture(GL_TEXTURE_BUFFER, texture)
+            glTexBuffer(GL_TEXTURE_BUFFER, fmt, buffer)
+        glBindTexture(GL_TEXTURE_BUFFER, 0)
+        glBindBuffer(GL_TEXTURE_BUFFER, 0)
+
+    def dispose(self):
+        if self._textures:
+            glDeleteTextures(self._textures)
+            glDeleteBuffers(3, self._buffers)
+            self._textures, self._buffers = [], []
+        super().dispose()
+
+    def enable(self):
+        """ Uses program and sets cluster layout uniforms """
+        super().enable()
+        tx, ty, tz = self.grid.shape
+        glUniform3i(self._locations["gClusterCount"], tx, ty, tz)
+        glUniform2f(self._locations["gTileSize"], *self.grid.tile_size)
+        glUniform1f(self._locations["gSliceScale"], self.grid.slice_scale)
+        glUniform1f(self._locations["gSliceBias"], self.grid.slice_bias)
+
+    def set_wvp(self, matrix):
+        glUniformMatrix4fv(self._locations["gWVP"], 1, GL_TRUE, matrix)
+
+    def set_world(self, matrix):
+        glUniformMatrix4fv(self._locations["gWorld"], 1, GL_TRUE, matrix)
+
+    def set_texture_unit(self, texture_unit):
+        glUniform1i(self._locations["gSampler"], texture_unit)
+
+    def set_light_units(self, first_unit):
+        """ Uses three texture units starting from `first_unit` for light buffers """
+        self._light_unit = first_unit
+        for i, name in enumerate(("gLights", "gClusters", "gLightIndexes")):
+            glUniform1i(self._locations[name], first_unit + i)
+
+    def set_ambient(self, color):
+        x, y, z = color
+        glUniform3f(self._locations["gAmbient"], x, y, z)
+
+    def update_lights(self, lights, view_matrix):
+        """ Assigns lights (LIGHT_DTYPE array) to clusters and uploads lists """
+        positions = to_view_space(lights['position'], view_matrix)
+        grid, indexes = self.grid.assign(positions, lights['radius'])
+        self.light_count, self.assigned = len(lights), len(indexes)
+        texels = np.ascontiguousarray(lights, dtype=LIGHT_DTYPE).view(np.float32)
+        for buffer, data in zip(self._buffers, (texels, grid, indexes)):
+            glBindBuffer(GL_TEXTURE_BUFFER, buffer)
+            # orphan previous storage, it may still be used by last frame
+            glBufferData(GL_TEXTURE_BUFFER, max(data.nbytes, 16), None, GL_STREAM_DRAW)
+            if data.nbytes:
+                glBufferSubData(GL_TEXTURE_BUFFER, 0, data.nbytes, data)
+        glBindBuffer(GL_TEXTURE_BUFFER, 0)
+
+    def bind_lights(self):
+        for i, texture in enumerate(self._textures):
+            glActiveTexture(GL_TEXTURE0 + self._light_unit + i)
+            glBindTexture(GL_TEXTURE_BUFFER, texture)
@@ -0,0 +1,357 @@
+"""
+Deferred shading.
+
+Geometry pass writes albedo, normals and depth of visible surfaces into
+G-buffer; lighting pass then shades every pixel once with directional
+light (full screen triangle) and adds point and spot lights by drawing
+their bounding spheres, so only pixels covered by a light pay for it.
+
+Lights are described with LIGHT_DTYPE array shared with clustered
+forward technique.
+"""
+
+import ctypes
+import math
+
+import numpy as np
+from OpenGL.GL import *
+
+from .technique import Technique
+from .clustered import LIGHT_DTYPE
+
+
+ALBEDO, NORMAL, DEPTH = range(3)
+
+# internal format, format and type of every G-buffer texture
+_ATTACHMENTS = (
+    (GL_RGBA8, GL_RGBA, GL_UNSIGNED_BYTE, GL_COLOR_ATTACHMENT0),
+    (GL_RGBA16F, GL_RGBA, GL_FLOAT, GL_COLOR_ATTACHMENT1),
+    (GL_DEPTH_COMPONENT32F, GL_DEPTH_COMPONENT, GL_FLOAT, GL_DEPTH_ATTACHMENT),
+)
+
+
+class FramebufferError(Exception):
+    pass
+
+
+class GBuffer:
+    """ Framebuffer with albedo, normal and depth textures """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.fbo = None
+        self.textures = []
+
+    def init(self):
+        self.fbo = glGenFramebuffers(1)
+        self.textures = list(glGenTextures(len(_ATTACHMENTS)))
+        self._allocate()
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        for texture, (_, _, _, attachment) in zip(self.textures, _ATTACHMENTS):
+            glFramebufferTexture2D(GL_FRAMEBUFFER, attachment, GL_TEXTURE_2D, texture, 0)
+        glDrawBuffers(2, [GL_COLOR_ATTACHMENT0, GL_COLOR_ATTACHMENT1])
+        status = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        if status != GL_FRAMEBUFFER_COMPLETE:
+            raise FramebufferError("G-buffer is incomplete: 0x%x" % status)
+
+    def _allocate(self):
+        for texture, (internal, fmt, kind, _) in zip(self.textures, _ATTACHMENTS):
+            glBindTexture(GL_TEXTURE_2D, texture)
+            glTexImage2D(GL_TEXTURE_2D, 0, internal, self.width, self.height, 0, fmt, kind, None)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+    def resize(self, width: int, height: int):
+        """ Reallocates textures; attachments stay valid """
+        if (width, height) == (self.width, self.height):
+            return
+        self.width, self.height = width, height
+        if self.fbo is not None:
+            self._allocate()
+
+    def bind_for_writing(self):
+        glBindFramebuffer(GL_DRAW_FRAMEBUFFER, self.fbo)
+        glViewport(0, 0, self.width, self.height)
+
+    def bind_for_reading(self, first_unit: int=0):
+        """ Binds albedo, normal and depth textures to consecutive texture units """
+        for i, texture in enumerate(self.textures):
+            glActiveTexture(GL_TEXTURE0 + first_unit + i)
+            glBindTexture(GL_TEXTURE_2D, texture)
+
+    def read(self, attachment: int):
+        """ Reads back G-buffer texture as (height, width, channels) array.
+
+        Meant for tests and debugging: it waits for GPU to finish the frame.
+        """
+        _, fmt, kind, target = _ATTACHMENTS[attachment]
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, self.fbo)
+        if attachment != DEPTH:
+            glReadBuffer(target)
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        data = glReadPixels(0, 0, self.width, self.height, fmt, kind)
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, 0)
+        dtype = np.uint8 if kind == GL_UNSIGNED_BYTE else np.float32
+        channels = 1 if attachment == DEPTH else 4
+        array = np.frombuffer(data, dtype=dtype) if isinstance(data, bytes) else np.asarray(data, dtype)
+        return array.reshape(self.height, self.width, channels)
+
+    def dispose(self):
+        if self.fbo is not None:
+            glDeleteTextures(self.textures)
+            glDeleteFramebuffers(1, [self.fbo])
+            self.fbo, self.textures = None, []
+
+
+# projection is left-handed, so faces of light volume which look at camera
+# are wound clockwise on screen (see also GlutWindow._init_gl)
+LIGHT_VOLUME_FRONT_FACE = GL_CW
+
+
+def sphere_mesh(rings: int=8, segments: int=12):
+    """ Returns (vertices, indexes) of UV sphere enclosing unit ball.
+
+    Triangles are wound counter-clockwise when looked at from outside.
+
+    Flat faces of tessellated sphere cut into the ball, so vertices are
+    pushed out enough for every face to stay outside of it.
+    """
+    theta = np.linspace(0.0, math.pi, rings + 1)
+    phi = np.linspace(0.0, 2.0 * math.pi, segments + 1)[:-1]
+    t, p = np.meshgrid(theta, phi, indexing='ij')
+    vertices = np.stack([np.sin(t) * np.cos(p), np.cos(t), np.sin(t) * np.sin(p)], axis=-1)
+    vertices = vertices.reshape(-1, 3) / (math.cos(math.pi / rings) * math.cos(math.pi / segments))
+
+    r, s = np.meshgrid(np.arange(rings), np.arange(segments), indexing='ij')
+    a = r * segments + s
+    b = r * segments + (s + 1) % segments
+    c, d = a + segments, b + segments
+    indexes = np.stack([a, b, c, b, d, c], axis=-1).reshape(-1)
+    return vertices.astype(np.float32), indexes.astype(np.uint32)
+
+
+class GeometryPassTechnique(Technique):
+    """ Writes albedo and world space normals into G-buffer """
+
+    def __init__(self, vs_path: str="shaders/vs_geometry.glsl",
+                 fs_path: str="shaders/fs_geometry.glsl"):
+        super(GeometryPassTechnique, self).__init__()
+        self._vs_path = vs_path
+        self._fs_path = fs_path
+        self._wvp_location = None
+        self._world_location = None
+        self._sampler_location = None
+
+    def init(self):
+        super().init()
+        self.add_shader(GL_VERTEX_SHADER, self._vs_path)
+        self.add_shader(GL_FRAGMENT_SHADER, self._fs_path)
+        self.finalize()
+        self._wvp_location = self.get_uniform_location("gWVP")
+        self._world_location = self.get_uniform_location("gWorld")
+        self._sampler_location = self.get_uniform_location("gSampler")
+
+    def set_wvp(self, matrix):
+        glUniformMatrix4fv(self._wvp_location, 1, GL_TRUE, matrix)
+
+    def set_world(self, matrix):
+        glUniformMatrix4fv(self._world_location, 1, GL_TRUE, matrix)
+
+    def set_texture_unit(self, texture_unit):
+        glUniform1i(self._sampler_location, texture_unit)
+
+
+class LightPassTechnique(Technique):
+    """ Shades pixels from G-buffer; base for directional and point light passes """
+
+    uniforms = ("gAlbedo", "gNormal", "gScreenSize")
+
+    def __init__(self, vs_path: str, fs_path: str):
+        super(LightPassTechnique, self).__init__()
+        self._vs_path = vs_path
+        self._fs_path = fs_path
+        self._locations = {}
+
+    def init(self):
+        super().init()
+        self.add_shader(GL_VERTEX_SHADER, self._vs_path)
+        self.add_shader(GL_FRAGMENT_SHADER, self._fs_path)
+        self.finalize()
+        for name in self.uniforms:
+            self._locations[name] = self.get_uniform_location(name)
+
+    def set_gbuffer_units(self, first_unit: int):
+        """ Texture units of albedo, normal and depth textures, see GBuffer.bind_for_reading """
+        for i, name in enumerate(("gAlbedo", "gNormal", "gDepth")):
+            if name in self._locations:
+                glUniform1i(self._locations[name], first_unit + i)
+
+    def set_screen_size(self, width, height):
+        glUniform2f(self._locations["gScreenSize"], width, height)
+
+
+class DirectionalLightPassTechnique(LightPassTechnique):
+
+    uniforms = LightPassTechnique.uniforms + (
+        "gDirectionalLight.Color", "gDirectionalLight.AmbientIntensity",
+        "gDirectionalLight.DiffuseIntensity", "gDirectionalLight.Direction")
+
+    def __init__(self, vs_path: str="shaders/vs_fullscreen.glsl",
+                 fs_path: str="shaders/fs_dir_light_pass.glsl"):
+        super(DirectionalLightPassTechnique, self).__init__(vs_path, fs_path)
+
+    def set_directional_light(self, color, ambient_intensity, direction=(0.0, 0.0, 1.0),
+                              diffuse_intensity=0.0):
+        glUniform3f(self._locations["gDirectionalLight.Color"], *color)
+        glUniform1f(self._locations["gDirectionalLight.AmbientIntensity"], ambient_intensity)
+        glUniform1f(self._locations["gDirectionalLight.DiffuseIntensity"], diffuse_intensity)
+        glUniform3f(self._locations["gDirectionalLight.Direction"], *direction)
+
+
+class PointLightPassTechnique(LightPassTechnique):
+    """ Draws instanced light spheres; light data comes as per-instance attributes """
+
+    uniforms = LightPassTechnique.uniforms + ("gDepth", "gViewProj", "gInverseViewProj")
+
+    def __init__(self, vs_path: str="shaders/vs_light_volume.glsl",
+                 fs_path: str="shaders/fs_point_light_pass.glsl"):
+        super(PointLightPassTechnique, self).__init__(vs_path, fs_path)
+
+    def set_view_proj(self, matrix):
+        """ Row-major projection * view matrix of the frame """
+        glUniformMatrix4fv(self._locations["gViewProj"], 1, GL_TRUE, matrix)
+        glUniformMatrix4fv(self._locations["gInverseViewProj"], 1, GL_TRUE, np.linalg.inv(matrix))
+
+
+class DeferredRenderer:
+    """ G-buffer plus geometry and lighting passes.
+
+    Frame is rendered as:
+
+        geometry = renderer.begin_geometry()
+        ... set matrices on `geometry` and draw meshes ...
+        renderer.light(view_proj, lights, color, ambient, direction, diffuse)
+    """
+
+    def __init__(self, width: int, height: int, texture_unit: int=1):
+        self.gbuffer = GBuffer(width, height)
+        self.geometry = GeometryPassTechnique()
+        self.directional = DirectionalLightPassTechnique()
+        self.point = PointLightPassTechnique()
+        self.texture_unit = texture_unit
+        self._vao = None
+        self._buffers = []
+        self._index_count = 0
+        self._capacity = 0
+
+    def init(self):
+        self.gbuffer.init()
+        for technique in (self.geometry, self.directional, self.point):
+            technique.init()
+        for technique in (self.directional, self.point):
+            technique.enable()
+            technique.set_gbuffer_units(self.texture_unit)
+        self._create_volumes()
+
+    def _create_volumes(self):
+        vertices, indexes = sphere_mesh()
+        self._index_count = len(indexes)
+        self._vao = glGenVertexArrays(1)
+        glBindVertexArray(self._vao)
+        vbo, ibo, instances = self._buffers = list(glGenBuffers(3))
+        glBindBuffer(GL_ARRAY_BUFFER, vbo)
+        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 12, ctypes.c_void_p(0))
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, ibo)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, indexes.nbytes, indexes, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, instances)
+        # every light is three vec4 attributes, see LIGHT_DTYPE
+        for i in range(3):
+            glEnableVertexAttribArray(1 + i)
+            glVertexAttribPointer(1 + i, 4, GL_FLOAT, GL_FALSE, LIGHT_DTYPE.itemsize,
+                                  ctypes.c_void_p(16 * i))
+            glVertexAttribDivisor(1 + i, 1)
+        glBindVertexArray(0)
+
+    def resize(self, width: int, height: int):
+        self.gbuffer.resize(width, height)
+
+    def begin_geometry(self):
+        """ Binds and clears G-buffer, returns enabled geometry pass technique """
+        self.gbuffer.bind_for_writing()
+        glDepthMask(GL_TRUE)
+        glEnable(GL_DEPTH_TEST)
+        glDisable(GL_BLEND)
+        glClearColor(0.0, 0.0, 0.0, 0.0)
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        self.geometry.enable()
+        return self.geometry
+
+    def light(self, view_proj, lights, color=(1.0, 1.0, 1.0), ambient_intensity=0.1,
+              direction=(0.0, 0.0, 1.0), diffuse_intensity=0.0):
+        """ Shades G-buffer into default framebuffer """
+        width, height = self.gbuffer.width, self.gbuffer.height
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        glViewport(0, 0, width, height)
+        glClear(GL_COLOR_BUFFER_BIT)
+        glDisable(GL_DEPTH_TEST)
+        glDepthMask(GL_FALSE)
+        self.gbuffer.bind_for_reading(self.texture_unit)
+
+        self.directional.enable()
+        self.directional.set_screen_size(width, height)
+        self.directional.set_directional_light(color, ambient_intensity, direction,
+                                               diffuse_intensity)
+        glBindVertexArray(self._vao)
+        glDrawArrays(GL_TRIANGLES, 0, 3)
+
+        if len(lights):
+            self._upload_lights(lights)
+            glEnable(GL_BLEND)
+            glBlendEquation(GL_FUNC_ADD)
+            glBlendFunc(GL_ONE, GL_ONE)
+            # only back faces are drawn, so pixels are lit once even when
+            # camera is inside light volume
+            cull_face = glIsEnabled(GL_CULL_FACE)
+            cull_mode, front_face = glGetIntegerv(GL_CULL_FACE_MODE), glGetIntegerv(GL_FRONT_FACE)
+            glEnable(GL_CULL_FACE)
+            glFrontFace(LIGHT_VOLUME_FRONT_FACE)
+            glCullFace(GL_FRONT)
+            self.point.enable()
+            self.point.set_screen_size(width, height)
+            self.point.set_view_proj(view_proj)
+            glDrawElementsInstanced(GL_TRIANGLES, self._index_count, GL_UNSIGNED_INT,
+                                    ctypes.c_void_p(0), len(lights))
+            glDisable(GL_BLEND)
+            glCullFace(int(cull_mode))
+            glFrontFace(int(front_face))
+            if not cull_face:
+                glDisable(GL_CULL_FACE)
+        glBindVertexArray(0)
+        glDepthMask(GL_TRUE)
+        glEnable(GL_DEPTH_TEST)
+
+    def _upload_lights(self, lights):
+        data = np.ascontiguousarray(lights, dtype=LIGHT_DTYPE).view(np.float32)
+        glBindBuffer(GL_ARRAY_BUFFER, self._buffers[2])
+        if data.nbytes > self._capacity:
+            self._capacity = data.nbytes
+            glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STREAM_DRAW)
+        else:
+            glBufferSubData(GL_ARRAY_BUFFER, 0, data.nbytes, data)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def dispose(self):
+        for technique in (self.geometry, self.directional, self.point):
+            technique.dispose()
+        self.gbuffer.dispose()
+        if self._vao is not None:
+            glDeleteBuffers(3, self._buffers)
+            glDeleteVertexArrays(1, [self._vao])
+            self._vao, self._buffers = None, []
@@ -0,0 +1,299 @@
+"""
+Cascaded shadow maps for directional light.
+
+Camera frustum is split into cascades by depth; every cascade gets its
+own orthographic light projection fitted to bounding sphere of its part
+of the frustum and snapped to shadow map texels.
+
+Static casters are rendered into cache once and reused while light,
+static geometry and cached cascade region stay valid; cached region is
+`margin` times larger than needed, so camera can move a bit before
+cascade has to be re-rendered. Every frame cached depth is copied into
+final shadow map and dynamic casters are rendered on top of it.
+"""
+
+import math
+
+import numpy as np
+from OpenGL.GL import *
+
+from pipeline import Matrix4x4
+from utils import to_radian
+from .technique import Technique
+
+
+class ShadowMapError(Exception):
+    pass
+
+
+def cascade_splits(z_near: float, z_far: float, count: int, blend: float=0.5):
+    """ Returns count + 1 split distances, mix of logarithmic and uniform schemes """
+    i = np.arange(count + 1) / count
+    log = z_near * (z_far / z_near) ** i
+    uniform = z_near + (z_far - z_near) * i
+    return blend * log + (1.0 - blend) * uniform
+
+
+def view_matrix_of(camera):
+    """ World -> camera matrix built the same way as Pipeline does it """
+    if hasattr(camera, 'view_matrix'):
+        return camera.view_matrix
+    cx, cy, cz = camera.pos
+    rotation = Matrix4x4.camera_rotation(camera.target, camera.up)
+    return rotation.dot(Matrix4x4.translation([-cx, -cy, -cz]))
+
+
+def frustum_corners(view_matrix, proj, near: float, far: float):
+    """ Returns (8, 3) world space corners of camera frustum part between near and far """
+    thf = math.tan(to_radian(proj.fov / 2.0))
+    ar = proj.width / proj.height
+    corners = []
+    for z in (near, far):
+        for sx, sy in ((-1, -1), (1, -1), (1, 1), (-1, 1)):
+            corners.append((sx * z * thf * ar, sy * z * thf, z, 1.0))
+    world = np.array(corners).dot(np.linalg.inv(view_matrix).T)
+    return world[:, :3] / world[:, 3:]
+
+
+def light_rotation(direction):
+    """ Rotation into light space which looks along `direction` """
+    n = np.asarray(direction, dtype=np.float64)
+    n = n / np.linalg.norm(n)
+    up = (0.0, 1.0, 0.0) if abs(n[1]) < 0.99 else (1.0, 0.0, 0.0)
+    u = np.cross(up, n)
+    u /= np.linalg.norm(u)
+    rotation = np.eye(4)
+    rotation[0, :3], rotation[1, :3], rotation[2, :3] = u, np.cross(n, u), n
+    return rotation
+
+
+class Cascade:
+    """ Light space region covered by one shadow map layer """
+
+    def __init__(self, index: int, near: float, far: float):
+        self.index = index
+        self.near = near
+        self.far = far
+        self.matrix = np.eye(4)  # light view-projection, row-major
+        self.region = None       # cached (x, y, half size, z min, z max)
+        self.static_valid = False
+
+    def contains(self, x, y, radius, z_min, z_max):
+        if self.region is None:
+            return False
+        cx, cy, half, region_min, region_max = self.region
+        return (abs(x - cx) + radius <= half and abs(y - cy) + radius <= half and
+                z_min >= region_min and z_max <= region_max)
+
+
+class CascadedShadowMap:
+    """ Shadow map cascades with cache of static casters.
+
+    Argument `caster_distance` tells how far towards the light casters
+    outside of camera frustum are still rendered.
+    """
+
+    def __init__(self, proj, cascades: int=3, resolution: int=1024, margin: float=1.25,
+                 caster_distance: float=50.0, split_blend: float=0.5):
+        self.proj = proj
+        self.resolution = resolution
+        self.margin = margin
+        self.caster_distance = caster_distance
+        self.splits = cascade_splits(proj.z_near, proj.z_far, cascades, split_blend)
+        self.cascades = [Cascade(i, self.splits[i], self.splits[i + 1]) for i in range(cascades)]
+        self.static_renders = 0
+        self._light = None
+        self._rotation = np.eye(4)
+        self._maps = None
+        self._cache = None
+        self._fbos = []
+
+    def invalidate_static(self):
+        """ Should be called when static geometry changes """
+        for cascade in self.cascades:
+            cascade.static_valid = False
+
+    def update(self, view_matrix, light_direction):
+        """ Fits cascades to camera; returns cascades which static cache must be re-rendered """
+        light = tuple(float(c) for c in light_direction)
+        if light != self._light:
+            self._light = light
+            self._rotation = light_rotation(light)
+            self.invalidate_static()
+
+        dirty = []
+        for cascade in self.cascades:
+            corners = frustum_corners(view_matrix, self.proj, cascade.near, cascade.far)
+            center = corners.mean(axis=0)
+            # radius rounded up keeps cascade size constant while camera rotates
+            radius = math.ceil(np.linalg.norm(corners - center, axis=1).max() * 16.0) / 16.0
+            x, y, z = self._rotation[:3, :3].dot(center)
+            z_min, z_max = z - radius - self.caster_distance, z + radius
+            if cascade.static_valid and cascade.contains(x, y, radius, z_min, z_max):
+                continue
+            self._fit(cascade, x, y, z, radius)
+            cascade.static_valid = True
+            dirty.append(cascade)
+        return dirty
+
+    def _fit(self, cascade, x, y, z, radius):
+        half = radius * self.margin
+        texel = 2.0 * half / self.resolution
+        x, y = math.floor(x / texel) * texel, math.floor(y / texel) * texel
+        z_min = z - half - self.caster_distance
+        z_max = z + half
+        cascade.region = (x, y, half, z_min, z_max)
+        depth = z_max - z_min
+        ortho = np.array([
+            [1.0 / half, 0.0, 0.0, -x / half],
+            [0.0, 1.0 / half, 0.0, -y / half],
+            [0.0, 0.0, 2.0 / depth, -(z_max + z_min) / depth],
+            [0.0, 0.0, 0.0, 1.0]
+        ])
+        cascade.matrix = ortho.dot(self._rotation)
+
+    def init(self):
+        """ Creates final and cache depth texture arrays and framebuffers """
+        self._maps, self._cache = glGenTextures(2)
+        for texture, compare in ((self._maps, True), (self._cache, False)):
+            glBindTexture(GL_TEXTURE_2D_ARRAY, texture)
+            glTexImage3D(GL_TEXTURE_2D_ARRAY, 0, GL_DEPTH_COMPONENT32F, self.resolution,
+                         self.resolution, len(self.cascades), 0, GL_DEPTH_COMPONENT, GL_FLOAT, None)
+            glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MIN_FILTER, GL_LINEAR if compare else GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MAG_FILTER, GL_LINEAR if compare else GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+            glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+            if compare:
+                glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_COMPARE_MODE, GL_COMPARE_REF_TO_TEXTURE)
+                glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_COMPARE_FUNC, GL_LEQUAL)
+        glBindTexture(GL_TEXTURE_2D_ARRAY, 0)
+        self._fbos = list(glGenFramebuffers(2))
+        for fbo in self._fbos:
+            glBindFramebuffer(GL_FRAMEBUFFER, fbo)
+            glDrawBuffer(GL_NONE)
+            glReadBuffer(GL_NONE)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+
+    def _bind_layer(self, target, fbo, texture, layer):
+        glBindFramebuffer(target, fbo)
+        glFramebufferTextureLayer(target, GL_DEPTH_ATTACHMENT, texture, 0, layer)
+
+    def render(self, view_matrix, light_direction, draw_static, draw_dynamic):
+        """ Updates shadow maps.
+
+        Callbacks `draw_static(cascade)` and `draw_dynamic(cascade)` render
+        depth of casters with `cascade.matrix` as light view-projection.
+        """
+        dirty = self.update(view_matrix, light_direction)
+        size = self.resolution
+        glViewport(0, 0, size, size)
+        glEnable(GL_DEPTH_TEST)
+        glDepthMask(GL_TRUE)
+        draw, read = self._fbos
+        for cascade in dirty:
+            self._bind_layer(GL_FRAMEBUFFER, draw, self._cache, cascade.index)
+            if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
+                raise ShadowMapError("shadow map framebuffer is incomplete")
+            glClear(GL_DEPTH_BUFFER_BIT)
+            draw_static(cascade)
+            self.static_renders += 1
+
+        for cascade in self.cascades:
+            self._bind_layer(GL_READ_FRAMEBUFFER, read, self._cache, cascade.index)
+            self._bind_layer(GL_DRAW_FRAMEBUFFER, draw, self._maps, cascade.index)
+            glBlitFramebuffer(0, 0, size, size, 0, 0, size, size, GL_DEPTH_BUFFER_BIT, GL_NEAREST)
+            draw_dynamic(cascade)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+
+    def bind(self, texture_unit):
+        glActiveTexture(texture_unit)
+        glBindTexture(GL_TEXTURE_2D_ARRAY, self._maps)
+
+    def set_receiver_uniforms(self, program, texture_unit_index: int):
+        """ Sets gShadowMap, gCascadeMatrices and gCascadeFar uniforms of receiving program """
+        matrices = np.array([c.matrix for c in self.cascades], dtype=np.float32)
+        far = np.array([c.far for c in self.cascades], dtype=np.float32)
+        glUniform1i(glGetUniformLocation(program, "gShadowMap"), texture_unit_index)
+        glUniformMatrix4fv(glGetUniformLocation(program, "gCascadeMatrices"),
+                           len(self.cascades), GL_TRUE, matrices)
+        glUniform1fv(glGetUniformLocation(program, "gCascadeFar"), len(self.cascades), far)
+
+    def dispose(self):
+        if self._maps is not None:
+            glDeleteTextures([self._maps, self._cache])
+            glDeleteFramebuffers(2, self._fbos)
+            self._maps, self._cache, self._fbos = None, None, []
+
+
+class ShadowMapTechnique(Technique):
+    """ Depth only program used to render shadow casters """
+
+    def __init__(self, vs_path: str="shaders/vs_shadow.glsl", fs_path: str="shaders/fs_shadow.glsl"):
+        super(ShadowMapTechnique, self).__init__()
+        self._vs_path = vs_path
+        self._fs_path = fs_path
+        self._wvp_location = None
+
+    def init(self):
+        super().init()
+        self.add_shader(GL_VERTEX_SHADER, self._vs_path)
+        self.add_shader(GL_FRAGMENT_SHADER, self._fs_path)
+        self.finalize()
+        self._wvp_location = self.get_uniform_location("gLightWVP")
+
+    def set_light_wvp(self, matrix):
+        """ Cascade matrix multiplied by world matrix of caster """
+        glUniformMatrix4fv(self._wvp_location, 1, GL_TRUE, matrix)
+
+
+class ShadowReceiverTechnique(Technique):
+    """ Directional light with cascaded shadows of given CascadedShadowMap.
+
+    Fragment shader includes shaders/shadow.inc; its MAX_CASCADES is
+    defined from number of cascades of the shadow map.
+    """
+
+    def __init__(self, shadow_map: CascadedShadowMap, vs_path: str="shaders/vs_shadow_receiver.glsl",
+                 fs_path: str="shaders/fs_shadow_receiver.glsl"):
+        super(ShadowReceiverTechnique, self).__init__()
+        self.shadow_map = shadow_map
+        self._vs_path = vs_path
+        self._fs_path = fs_path
+        self._wvp_location = None
+        self._world_location = None
+        self._sampler_location = None
+        self._dir_light_locations = {}
+
+    def init(self):
+        super().init()
+        defines = {'MAX_CASCADES': len(self.shadow_map.cascades)}
+        self.add_shader(GL_VERTEX_SHADER, self._vs_path)
+        self.add_shader(GL_FRAGMENT_SHADER, self._fs_path, defines=defines)
+        self.finalize()
+        self._wvp_location = self.get_uniform_location("gWVP")
+        self._world_location = self.get_uniform_location("gWorld")
+        self._sampler_location = self.get_uniform_location("gSampler")
+        for member in ("Color", "AmbientIntensity", "DiffuseIntensity", "Direction"):
+            self._dir_light_locations[member] = \
+                self.get_uniform_location("gDirectionalLight." + member)
+
+    def set_wvp(self, matrix):
+        glUniformMatrix4fv(self._wvp_location, 1, GL_TRUE, matrix)
+
+    def set_world(self, matrix):
+        glUniformMatrix4fv(self._world_location, 1, GL_TRUE, matrix)
+
+    def set_texture_unit(self, texture_unit):
+        glUniform1i(self._sampler_location, texture_unit)
+
+    def set_directional_light(self, color, ambient_intensity, diffuse_intensity, direction):
+        locations = self._dir_light_locations
+        glUniform3f(locations["Color"], *color)
+        glUniform1f(locations["AmbientIntensity"], ambient_intensity)
+        glUniform1f(locations["DiffuseIntensity"], diffuse_intensity)
+        x, y, z = np.asarray(direction, dtype=np.float64) / np.linalg.norm(direction)
+        glUniform3f(locations["Direction"], x, y, z)
+
+    def set_shadow_map(self, texture_unit_index: int):
+        """ Sets cascade uniforms; shadow map must be bound to given unit (see CascadedShadowMap.bind) """
+        self.shadow_map.set_receiver_uniforms(self.shader_program, texture_unit_index)
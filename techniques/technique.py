@@ -22,6 +22,14 @@ class InvalidUniformLocationError(ShaderException):
     pass
 
 
+def with_defines(content: str, defines: dict):
+    """Inserts #define directives after #version one, which must stay first."""
+    lines = content.split("\n")
+    at = next((i + 1 for i, line in enumerate(lines) if line.strip().startswith("#version")), 0)
+    lines[at:at] = ["#define %s %s" % item for item in defines.items()]
+    return "\n".join(lines)
+
+
 class Technique:
 
     def __init__(self):
@@ -52,11 +60,27 @@ class Technique:
     def enable(self):
         glUseProgram(self.shader_program)
 
-    def add_shader(self, shader_type: GLenum, file_name: str):
-        """Creates shader object of specified type from specified shader file."""
+    def add_shader(self, shader_type: GLenum, file_name: str, pack=None, defines: dict=None):
+        """Creates shader object of specified type from specified shader file.
 
-        with open(file_name, "r") as shader:
-            content = shader.read()
+        If asset pack is given, shader is read from it instead of file system
+        (shaders in packs are compiled by assetc, so includes are already
+        resolved); otherwise `#include "file"` directives are resolved.
+        Given `defines` are inserted after #version directive.
+        """
+        if pack is not None:
+            content = bytes(pack.read(file_name)).decode()
+        else:
+            with open(file_name, "r") as shader:
+                content = shader.read()
+            if "#include" in content:
+                from assetc import AssetError, preprocess_shader
+                try:
+                    content = preprocess_shader(file_name)
+                except AssetError as e:
+                    raise ShaderObjectError("cannot preprocess shader: %s" % e)
+        if defines:
+            content = with_defines(content, defines)
         shader_object = glCreateShader(shader_type)
         if not shader_object:
             raise ShaderObjectError("cannot create shader object (path: %s)" % file_name)
@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+import assetc
+import glutwindow
+from camera import Camera
+from nullgl import NullGL
+
+
+class DrawGL(NullGL):
+    """ Records index counts of draws and sizes of uploaded texture levels """
+
+    def __init__(self):
+        super().__init__()
+        self.draws = []
+        self.levels = []
+
+    def glDrawElements(self, mode, count, kind, offset):
+        self.draws.append(count)
+
+    def glTexImage2D(self, target, level, internal_format, width, height, border, fmt, kind, data):
+        self.levels.append((level, width, height))
+
+
+class AssetCompilerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.src = os.path.join(self.root, "src")
+        self.out = os.path.join(self.root, "out")
+        os.makedirs(os.path.join(self.src, "shaders"))
+        self.write("shaders/common.inc", "uniform mat4 gWVP;\n")
+        self.write("shaders/vs.glsl",
+                   '#version 400\n#include "common.inc"\nvoid main() {\n}\n')
+        self.write("quad.obj", "v 0 0 0\nv 1 0 0\nv 1 1 0\nv 0 1 0\n"
+                               "vt 0 0\nvt 1 0\nvt 1 1\nvt 0 1\n"
+                               "f 1/1 2/2 3/3 4/4\n")
+        shutil.copy(os.path.join("resources", "test.png"), os.path.join(self.src, "test.png"))
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, rel, text):
+        with open(os.path.join(self.src, rel), "w") as f:
+            f.write(text)
+
+    def build(self):
+        return sorted(assetc.build(self.src, self.out, jobs=2, log=lambda *args: None))
+
+    def test_incremental_build(self):
+        self.assertEqual(self.build(), ["quad.obj", os.path.join("shaders", "vs.glsl"), "test.png"])
+        self.assertEqual(self.build(), [])
+        self.write("shaders/common.inc", "uniform mat4 gWorld;\n")
+        self.assertEqual(self.build(), [os.path.join("shaders", "vs.glsl")])
+        with open(os.path.join(self.out, "shaders", "vs.glsl")) as f:
+            self.assertIn("gWorld", f.read())
+
+    def test_mesh_is_indexed(self):
+        self.build()
+        vertices, indexes = assetc.load_mesh(os.path.join(self.out, "quad.mesh"))
+        self.assertEqual(len(vertices), 4 * 5)
+        self.assertEqual(indexes.tolist(), [0, 1, 2, 0, 2, 3])
+        np.testing.assert_array_equal(vertices[5:10], [1, 0, 0, 1, 0])
+
+    def test_compiled_assets_are_used_by_window(self):
+        self.build()
+        with DrawGL().install() as gl:
+            window = glutwindow.GlutWindow((320, 240), mesh=os.path.join(self.out, "quad.mesh"),
+                                           texture=os.path.join(self.out, "test.mip"))
+            window.camera = Camera([0.0, 1.0, 0.0], [0.0, -0.5, 1.0], [0.0, 1.0, 0.0], 320, 240)
+            window.on_display()
+        self.assertEqual(gl.draws, [6])
+        levels = [level for level, _, _ in gl.levels]
+        self.assertGreater(len(levels), 1)
+        self.assertEqual(levels, list(range(len(levels))))
+
+    def test_invalid_shader_is_reported(self):
+        self.write("shaders/bad.glsl", "void main() {\n")
+        with self.assertRaises(assetc.AssetError):
+            self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.out, "shaders", "bad.glsl")))
+
+    def test_missing_include_is_reported(self):
+        self.write("shaders/fs.glsl", '#version 400\n#include "missing.inc"\nvoid main() {\n}\n')
+        with self.assertRaises(assetc.AssetError) as raised:
+            self.build()
+        self.assertIn("missing.inc", str(raised.exception))
+        # other assets are built anyway
+        self.assertTrue(os.path.exists(os.path.join(self.out, "shaders", "vs.glsl")))
+        self.assertFalse(os.path.exists(os.path.join(self.out, "shaders", "fs.glsl")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from assetpack import ALIGNMENT, AssetPack, PackError, PackWriter
+from texture import read_image
+
+
+class AssetPackTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, "assets.pak")
+        writer = PackWriter()
+        writer.add_file(os.path.join("shaders", "vs.glsl"))
+        writer.add_file(os.path.join("resources", "test.png"))
+        writer.add("text/repeated.txt", b"abc" * 1000, compress=True)
+        writer.write(self.path)
+        self.pack = AssetPack(self.path)
+
+    def tearDown(self):
+        self.pack.close()
+        shutil.rmtree(self.root)
+
+    def test_index(self):
+        self.assertEqual(len(self.pack), 3)
+        self.assertIn("shaders/vs.glsl", self.pack)
+        self.assertIn("./resources/test.png", self.pack)
+        self.assertNotIn("shaders/fs.glsl", self.pack)
+        with self.assertRaises(PackError):
+            self.pack.read("shaders/fs.glsl")
+
+    def test_entries_are_mapped_without_copying(self):
+        data = self.pack.read("shaders/vs.glsl")
+        self.assertIsInstance(data, memoryview)
+        with open(os.path.join("shaders", "vs.glsl"), "rb") as f:
+            self.assertEqual(bytes(data), f.read())
+        offset = self.pack._index["shaders/vs.glsl"][0]
+        self.assertEqual(offset % ALIGNMENT, 0)
+        data.release()
+
+    def test_compressed_entry(self):
+        self.assertEqual(self.pack.read("text/repeated.txt"), b"abc" * 1000)
+        self.assertLess(os.path.getsize(self.path), 3000 + os.path.getsize("resources/test.png"))
+
+    def test_image_from_pack(self):
+        path = os.path.join("resources", "test.png")
+        np.testing.assert_array_equal(read_image(path, pack=self.pack), read_image(path))
+
+    def test_close_with_live_view(self):
+        data = self.pack.read("shaders/vs.glsl")
+        with self.assertRaises(PackError):
+            self.pack.close()
+        data.release()
+
+    def test_failed_close_leaves_pack_readable(self):
+        data = self.pack.read("shaders/vs.glsl")
+        with self.assertRaises(PackError):
+            self.pack.close()
+        self.assertEqual(bytes(self.pack.read("shaders/vs.glsl")), bytes(data))
+        data.release()
+        self.pack.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+import numpy as np
+
+from atlas import Atlas, AtlasRegion, SkylinePacker, remap_texcoords
+
+
+class AtlasTest(unittest.TestCase):
+
+    def test_packed_rectangles_do_not_overlap(self):
+        rng = np.random.RandomState(0)
+        packer = SkylinePacker(256, 256)
+        covered = np.zeros((256, 256), dtype=int)
+        for _ in range(200):
+            w, h = rng.randint(4, 40, size=2)
+            place = packer.insert(w, h)
+            if place is None:
+                continue
+            x, y = place
+            covered[y:y + h, x:x + w] += 1
+        self.assertLessEqual(covered.max(), 1)
+        self.assertGreater(covered.sum(), 256 * 256 // 2)
+
+    def test_images_are_copied_with_gutters(self):
+        images = {
+            'red': np.full((8, 8, 4), (255, 0, 0, 255), dtype=np.uint8),
+            'green': np.full((16, 4, 4), (0, 255, 0, 255), dtype=np.uint8),
+        }
+        atlas = Atlas(page_size=32, gutter=2, align=4)
+        regions = atlas.build(images)
+        self.assertEqual(len(atlas.pages), 1)
+        for name, image in images.items():
+            r = regions[name]
+            x0, y0 = int(r.u0 * 32), int(r.v0 * 32)
+            x1, y1 = int(r.u1 * 32), int(r.v1 * 32)
+            page = atlas.pages[r.page]
+            np.testing.assert_array_equal(page[y0:y1, x0:x1], image)
+            np.testing.assert_array_equal(page[y0 - 2, x0 - 2], image[0, 0])
+
+    def test_overflow_creates_new_page(self):
+        images = {str(i): np.zeros((16, 16, 4), dtype=np.uint8) for i in range(5)}
+        atlas = Atlas(page_size=32, gutter=0)
+        atlas.build(images)
+        self.assertEqual(len(atlas.pages), 2)
+
+    def test_rebuild_starts_from_empty_pages(self):
+        atlas = Atlas(page_size=32, gutter=0)
+        atlas.build({str(i): np.full((16, 16, 4), 255, dtype=np.uint8) for i in range(5)})
+        blue = np.full((8, 8, 4), (0, 0, 255, 255), dtype=np.uint8)
+        regions = atlas.build({'blue': blue})
+        self.assertEqual(len(atlas.pages), 1)
+        self.assertEqual(list(regions), ['blue'])
+        page = atlas.pages[regions['blue'].page]
+        np.testing.assert_array_equal(page[:8, :8], blue)
+        self.assertEqual(page[8:].max(), 0)
+
+    def test_texcoords_remapping(self):
+        vertices = np.array([
+            -1.0, -1.0, 0.5773, 0.0, 0.0,
+            0.0, 1.0, 0.0, 0.5, 1.0
+        ], dtype=np.float32)
+        region = AtlasRegion(0, 0.5, 0.25, 0.75, 0.75)
+        remapped = remap_texcoords(vertices, region)
+        np.testing.assert_allclose(remapped[3:5], [0.5, 0.25])
+        np.testing.assert_allclose(remapped[8:10], [0.625, 0.75])
+        np.testing.assert_array_equal(remapped[:3], vertices[:3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+import numpy as np
+
+from camera import Camera
+
+
+def make_camera(coalesce_mouse):
+    return Camera([0.0, 1.0, 0.0], [0.0, -0.5, 1.0], [0.0, 1.0, 0.0], 1024, 768,
+                  warp_pointer=lambda x, y: None, coalesce_mouse=coalesce_mouse)
+
+
+class CameraMouseTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.frames = [rng.randint(0, 1024, size=(8, 2)) for _ in range(20)]
+        self.frames.append(np.array([[5, 400], [5, 400]]))  # rest on left edge
+
+    def run_frames(self, camera):
+        for events in self.frames:
+            for x, y in events:
+                camera.mouse(int(x), int(y))
+            camera.render()
+        return camera
+
+    def test_coalesced_orientation_is_identical(self):
+        eager = self.run_frames(make_camera(False))
+        lazy = self.run_frames(make_camera(True))
+        np.testing.assert_array_equal(eager.target, lazy.target)
+        np.testing.assert_array_equal(eager.up, lazy.up)
+        self.assertTrue(lazy.moving)
+
+    def test_one_update_per_frame(self):
+        camera = self.run_frames(make_camera(True))
+        self.assertEqual(camera.mouse_events, 8 * 20 + 2)
+        self.assertEqual(camera.camera_updates, len(self.frames))
+
+    def test_orientation_is_updated_on_access(self):
+        camera = make_camera(True)
+        before = camera.target.copy()
+        camera.mouse(600, 300)
+        self.assertFalse(np.array_equal(camera.target, before))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import math
+import unittest
+
+import numpy as np
+
+from pipeline import ProjParams
+from techniques.clustered import ClusterGrid, make_lights, to_view_space
+
+
+class ClusterGridTest(unittest.TestCase):
+
+    def setUp(self):
+        self.proj = ProjParams(1024, 768, 1.0, 100.0, 60.0)
+        self.grid = ClusterGrid(self.proj, 16, 9, 24)
+
+    def cluster_of(self, points):
+        """ Reference cluster lookup which mirrors fragment shader """
+        thf = math.tan(math.radians(self.proj.fov / 2.0))
+        ar = self.proj.width / self.proj.height
+        x, y, z = points.T
+        fx = (x / (z * thf * ar) * 0.5 + 0.5) * self.proj.width
+        fy = (y / (z * thf) * 0.5 + 0.5) * self.proj.height
+        tx, ty, _ = self.grid.shape
+        tile_x = np.clip((fx / self.grid.tile_size[0]).astype(int), 0, tx - 1)
+        tile_y = np.clip((fy / self.grid.tile_size[1]).astype(int), 0, ty - 1)
+        return (self.grid.slice_of(z) * ty + tile_y) * tx + tile_x
+
+    def test_lit_points_find_their_lights(self):
+        rng = np.random.RandomState(0)
+        positions = rng.uniform([-40, -30, -5], [40, 30, 110], (300, 3))
+        radii = rng.uniform(0.5, 8.0, 300)
+        grid, indexes = self.grid.assign(positions, radii)
+
+        z = rng.uniform(1.0, 100.0, 5000)
+        points = np.column_stack([rng.uniform(-0.55, 0.55, 5000) * z,
+                                  rng.uniform(-0.55, 0.55, 5000) * z, z])
+        clusters = self.cluster_of(points)
+        dist = np.linalg.norm(points[:, None] - positions[None], axis=2)
+        for point, light in zip(*np.nonzero(dist < radii)):
+            offset, count = grid[clusters[point]]
+            self.assertIn(light, indexes[offset:offset + count])
+
+    def test_invisible_lights_are_culled(self):
+        positions = [[0, 0, -10], [0, 0, 200], [500, 0, 10], [0, 0, 10]]
+        grid, indexes = self.grid.assign(positions, [1.0, 1.0, 1.0, 1.0])
+        self.assertEqual(set(indexes.tolist()), {3})
+        self.assertEqual(grid[:, 1].sum(), len(indexes))
+
+    def test_view_space(self):
+        lights = make_lights(2)
+        lights['position'] = [[1, 2, 3], [0, 0, 0]]
+        view = np.eye(4)
+        view[:3, 3] = [0, 0, 5]
+        np.testing.assert_allclose(to_view_space(lights['position'], view), [[1, 2, 8], [0, 0, 5]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from commands import CommandBuffer, CommandQueue
+
+
+class FakeGL:
+
+    GL_TRUE, GL_FALSE, GL_FLOAT = 1, 0, 0x1406
+
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        def call(*args):
+            self.calls.append((name,) + args)
+        return call
+
+
+class CommandBufferTest(unittest.TestCase):
+
+    def test_commands_are_replayed_with_arguments(self):
+        buffer = CommandBuffer(capacity=2)
+        matrix = np.arange(16, dtype=np.float32).reshape(4, 4)
+        buffer.bind_program(3)
+        buffer.uniform_matrix4(7, matrix)
+        buffer.uniform_3f(8, 1.0, 0.5, 0.25)
+        buffer.bind_texture(0x84C0, 0x0DE1, 5)
+        buffer.draw_elements(4, 18, 0x1405, 0)
+        self.assertEqual(len(buffer), 5)
+
+        gl = FakeGL()
+        buffer.execute(gl)
+        names = [call[0] for call in gl.calls]
+        self.assertEqual(names, ['glUseProgram', 'glUniformMatrix4fv', 'glUniform3f',
+                                 'glActiveTexture', 'glBindTexture', 'glDrawElements'])
+        _, location, count, transpose, values = gl.calls[1]
+        self.assertEqual((location, count, transpose), (7, 1, 1))
+        np.testing.assert_array_equal(values, matrix.ravel())
+        self.assertEqual(gl.calls[2][1:], (8, 1.0, 0.5, 0.25))
+
+    def test_queue_replays_in_submission_order(self):
+        queue = CommandQueue()
+
+        def record(chunk):
+            buffer = CommandBuffer()
+            for i in range(100):
+                buffer.draw_arrays(4, chunk * 100 + i, 3)
+            queue.submit(chunk, buffer)
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(record, reversed(range(8))))
+
+        gl = FakeGL()
+        buffers = queue.execute(gl)
+        self.assertEqual(len(buffers), 8)
+        firsts = [call[2] for call in gl.calls]
+        self.assertEqual(firsts, list(range(800)))
+        self.assertEqual(queue.execute(gl), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+import numpy as np
+
+from controllers import FPSController, OrbitController, TrackballController
+from pipeline import Matrix4x4, Pipeline, ProjParams
+
+
+def reference_view(pos, target):
+    target = np.array(target, dtype=float)
+    target /= np.linalg.norm(target)
+    rotation = Matrix4x4.camera_rotation(target, np.array([0.0, 1.0, 0.0]))
+    return rotation.dot(Matrix4x4.translation([-c for c in pos]))
+
+
+class ControllersTest(unittest.TestCase):
+
+    def test_fps_view_matches_camera_rotation(self):
+        camera = FPSController(pos=(1.0, 2.0, 3.0), yaw=0.0)
+        np.testing.assert_allclose(camera.view_matrix,
+                                   reference_view([1.0, 2.0, 3.0], [0.0, 0.0, 1.0]), atol=1e-12)
+        camera.rotate(90.0, 0.0)
+        np.testing.assert_allclose(camera.view_matrix,
+                                   reference_view([1.0, 2.0, 3.0], [1.0, 0.0, 0.0]), atol=1e-12)
+
+    def test_view_matrix_is_cached_until_change(self):
+        camera = OrbitController(distance=3.0)
+        view = camera.view_matrix
+        version = camera.version
+        camera.rotate(0.0, 0.0)
+        self.assertIs(camera.view_matrix, view)
+        self.assertEqual(camera.version, version)
+        camera.zoom(2.0)
+        self.assertEqual(camera.version, version + 1)
+        np.testing.assert_allclose(camera.pos, (0.0, 0.0, -6.0))
+
+    def test_orbit_and_trackball_agree_at_rest(self):
+        orbit = OrbitController(center=(1.0, 0.0, 0.0), distance=4.0)
+        trackball = TrackballController(center=(1.0, 0.0, 0.0), distance=4.0)
+        np.testing.assert_allclose(orbit.view_matrix, trackball.view_matrix, atol=1e-12)
+
+    def test_trackball_keeps_distance(self):
+        camera = TrackballController(distance=2.0)
+        camera.drag(0.0, 0.0, 0.3, 0.2)
+        camera.drag(0.1, -0.4, -0.2, 0.1)
+        self.assertAlmostEqual(np.linalg.norm(camera.pos), 2.0)
+        rotation = camera.view_matrix[:3, :3]
+        np.testing.assert_allclose(rotation.dot(rotation.T), np.eye(3), atol=1e-12)
+
+    def test_pipeline_reuses_wvp(self):
+        camera = FPSController()
+        pipeline = Pipeline(translation=[0, 0, 6], projection=ProjParams(4, 3, 1.0, 100.0, 60.0))
+        pipeline.set_camera(camera)
+        wvp = pipeline.get_wvp()
+        self.assertIs(pipeline.get_wvp(), wvp)
+        camera.move(forward=1.0)
+        self.assertIsNot(pipeline.get_wvp(), wvp)
+
+
+if __name__ == '__main__':
+    unittest.main()
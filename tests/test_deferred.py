@@ -0,0 +1,89 @@
+import sys
+import unittest
+
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GLUT import *
+
+from pipeline import Matrix4x4, ProjParams
+from techniques.deferred import ALBEDO, DEPTH, NORMAL, LIGHT_VOLUME_FRONT_FACE, GBuffer, sphere_mesh
+
+
+class SphereMeshTest(unittest.TestCase):
+
+    def test_volume_encloses_unit_ball(self):
+        vertices, indexes = sphere_mesh()
+        triangles = vertices[indexes.reshape(-1, 3)]
+        normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+        area = np.linalg.norm(normals, axis=1)
+        faces = area > 1e-6
+        # distance from center to every face plane, positive for counter-clockwise faces
+        dist = np.einsum('ij,ij->i', normals[faces] / area[faces, None], triangles[faces, 0])
+        self.assertGreaterEqual(dist.min(), 1.0)
+
+    def drawn_faces(self, center, radius):
+        """ Returns (drawn, visible) masks of light volume faces with front faces culled """
+        vertices, indexes = sphere_mesh()
+        world = vertices.astype(np.float64) * radius + center
+        proj = Matrix4x4.perspective_proj(ProjParams(1024, 768, 1.0, 100.0, 60.0))
+        clip = np.hstack([world, np.ones((len(world), 1))]).dot(proj.T)
+        triangles = indexes.reshape(-1, 3)
+        visible = (clip[triangles, 3] > 1.0).all(axis=1)
+        x, y = clip[:, 0] / clip[:, 3], clip[:, 1] / clip[:, 3]
+        tx, ty = x[triangles], y[triangles]
+        area = (tx[:, 1] - tx[:, 0]) * (ty[:, 2] - ty[:, 0]) - (tx[:, 2] - tx[:, 0]) * (ty[:, 1] - ty[:, 0])
+        front = area < 0 if LIGHT_VOLUME_FRONT_FACE == GL_CW else area > 0
+        # faces away from camera, which sits at origin
+        corners = world[triangles]
+        normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+        away = np.einsum('ij,ij->i', normals, corners[:, 0]) > 0
+        # triangles collapsed at poles are never rasterized
+        visible &= np.linalg.norm(normals, axis=1) > 1e-6
+        return visible & ~front, visible, away
+
+    def test_back_faces_are_drawn_outside_volume(self):
+        drawn, visible, away = self.drawn_faces(np.array([0.0, 0.0, 10.0]), 2.0)
+        self.assertTrue(drawn.any())
+        np.testing.assert_array_equal(drawn, visible & away)
+
+    def test_whole_volume_is_drawn_from_inside(self):
+        drawn, visible, away = self.drawn_faces(np.array([0.0, 0.0, 1.0]), 5.0)
+        self.assertTrue(visible.any())
+        np.testing.assert_array_equal(drawn, visible)
+
+
+class GBufferTest(unittest.TestCase):
+
+    def setUp(self):
+        glutInit(sys.argv[1:])
+        glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGBA | GLUT_3_2_CORE_PROFILE)
+        glutInitWindowSize(100, 100)
+        glutCreateWindow("Test Case")
+        self.gbuffer = GBuffer(64, 32)
+        self.gbuffer.init()
+
+    def tearDown(self):
+        self.gbuffer.dispose()
+
+    def test_clear_and_read_back(self):
+        self.gbuffer.bind_for_writing()
+        glClearColor(1.0, 0.0, 0.0, 1.0)
+        glClearDepth(0.5)
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        albedo = self.gbuffer.read(ALBEDO)
+        self.assertEqual(albedo.shape, (32, 64, 4))
+        np.testing.assert_array_equal(albedo[0, 0], [255, 0, 0, 255])
+        np.testing.assert_allclose(self.gbuffer.read(NORMAL)[5, 5], [1.0, 0.0, 0.0, 1.0])
+        np.testing.assert_allclose(self.gbuffer.read(DEPTH)[5, 5], [0.5])
+
+    def test_resize(self):
+        self.gbuffer.resize(20, 10)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.gbuffer.fbo)
+        self.assertEqual(glCheckFramebufferStatus(GL_FRAMEBUFFER), GL_FRAMEBUFFER_COMPLETE)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        self.assertEqual(self.gbuffer.read(DEPTH).shape, (10, 20, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
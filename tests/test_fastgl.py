@@ -0,0 +1,91 @@
+import sys
+import types
+import ctypes
+import unittest
+
+import numpy as np
+from OpenGL.error import GLError
+
+from fastgl import FastGL, SIGNATURES, float_array, load_function
+from glutwindow import GlutWindow, gl_modules
+
+
+class FakeLoader:
+    """ Records calls of loaded functions; untyped ones accept only ints like ctypes does """
+
+    def __init__(self, missing=(), error=0):
+        self.calls = []
+        self.missing = missing
+        self.error = error
+
+    def __call__(self, name, restype, argtypes):
+        if name in self.missing:
+            return None
+        if name == 'glGetError':
+            return lambda: self.error
+
+        def function(*args):
+            if not argtypes and not all(type(a) is int for a in args):
+                raise ctypes.ArgumentError("argument is not int")
+            self.calls.append((name, args))
+        return function
+
+
+class FastGLTest(unittest.TestCase):
+
+    def test_numpy_scalars_are_converted(self):
+        loader = FakeLoader()
+        gl = FastGL(debug=False, loader=loader)
+        gl.functions['glBindBuffer'](0x8892, np.uint32(5))
+        self.assertEqual(loader.calls, [('glBindBuffer', (0x8892, 5))])
+        self.assertIs(type(loader.calls[0][1][1]), int)
+
+    def test_matrix_is_passed_as_float32(self):
+        loader = FakeLoader()
+        gl = FastGL(debug=False, loader=loader)
+        matrix = np.arange(16, dtype=np.float64).reshape(4, 4)
+        gl.functions['glUniformMatrix4fv'](2, 1, True, matrix.T)
+        pointer = loader.calls[0][1][3]
+        data = np.frombuffer(ctypes.string_at(ctypes.addressof(pointer._obj), 64), dtype=np.float32)
+        np.testing.assert_array_equal(data, matrix.T.ravel())
+
+    def test_float32_array_is_not_copied(self):
+        array = np.zeros(4, dtype=np.float32)
+        self.assertEqual(ctypes.addressof(float_array(array)._obj), array.ctypes.data)
+        array.flags.writeable = False
+        self.assertNotEqual(ctypes.addressof(float_array(array)._obj), array.ctypes.data)
+
+    def test_debug_mode_raises_on_error(self):
+        loader = FakeLoader(error=0x502)
+        gl = FastGL(debug=True, loader=loader)
+        with self.assertRaises(GLError):
+            gl.functions['glUseProgram'](3)
+        FastGL(debug=False, loader=loader).functions['glUseProgram'](3)
+
+    def test_install_skips_missing_functions(self):
+        module = types.ModuleType('fake_gl_user')
+        original = module.glDrawArrays = module.glBindTexture = lambda *args: None
+        gl = FastGL(debug=False, loader=FakeLoader(missing=('glDrawArrays',)))
+        self.assertEqual(gl.missing, ['glDrawArrays'])
+        with gl.install([module]):
+            self.assertIs(module.glBindTexture, gl.functions['glBindTexture'])
+            self.assertIs(module.glDrawArrays, original)
+        self.assertIs(module.glBindTexture, original)
+
+    def test_install_patches_window_module(self):
+        module = sys.modules[GlutWindow.__module__]
+        original = module.glDrawElements
+        gl = FastGL(debug=False, loader=FakeLoader())
+        self.assertIn(module, gl_modules())
+        with gl.install(gl_modules()):
+            self.assertIs(module.glDrawElements, gl.functions['glDrawElements'])
+            self.assertIs(module.glBindBuffer, gl.functions['glBindBuffer'])
+        self.assertIs(module.glDrawElements, original)
+
+    def test_core_function_is_resolved(self):
+        restype, argtypes = SIGNATURES['glBindTexture']
+        self.assertIsNotNone(load_function('glBindTexture', restype, argtypes))
+
+
+if __name__ == '__main__':
+    unittest.main()
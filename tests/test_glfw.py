@@ -0,0 +1,36 @@
+import os
+import sys
+import importlib
+import unittest
+from unittest import mock
+
+
+class LazyGlfwTest(unittest.TestCase):
+
+    def setUp(self):
+        self._module = sys.modules.pop('glfw', None)
+        self._environ = mock.patch.dict(os.environ)
+        self._environ.start()
+        os.environ.pop('GLFW_LIBRARY', None)
+
+    def tearDown(self):
+        self._environ.stop()
+        sys.modules.pop('glfw', None)
+        if self._module is not None:
+            sys.modules['glfw'] = self._module
+
+    def test_library_is_looked_up_on_first_call(self):
+        with mock.patch('ctypes.util.find_library', return_value=None) as find_library:
+            glfw = importlib.import_module('glfw')
+            self.assertEqual(glfw.GLFW_PRESS, 1)
+            find_library.assert_not_called()
+            with self.assertRaises(OSError) as raised:
+                glfw.glfwInit()
+            self.assertIn("GLFW library not found", str(raised.exception))
+            self.assertTrue(find_library.called)
+            with self.assertRaises(OSError):
+                glfw.GLFW_VERSION_MAJOR
+
+
+if __name__ == '__main__':
+    unittest.main()
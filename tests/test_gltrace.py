@@ -0,0 +1,97 @@
+import sys
+import types
+import unittest
+
+import numpy as np
+
+from gltrace import GLTracer
+from glutwindow import GlutWindow, gl_modules
+
+
+NAMES = ('glUseProgram', 'glBindBuffer', 'glEnableVertexAttribArray', 'glDisableVertexAttribArray',
+         'glUniformMatrix4fv', 'glBufferData', 'glBufferSubData', 'glBindVertexArray',
+         'glDrawElements')
+
+
+def fake_module():
+    module = types.ModuleType('fake_gl_user')
+    module.calls = []
+    for name in NAMES:
+        setattr(module, name, lambda *args, name=name: module.calls.append(name))
+    return module
+
+
+class GLTracerTest(unittest.TestCase):
+
+    def draw(self, m, matrix):
+        m.glUseProgram(3)
+        m.glEnableVertexAttribArray(0)
+        m.glBindBuffer(0x8892, 5)
+        m.glUniformMatrix4fv(1, 1, True, matrix)
+        m.glDrawElements(4, 18, 0x1405, None)
+        m.glDisableVertexAttribArray(0)
+
+    def test_calls_are_counted_per_frame(self):
+        m = fake_module()
+        tracer = GLTracer().install([m], NAMES)
+        self.draw(m, np.eye(4))
+        self.draw(m, np.eye(4))
+        stats = tracer.end_frame()
+        self.assertEqual(stats.calls['glDrawElements'], 2)
+        self.assertEqual(stats.total_calls, 12)
+        self.assertEqual(len(m.calls), 12)
+        self.assertEqual(tracer.current.total_calls, 0)
+        tracer.uninstall()
+        m.glDrawElements(4, 18, 0x1405, None)
+        self.assertEqual(tracer.current.total_calls, 0)
+
+    def test_redundant_state_is_flagged(self):
+        m = fake_module()
+        with GLTracer().install([m], NAMES) as tracer:
+            self.draw(m, np.eye(4))
+            self.draw(m, np.eye(4))
+            self.draw(m, 2 * np.eye(4))
+            data = np.zeros(16, dtype=np.float32)
+            m.glBufferData(0x8892, 64, data, 0x88E4)
+            m.glBufferData(0x8892, 64, data, 0x88E4)
+            stats = tracer.end_frame()
+        self.assertEqual(stats.redundant['glUseProgram'], 2)
+        self.assertEqual(stats.redundant['glBindBuffer'], 2)
+        self.assertEqual(stats.redundant['glUniformMatrix4fv'], 1)
+        self.assertEqual(stats.redundant['glEnableVertexAttribArray'], 0)
+        self.assertEqual(stats.redundant['glBufferData'], 1)
+
+    def test_orphaning_is_not_redundant(self):
+        m = fake_module()
+        data = np.zeros(16, dtype=np.float32)
+        with GLTracer().install([m], NAMES) as tracer:
+            for _ in range(2):
+                m.glBindBuffer(0x8C2A, 5)
+                m.glBufferData(0x8C2A, 64, None, 0x88E0)
+                m.glBufferSubData(0x8C2A, 0, 64, data)
+            stats = tracer.end_frame()
+        self.assertEqual(stats.redundant['glBufferData'], 0)
+        self.assertEqual(stats.redundant['glBufferSubData'], 0)
+
+    def test_element_buffer_uploads_are_tracked_per_vertex_array(self):
+        m = fake_module()
+        data = np.arange(6, dtype=np.uint32)
+        with GLTracer().install([m], NAMES) as tracer:
+            for vao, ibo in ((1, 5), (2, 6), (1, 5)):
+                m.glBindVertexArray(vao)
+                m.glBindBuffer(0x8893, ibo)
+                m.glBufferData(0x8893, 24, data, 0x88E4)
+            stats = tracer.end_frame()
+        self.assertEqual(stats.redundant['glBindBuffer'], 1)
+        self.assertEqual(stats.redundant['glBufferData'], 1)
+
+    def test_window_module_is_traced(self):
+        module = sys.modules[GlutWindow.__module__]
+        original = module.glDrawElements
+        with GLTracer().install(gl_modules()):
+            self.assertIs(module.glDrawElements.__wrapped__, original)
+        self.assertIs(module.glDrawElements, original)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+
+from gpuprofiler import GpuProfiler
+
+
+class FakeTimerGL:
+    """ Timestamps advance by 1 ms per query, results become available after `delay` frames """
+
+    GL_TIMESTAMP, GL_QUERY_RESULT, GL_QUERY_RESULT_AVAILABLE = 0x8E28, 0x8866, 0x8867
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.frame = 0
+        self.issued = {}
+        self.next_name = 1
+        self.counters = 0
+        self.blocking_reads = 0
+
+    def glGenQueries(self, n):
+        names = list(range(self.next_name, self.next_name + n))
+        self.next_name += n
+        return names
+
+    def glQueryCounter(self, query, target):
+        self.issued[query] = (self.frame, self.counters * 1000000)
+        self.counters += 1
+
+    def glGetQueryObjectiv(self, query, pname, params):
+        params.value = int(self.frame - self.issued[query][0] >= self.delay)
+
+    def glGetQueryObjectui64v(self, query, pname, params):
+        if self.frame - self.issued[query][0] < self.delay:
+            self.blocking_reads += 1
+        params.value = self.issued[query][1]
+
+    def glDeleteQueries(self, n, names):
+        pass
+
+
+class InOrderTimerGL(FakeTimerGL):
+    """ Only first `completed` issued queries have results """
+
+    def __init__(self):
+        super().__init__(delay=0)
+        self.completed = 0
+        self.order = {}
+
+    def glQueryCounter(self, query, target):
+        self.order[query] = self.counters
+        super().glQueryCounter(query, target)
+
+    def glGetQueryObjectiv(self, query, pname, params):
+        params.value = int(self.order[query] < self.completed)
+
+    def glGetQueryObjectui64v(self, query, pname, params):
+        if self.order[query] >= self.completed:
+            self.blocking_reads += 1
+        params.value = self.issued[query][1]
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += 0.002
+        return self.now
+
+
+class GpuProfilerTest(unittest.TestCase):
+
+    def run_frames(self, profiler, gl, count):
+        for _ in range(count):
+            profiler.begin_frame()
+            with profiler.scope("frame"):
+                with profiler.scope("shadows"):
+                    pass
+            profiler.end_frame()
+            gl.frame += 1
+
+    def test_results_are_read_without_stalls(self):
+        gl = FakeTimerGL(delay=2)
+        profiler = GpuProfiler(gl, batch=4, clock=FakeClock())
+        self.run_frames(profiler, gl, 10)
+        self.assertEqual(gl.blocking_reads, 0)
+        self.assertEqual(profiler.latency, 2)
+        self.assertEqual(len(profiler.frames), 8)
+        # queries go back to the pool
+        self.assertLessEqual(profiler.queries, 16)
+
+    def test_frame_waits_for_outer_scope_end(self):
+        gl = InOrderTimerGL()
+        profiler = GpuProfiler(gl, clock=FakeClock())
+        self.run_frames(profiler, gl, 1)
+        # frame start, shadows start and end are done, frame end is not
+        gl.completed = 3
+        self.assertEqual(profiler.collect(), 0)
+        gl.completed = 4
+        self.assertEqual(profiler.collect(), 1)
+        self.assertEqual(gl.blocking_reads, 0)
+
+    def test_summary_merges_cpu_and_gpu_times(self):
+        gl = FakeTimerGL(delay=1)
+        profiler = GpuProfiler(gl, clock=FakeClock())
+        self.run_frames(profiler, gl, 5)
+        summary = profiler.summary()
+        self.assertEqual(list(summary), ["frame", "shadows"])
+        depth, calls, cpu, gpu = summary["shadows"]
+        self.assertEqual((depth, calls), (1, 4))
+        self.assertAlmostEqual(cpu, 2.0)
+        self.assertAlmostEqual(gpu, 1.0)
+        self.assertAlmostEqual(summary["frame"][3], 3.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+import mipmap
+
+
+class MipmapTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.image = rng.randint(0, 256, size=(37, 64, 4)).astype(np.uint8)
+
+    def test_chain_goes_down_to_single_pixel(self):
+        for mip_filter in ('box', 'kaiser'):
+            levels = mipmap.build_mip_chain(self.image, mip_filter)
+            self.assertEqual(levels[0].shape, (37, 64, 4))
+            self.assertEqual(levels[-1].shape, (1, 1, 4))
+            self.assertEqual(len(levels), 7)
+
+    def test_odd_sizes_are_rounded_down(self):
+        image = np.zeros((577, 717, 4), dtype=np.uint8)
+        for mip_filter in ('box', 'kaiser'):
+            levels = mipmap.build_mip_chain(image, mip_filter)
+            self.assertEqual(len(levels), 10)
+            for i, level in enumerate(levels):
+                self.assertEqual(level.shape, (max(1, 577 >> i), max(1, 717 >> i), 4))
+
+    def test_box_filter_folds_odd_row(self):
+        image = np.zeros((3, 1, 4), dtype=np.uint8)
+        image[2] = 255
+        level = mipmap.build_mip_chain(image, 'box', srgb=False)[1]
+        self.assertEqual(level.shape, (1, 1, 4))
+        self.assertEqual(level[0, 0, 0], 85)
+
+    def test_box_filter_averages_in_linear_space(self):
+        image = np.zeros((2, 2, 4), dtype=np.uint8)
+        image[0, :] = 255
+        linear = mipmap.build_mip_chain(image, 'box', srgb=False)[1]
+        corrected = mipmap.build_mip_chain(image, 'box', srgb=True)[1]
+        self.assertEqual(linear[0, 0, 0], 128)
+        self.assertEqual(corrected[0, 0, 0], 188)
+        self.assertEqual(corrected[0, 0, 3], 128)
+
+    def test_compressed_sizes(self):
+        self.assertEqual(len(mipmap.compress(self.image, 'bc1')), 10 * 16 * 8)
+        self.assertEqual(len(mipmap.compress(self.image, 'bc3')), 10 * 16 * 16)
+
+    def test_solid_block_is_encoded_exactly(self):
+        image = np.zeros((4, 4, 4), dtype=np.uint8)
+        image[:] = (255, 0, 0, 255)
+        block = mipmap.compress(image, 'bc1')
+        self.assertEqual(block, bytes([0x00, 0xf8, 0x00, 0xf8, 0, 0, 0, 0]))
+
+    def test_cache_roundtrip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = mipmap.MipCache(directory)
+            chain = mipmap.build(self.image, compression='bc3')
+            key = cache.key(b'source', 'box', True, 'bc3')
+            self.assertIsNone(cache.load(key))
+            cache.save(key, chain)
+            self.assertEqual(cache.load(key), chain)
+            self.assertNotEqual(key, cache.key(b'source', 'box', True, 'bc1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
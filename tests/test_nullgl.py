@@ -0,0 +1,54 @@
+import unittest
+
+from OpenGL.GL import GL_TEXTURE_2D
+
+import glutwindow
+from camera import Camera
+from nullgl import NullGL, uniform_names
+from techniques.lighting import LightingTechnique
+from techniques.technique import InvalidUniformLocationError
+from texture import Texture
+
+
+class NullGLTest(unittest.TestCase):
+
+    def setUp(self):
+        self.gl = NullGL().install()
+
+    def tearDown(self):
+        self.gl.uninstall()
+
+    def test_uniform_names(self):
+        with open("shaders/fs_lighting.glsl") as f:
+            names = uniform_names(f.read())
+        self.assertEqual(names, ["gDirectionalLight.Color", "gDirectionalLight.AmbientIntensity",
+                                 "gSampler"])
+
+    def test_technique(self):
+        with LightingTechnique("shaders/vs.glsl", "shaders/fs_lighting.glsl") as technique:
+            technique.get_uniform_location("gWVP")
+            with self.assertRaises(InvalidUniformLocationError):
+                technique.get_uniform_location("gMissing")
+        self.assertEqual(self.gl.calls['glLinkProgram'], 1)
+
+    def test_texture(self):
+        texture = Texture(GL_TEXTURE_2D, "resources/test.png")
+        self.assertTrue(texture.load())
+        self.assertTrue(texture.ready)
+        self.assertEqual(self.gl.calls['glTexImage2D'], 1)
+
+    def test_window_frames(self):
+        window = glutwindow.GlutWindow((320, 240))
+        window.camera = Camera([0.0, 1.0, 0.0], [0.0, -0.5, 1.0], [0.0, 1.0, 0.0], 320, 240)
+        for _ in range(3):
+            window.on_display()
+        self.assertEqual(self.gl.calls['glDrawElements'], 3)
+        self.assertEqual(self.gl.calls['glutSwapBuffers'], 3)
+
+    def test_uninstall_restores_functions(self):
+        self.gl.uninstall()
+        self.assertNotIsInstance(glutwindow.glDrawElements, type(self.gl.glDrawElements))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+
+from occlusion import OcclusionCuller
+from pipeline import Pipeline, ProjParams
+
+
+class OcclusionCullerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.vp = Pipeline(projection=ProjParams(256, 128, 1.0, 100.0, 60.0)).get_wvp()
+        self.culler = OcclusionCuller(128, 64)
+        # wall 20 units wide at distance 10 in front of camera
+        wall = np.array([[-10, -10, 10], [10, -10, 10], [10, 10, 10], [-10, 10, 10]], dtype=np.float32)
+        self.culler.add_occluder(wall, [0, 1, 2, 0, 2, 3], self.vp)
+        self.culler.build_pyramid()
+
+    def visible(self, center, size=0.5):
+        center = np.asarray(center, dtype=np.float64)
+        return bool(self.culler.test(center - size, center + size, self.vp)[0])
+
+    def test_depth_buffer(self):
+        self.assertGreater(self.culler.rasterized, 0)
+        self.assertLess(self.culler.depth[32, 64], 1.0)
+        self.assertEqual(self.culler.pyramid[-1].shape, (1, 1))
+
+    def test_box_behind_occluder_is_hidden(self):
+        self.assertFalse(self.visible([0, 0, 20]))
+        self.assertFalse(self.visible([3, 2, 50], size=2.0))
+
+    def test_box_in_front_or_beside_is_visible(self):
+        self.assertTrue(self.visible([0, 0, 5]))
+        self.assertTrue(self.visible([22, 0, 20]))
+        # straddles the edge of the wall
+        self.assertTrue(self.visible([20, 0, 20], size=1.5))
+
+    def test_boxes_behind_camera_or_crossing_near_plane(self):
+        self.assertFalse(self.visible([0, 0, -10]))
+        self.assertTrue(self.visible([0, 0, 0], size=2.0))
+
+    def test_mask_for_many_boxes(self):
+        centers = np.array([[0, 0, 20], [0, 0, 5], [200, 0, 20]], dtype=np.float64)
+        mask = self.culler.test(centers - 0.5, centers + 0.5, self.vp)
+        self.assertEqual(mask.tolist(), [False, True, False])
+
+
+if __name__ == '__main__':
+    unittest.main()
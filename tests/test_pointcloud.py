@@ -0,0 +1,38 @@
+import unittest
+
+import numpy as np
+
+from pipeline import Pipeline, ProjParams
+from pointcloud import project, screen_space_decimate
+
+
+class DecimationTest(unittest.TestCase):
+
+    def setUp(self):
+        projection = ProjParams(100, 100, 1.0, 100.0, 60.0)
+        self.wvp = Pipeline(translation=[0, 0, 3], projection=projection).get_wvp()
+
+    def test_points_behind_camera_are_invisible(self):
+        points = np.array([[0, 0, 0], [0, 0, -10], [1000, 0, 0]], dtype=np.float32)
+        _, visible = project(points, self.wvp)
+        self.assertEqual(visible.tolist(), [True, False, False])
+
+    def test_at_most_one_point_per_pixel(self):
+        rng = np.random.RandomState(0)
+        points = (0.5 * rng.randn(200000, 3)).astype(np.float32)
+        selected = screen_space_decimate(points, self.wvp, 100, 100)
+        self.assertLessEqual(len(selected), 100 * 100)
+        self.assertGreater(len(selected), 1000)
+        self.assertTrue(np.all(np.diff(selected.astype(np.int64)) > 0))
+
+        ndc, _ = project(points[selected], self.wvp)
+        pixels = np.round((ndc[:, :2] + 1.0) * 0.5 * 99).astype(int)
+        self.assertEqual(len(np.unique(pixels[:, 1] * 100 + pixels[:, 0])), len(selected))
+
+    def test_same_pixel_points_collapse(self):
+        points = np.zeros((10, 3), dtype=np.float32)
+        self.assertEqual(len(screen_space_decimate(points, self.wvp, 100, 100)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+import glutwindow
+from camera import Camera
+from nullgl import NullGL
+from replay import InputRecorder, InputReplayer, Recording, MOUSE
+
+
+class FakeWindow:
+
+    def __init__(self):
+        self.camera = Camera([0.0, 1.0, 0.0], [0.0, -0.5, 1.0], [0.0, 1.0, 0.0],
+                             1024, 768, warp_pointer=lambda x, y: None)
+        self.keys = []
+
+    def on_mouse(self, x, y):
+        self.camera.mouse(x, y)
+
+    def on_keyboard(self, key, x, y):
+        self.keys.append(key)
+        self.camera.keyboard(key)
+
+    def on_display(self):
+        self.camera.render()
+
+
+class ReplayTest(unittest.TestCase):
+
+    def test_replay_reproduces_camera_path(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "session.rec")
+            with InputRecorder(FakeWindow(), path) as recorder:
+                for i in range(10):
+                    recorder.on_mouse(500 + 7 * i, 400 - 3 * i)
+                    recorder.on_mouse(510 + 7 * i, 390 - 3 * i)
+                    if i % 3 == 0:
+                        recorder.on_keyboard(101)  # GLUT_KEY_UP
+                    recorder.on_display()
+
+            recording = Recording.load(path)
+            self.assertEqual(len(recording.frames), 10)
+            self.assertEqual(len(recording.frames[0]), 3)
+
+            window = FakeWindow()
+            replayer = InputReplayer(recording, window)
+            timings = replayer.run_headless()
+            self.assertEqual(len(timings), 10)
+            self.assertEqual(window.keys, [101] * 4)
+            self.assertEqual(replayer.divergence(), 0.0)
+
+    def test_replaying_window_renders_only_replayed_frames(self):
+        with NullGL().install() as gl:
+            window = glutwindow.GlutWindow((1024, 768), animate=False, replaying=True)
+            window.camera = FakeWindow().camera
+            recording = Recording(1.0 / 60.0, [[(MOUSE, 0.0, 500, 400, 0)]] * 3, [])
+            InputReplayer(recording, window).run_headless()
+        self.assertEqual(gl.calls['glutTimerFunc'], 0)
+        self.assertEqual(gl.calls['glutSwapBuffers'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+from scheduler import FrameScheduler
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FrameSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scheduler = FrameScheduler(target_fps=50.0, clock=self.clock)
+
+    def test_first_frame_is_rendered_immediately(self):
+        self.assertEqual(self.scheduler.delay(), 0.0)
+
+    def test_static_scene_is_not_rendered(self):
+        self.scheduler.begin_frame()
+        self.assertIsNone(self.scheduler.delay())
+        self.assertFalse(self.scheduler.wait(sleep=self.fail))
+
+    def test_changes_are_rendered_not_faster_than_target(self):
+        self.scheduler.begin_frame()
+        self.clock.now = 0.005
+        self.scheduler.invalidate()
+        self.assertAlmostEqual(self.scheduler.delay(), 0.015)
+        self.clock.now = 0.1
+        self.assertEqual(self.scheduler.delay(), 0.0)
+
+    def test_animation_keeps_rendering(self):
+        self.scheduler.start_animation('spin')
+        for _ in range(3):
+            self.scheduler.begin_frame()
+            self.assertIsNotNone(self.scheduler.delay())
+        self.scheduler.stop_animation('spin')
+        self.assertIsNone(self.scheduler.delay())
+        self.assertEqual(self.scheduler.frames, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
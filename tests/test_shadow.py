@@ -0,0 +1,95 @@
+import unittest
+
+import numpy as np
+
+from controllers import FPSController
+from nullgl import NullGL
+from pipeline import ProjParams
+from techniques.shadow import CascadedShadowMap, ShadowReceiverTechnique, cascade_splits, frustum_corners
+
+
+class CascadedShadowMapTest(unittest.TestCase):
+
+    def setUp(self):
+        self.proj = ProjParams(1024, 768, 1.0, 100.0, 60.0)
+        self.shadows = CascadedShadowMap(self.proj, cascades=3, resolution=1024)
+        self.camera = FPSController((0.0, 2.0, 0.0), yaw=30.0, pitch=-10.0)
+        self.light = (0.3, -1.0, 0.2)
+
+    def test_splits_cover_depth_range(self):
+        splits = cascade_splits(1.0, 100.0, 4)
+        self.assertAlmostEqual(splits[0], 1.0)
+        self.assertAlmostEqual(splits[-1], 100.0)
+        self.assertTrue(np.all(np.diff(splits) > 0))
+
+    def test_cascades_contain_their_frustum_part(self):
+        self.shadows.update(self.camera.view_matrix, self.light)
+        for cascade in self.shadows.cascades:
+            corners = frustum_corners(self.camera.view_matrix, self.proj, cascade.near, cascade.far)
+            clip = np.hstack([corners, np.ones((8, 1))]).dot(cascade.matrix.T)
+            self.assertTrue(np.all(np.abs(clip[:, :3]) <= 1.0 + 1e-9))
+
+    def test_static_cache_is_reused(self):
+        self.assertEqual(len(self.shadows.update(self.camera.view_matrix, self.light)), 3)
+        self.camera.move(forward=0.05)
+        self.camera.rotate(1.0, 0.0)
+        self.assertEqual(self.shadows.update(self.camera.view_matrix, self.light), [])
+
+        self.camera.move(forward=30.0)
+        dirty = self.shadows.update(self.camera.view_matrix, self.light)
+        self.assertIn(self.shadows.cascades[0], dirty)
+
+        self.assertEqual(len(self.shadows.update(self.camera.view_matrix, (0.0, -1.0, 0.0))), 3)
+        self.shadows.invalidate_static()
+        self.assertEqual(len(self.shadows.update(self.camera.view_matrix, (0.0, -1.0, 0.0))), 3)
+
+
+class UniformGL(NullGL):
+    """ Records uploaded uniform values by location """
+
+    def __init__(self):
+        super().__init__()
+        self.uniforms = {}
+
+    def glUniform1i(self, location, value):
+        self.uniforms[location] = value
+
+    def glUniform1fv(self, location, count, value):
+        self.uniforms[location] = np.asarray(value)[:count]
+
+    def glUniformMatrix4fv(self, location, count, transpose, value):
+        self.uniforms[location] = np.asarray(value).reshape(-1, 4, 4)[:count]
+
+
+class ShadowReceiverTechniqueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.gl = UniformGL().install()
+        self.proj = ProjParams(1024, 768, 1.0, 100.0, 60.0)
+        self.shadows = CascadedShadowMap(self.proj, cascades=3)
+
+    def tearDown(self):
+        self.gl.uninstall()
+
+    def test_cascades_are_defined_from_shadow_map(self):
+        with ShadowReceiverTechnique(self.shadows) as technique:
+            sources = [self.gl._sources[shader] for shader in self.gl._attached[technique.shader_program]]
+        fragment = sources[-1]
+        self.assertNotIn("#include", fragment)
+        self.assertIn("float ShadowFactor(", fragment)
+        self.assertTrue(fragment.startswith("#version 400\n#define MAX_CASCADES 3\n"))
+
+    def test_receiver_gets_cascade_uniforms(self):
+        self.shadows.update(FPSController((0.0, 2.0, 0.0)).view_matrix, (0.3, -1.0, 0.2))
+        with ShadowReceiverTechnique(self.shadows) as technique:
+            technique.set_shadow_map(2)
+            location = technique.get_uniform_location
+            self.assertEqual(self.gl.uniforms[location("gShadowMap")], 2)
+            matrices = self.gl.uniforms[location("gCascadeMatrices")]
+            np.testing.assert_allclose(matrices, [c.matrix for c in self.shadows.cascades], rtol=1e-6)
+            np.testing.assert_allclose(self.gl.uniforms[location("gCascadeFar")],
+                                       self.shadows.splits[1:], rtol=1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import sys
+import unittest
+
+from startup import StartupTracer
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class StartupTracerTest(unittest.TestCase):
+
+    def test_nested_stages(self):
+        clock = FakeClock()
+        tracer = StartupTracer(clock=clock)
+        with tracer.stage("window"):
+            clock.now = 0.1
+            with tracer.stage("shaders"):
+                clock.now = 0.3
+        tracer.mark("first frame")
+        events = {event["name"]: event for event in tracer.chrome_trace()}
+        window, shaders = events["window"], events["shaders"]
+        self.assertAlmostEqual(window["dur"], 0.3e6)
+        self.assertAlmostEqual(shaders["ts"], 0.1e6)
+        self.assertLessEqual(shaders["ts"] + shaders["dur"], window["ts"] + window["dur"])
+        self.assertEqual(events["first frame"]["ph"], "i")
+
+    def test_imports_are_traced(self):
+        sys.modules.pop("colorsys", None)
+        tracer = StartupTracer()
+        tracer.trace_imports()
+        try:
+            import colorsys
+            import unittest
+        finally:
+            tracer.stop_imports()
+        names = [record[1] for record in tracer.records if record[0] == "import"]
+        self.assertEqual(names, ["colorsys"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+
+import numpy as np
+from OpenGL.GL import GL_ALREADY_SIGNALED, GL_TIMEOUT_EXPIRED
+
+from nullgl import NullGL
+from streaming import StreamingBuffer, StreamingBufferError
+
+
+class FenceGL(NullGL):
+    """ Fences report timeout `busy` times before they are signaled """
+
+    def __init__(self, busy=0):
+        super().__init__()
+        self.busy = busy
+        self.waits = []
+        self.deleted = []
+
+    def glClientWaitSync(self, sync, flags, timeout):
+        self.waits.append(sync)
+        if self.busy:
+            self.busy -= 1
+            return GL_TIMEOUT_EXPIRED
+        return GL_ALREADY_SIGNALED
+
+    def glDeleteSync(self, sync):
+        self.deleted.append(sync)
+
+
+class StreamingBufferTest(unittest.TestCase):
+
+    def setUp(self):
+        self.gl = FenceGL().install()
+
+    def tearDown(self):
+        self.gl.uninstall()
+
+    def test_offsets_advance_and_wrap(self):
+        with StreamingBuffer(256, frames=3, persistent=True) as buffer:
+            bases = []
+            for _ in range(4):
+                buffer.begin_frame()
+                bases.append(buffer.base)
+                first = buffer.write(np.ones(10, dtype=np.float32))
+                second = buffer.write(np.ones(4, dtype=np.float32))
+                self.assertEqual((first, second), (buffer.base, buffer.base + 48))
+                buffer.end_frame()
+        self.assertEqual(bases, [0, 256, 512, 0])
+
+    def test_written_data_lands_in_region(self):
+        with StreamingBuffer(256, frames=2, persistent=True) as buffer:
+            buffer.begin_frame()
+            buffer.begin_frame()
+            offset = buffer.write(np.arange(4, dtype=np.float32))
+            np.testing.assert_array_equal(buffer._view[offset:offset + 16].view(np.float32),
+                                          [0, 1, 2, 3])
+
+    def test_region_overflow(self):
+        with StreamingBuffer(64, frames=2, persistent=True) as buffer:
+            buffer.begin_frame()
+            buffer.reserve(12)
+            with self.assertRaises(StreamingBufferError):
+                buffer.reserve(8)
+
+    def test_region_is_reused_after_its_fence(self):
+        self.gl.busy = 2
+        with StreamingBuffer(64, frames=2, persistent=True) as buffer:
+            fences = []
+            for _ in range(3):
+                buffer.begin_frame()
+                buffer.end_frame()
+                fences.append(buffer._fences[buffer._region])
+            # third frame reused region of the first one and waited for its fence
+            self.assertEqual(self.gl.waits, [fences[0]] * 3)
+            self.assertEqual(buffer.stalls, 1)
+            self.assertIn(fences[0], self.gl.deleted)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+from OpenGL.GL import GL_TEXTURE_2D, GL_UNPACK_ALIGNMENT, GL_RGB, GL_RGBA
+
+from nullgl import NullGL
+from texture import Texture, RESIDENCY_KEEP, RESIDENCY_DROP, RESIDENCY_RELOAD
+
+
+class RecordingGL(NullGL):
+    """ Tracks unpack alignment and records it for every upload """
+
+    def __init__(self):
+        super().__init__()
+        self.alignment = 4
+        self.uploads = []
+
+    def glPixelStorei(self, pname, value):
+        if pname == GL_UNPACK_ALIGNMENT:
+            self.alignment = value
+
+    def glTexImage2D(self, target, level, internal_format, width, height, border, fmt, kind, data):
+        self.uploads.append((width, height, fmt, self.alignment))
+
+
+class TextureTest(unittest.TestCase):
+
+    def setUp(self):
+        self.gl = RecordingGL().install()
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.gl.uninstall()
+        self.directory.cleanup()
+
+    def image(self, name, width, height, mode):
+        path = os.path.join(self.directory.name, name)
+        Image.new(mode, (width, height), 128).save(path)
+        return path
+
+    def test_unpack_alignment_is_restored(self):
+        wide = Texture(GL_TEXTURE_2D, self.image("wide.png", 2, 2, "RGBA"))
+        odd = Texture(GL_TEXTURE_2D, self.image("odd.png", 3, 2, "RGB"))
+        chain = Texture(GL_TEXTURE_2D, self.image("chain.png", 2, 2, "RGBA"), mipmaps=True)
+        self.assertTrue(wide.load())
+        self.assertEqual(self.gl.alignment, 4)
+        self.assertTrue(odd.load())
+        # mip levels are uploaded without setting alignment, 1x1 RGBA rows are 4 bytes
+        self.assertTrue(chain.load())
+        self.assertEqual([upload[3] for upload in self.gl.uploads], [8, 1, 4, 4])
+
+    def test_format_follows_image_channels(self):
+        rgb = Texture(GL_TEXTURE_2D, self.image("rgb.png", 4, 2, "RGB"))
+        rgba = Texture(GL_TEXTURE_2D, self.image("rgba.png", 4, 2, "RGBA"))
+        gray = Texture(GL_TEXTURE_2D, self.image("gray.png", 4, 2, "L"))
+        for texture in (rgb, rgba, gray):
+            self.assertTrue(texture.load())
+        self.assertEqual([upload[2] for upload in self.gl.uploads], [GL_RGB, GL_RGBA, GL_RGBA])
+        self.assertEqual((rgb.width, rgb.height, rgb.nbytes), (4, 2, 32))
+
+    def test_residency_policies(self):
+        path = self.image("rgb.png", 4, 2, "RGB")
+        textures = {residency: Texture(GL_TEXTURE_2D, path, residency=residency)
+                    for residency in (RESIDENCY_KEEP, RESIDENCY_DROP, RESIDENCY_RELOAD)}
+        for texture in textures.values():
+            self.assertTrue(texture.load())
+        kept = textures[RESIDENCY_KEEP]
+        self.assertIs(kept.pixels(), kept.blob)
+        self.assertEqual(kept.pixels().shape, (2, 4, 3))
+        self.assertIsNone(textures[RESIDENCY_DROP].blob)
+        self.assertIsNone(textures[RESIDENCY_DROP].pixels())
+        self.assertIsNone(textures[RESIDENCY_RELOAD].blob)
+        np.testing.assert_array_equal(textures[RESIDENCY_RELOAD].pixels(), kept.blob)
+
+
+if __name__ == '__main__':
+    unittest.main()
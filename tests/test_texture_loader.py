@@ -0,0 +1,118 @@
+import os
+import tempfile
+import unittest
+
+from PIL import Image
+from OpenGL.GL import GL_TEXTURE_2D, GL_TEXTURE0
+
+from nullgl import NullGL
+from texture_loader import AsyncTextureLoader
+
+
+class RecordingGL(NullGL):
+    """ Records texture binds, allocations, sub-image uploads and deletions """
+
+    def __init__(self):
+        super().__init__()
+        self.binds = []
+        self.allocations = []
+        self.slices = []
+        self.deleted = []
+        self.staged = []
+
+    def glTexImage2D(self, target, level, internal_format, width, height, border, fmt, kind, data):
+        if data is None:
+            self.allocations.append(self.binds[-1])
+
+    def glBufferSubData(self, target, offset, size, data):
+        self.staged.append((offset, size))
+
+    def glDeleteTextures(self, textures):
+        self.deleted.extend(textures)
+
+    def glBindTexture(self, target, texture):
+        self.binds.append(texture)
+
+    def glTexSubImage2D(self, target, level, x, y, width, height, fmt, kind, data):
+        self.slices.append((y, height))
+
+
+class AsyncTextureLoaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.gl = RecordingGL().install()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "image.png")
+        Image.new("RGBA", (64, 16), (10, 20, 30, 255)).save(self.path)
+        # rows are 256 bytes, so 4 rows fit into budget
+        self.loader = AsyncTextureLoader(max_workers=1, bytes_per_frame=1024)
+
+    def tearDown(self):
+        self.loader.shutdown()
+        self.gl.uninstall()
+        self.directory.cleanup()
+
+    def load(self):
+        handle = self.loader.load(GL_TEXTURE_2D, self.path)
+        handle._future.result()
+        return handle
+
+    def test_upload_is_limited_per_frame(self):
+        self.load()
+        self.assertEqual(self.loader.update(), 1024)
+        self.assertEqual(self.gl.slices, [(0, 4)])
+        self.assertEqual(self.loader.update(), 1024)
+        self.assertEqual(self.gl.slices, [(0, 4), (4, 4)])
+
+    def test_placeholder_is_bound_until_texture_is_ready(self):
+        handle = self.load()
+        handle.bind(GL_TEXTURE0)
+        self.assertFalse(handle.ready)
+        self.assertEqual(self.gl.binds[-1], handle._placeholder)
+
+    def test_texture_is_finished_across_frames(self):
+        handle = self.load()
+        frames = 0
+        while not handle.done():
+            self.loader.update()
+            frames += 1
+        self.assertEqual(frames, 4)
+        self.assertTrue(handle.ready)
+        self.assertEqual(self.loader.pending, 0)
+        self.assertEqual(sum(rows for _, rows in self.gl.slices), 16)
+        handle.bind(GL_TEXTURE0)
+        self.assertEqual(self.gl.binds[-1], handle.texture_obj)
+        self.assertNotEqual(handle.texture_obj, handle._placeholder)
+
+    def test_storage_is_allocated_at_queue_head(self):
+        first, second = self.load(), self.load()
+        self.loader.update()
+        self.assertEqual(len(self.gl.allocations), 1)
+        self.assertEqual(self.gl.calls['glGenTextures'], 2)  # placeholder and first image
+        while not first.done():
+            self.loader.update()
+        self.assertEqual(self.gl.calls['glGenTextures'], 2)
+        while not second.done():
+            self.loader.update()
+        self.assertEqual(self.gl.calls['glGenTextures'], 3)
+
+    def test_staging_buffer_is_reused(self):
+        first, second = self.load(), self.load()
+        self.loader.bytes_per_frame = 3 * 1024
+        while not (first.done() and second.done()):
+            self.loader.update()
+        self.assertEqual(self.gl.calls['glGenBuffers'], 1)
+        # slices of both images share buffer of budget size within one frame
+        self.assertTrue(all(offset + size <= 3 * 1024 for offset, size in self.gl.staged))
+        self.assertIn((1024, 2048), self.gl.staged)
+
+    def test_shutdown_deletes_placeholder(self):
+        handle = self.load()
+        self.loader.update()
+        self.loader.shutdown()
+        self.assertEqual(self.gl.calls['glDeleteBuffers'], 1)
+        self.assertCountEqual(self.gl.deleted, [handle._placeholder, self.gl.allocations[0]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+
+from texture_manager import TextureManager, TextureReleasedError
+
+
+class FakeTexture:
+
+    def __init__(self, target, filename, size=100):
+        self.target = target
+        self.filename = filename
+        self.nbytes = size
+        self.loaded = False
+        self.bound = 0
+
+    def load(self):
+        self.loaded = True
+        return True
+
+    def dispose(self):
+        self.loaded = False
+
+    def bind(self, texture_unit):
+        assert self.loaded
+        self.bound += 1
+
+
+class TextureManagerTest(unittest.TestCase):
+
+    def test_same_texture_is_shared(self):
+        manager = TextureManager(factory=FakeTexture)
+        a = manager.acquire(1, "a.png")
+        b = manager.acquire(1, "a.png")
+        c = manager.acquire(1, "a.png", size=10)
+        self.assertIs(a.texture, b.texture)
+        self.assertIsNot(a.texture, c.texture)
+        self.assertEqual(len(manager), 2)
+        self.assertEqual(manager.loads, 2)
+
+    def test_texture_is_deleted_with_last_reference(self):
+        manager = TextureManager(factory=FakeTexture)
+        a = manager.acquire(1, "a.png")
+        b = manager.acquire(1, "a.png")
+        a.release()
+        self.assertTrue(b.texture.loaded)
+        b.release()
+        self.assertFalse(b.texture.loaded)
+        self.assertEqual(len(manager), 0)
+        self.assertEqual(manager.used, 0)
+
+    def test_least_recently_bound_texture_is_evicted(self):
+        evicted = []
+        manager = TextureManager(budget=250, factory=FakeTexture,
+                                 on_evict=evicted.append)
+        a = manager.acquire(1, "a.png")
+        b = manager.acquire(1, "b.png")
+        a.bind(0)
+        c = manager.acquire(1, "c.png")
+        self.assertEqual([t.filename for t in evicted], ["b.png"])
+        self.assertTrue(a.resident)
+        self.assertFalse(b.resident)
+        self.assertTrue(c.resident)
+        self.assertEqual(manager.used, 200)
+
+    def test_evicted_texture_is_reloaded_on_bind(self):
+        reloaded = []
+        manager = TextureManager(budget=100, factory=FakeTexture,
+                                 on_reload=reloaded.append)
+        a = manager.acquire(1, "a.png")
+        b = manager.acquire(1, "b.png")
+        self.assertFalse(a.resident)
+        a.bind(0)
+        self.assertTrue(a.resident)
+        self.assertFalse(b.resident)
+        self.assertEqual(a.texture.bound, 1)
+        self.assertEqual(reloaded, [a.texture])
+        self.assertEqual(manager.evictions, 2)
+
+    def test_release_is_idempotent(self):
+        manager = TextureManager(factory=FakeTexture)
+        a = manager.acquire(1, "a.png")
+        b = manager.acquire(1, "a.png")
+        a.release()
+        a.release()
+        self.assertTrue(b.texture.loaded)
+        self.assertEqual(len(manager), 1)
+        b.release()
+        with self.assertRaises(TextureReleasedError):
+            b.bind(0)
+        self.assertFalse(b.texture.loaded)
+        self.assertEqual(manager.loads, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
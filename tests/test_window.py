@@ -0,0 +1,143 @@
+import unittest
+
+import numpy as np
+
+from window import Application, FixedTimestep, InputQueue, Runner, StateBuffer, UpdateThread
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeBackend:
+
+    def __init__(self):
+        self.swaps = 0
+
+    def swap_buffers(self):
+        self.swaps += 1
+
+
+class Mover(Application):
+
+    step = 0.1
+
+    def __init__(self):
+        self.position = 0.0
+        self.updates = 0
+        self.rendered = []
+
+    def on_update(self, dt):
+        self.position += dt
+        self.updates += 1
+
+    def get_state(self):
+        return np.array([self.position])
+
+    def on_render(self, state):
+        self.rendered.append(float(state[0]))
+
+
+class FixedTimestepTest(unittest.TestCase):
+
+    def test_steps_do_not_depend_on_frame_rate(self):
+        for frame_time in (0.01, 0.03, 0.07):
+            clock = FakeClock()
+            timestep = FixedTimestep(0.1, clock=clock)
+            steps = []
+            timestep.advance(steps.append)
+            while clock.now < 1.0 - 1e-9:
+                clock.now = min(1.0, clock.now + frame_time)
+                timestep.advance(steps.append)
+            self.assertIn(len(steps), (9, 10))
+
+    def test_slow_frame_is_clamped(self):
+        clock = FakeClock()
+        timestep = FixedTimestep(0.1, max_steps=3, clock=clock)
+        steps = []
+        timestep.advance(steps.append)
+        clock.now = 10.0
+        alpha = timestep.advance(steps.append)
+        self.assertEqual(len(steps), 3)
+        self.assertLessEqual(alpha, 1.0)
+
+
+class RunnerTest(unittest.TestCase):
+
+    def test_rendered_state_is_interpolated(self):
+        clock = FakeClock()
+        app, backend = Mover(), FakeBackend()
+        runner = Runner(app, backend, clock=clock)
+        runner.states.publish(app.get_state())
+        runner.frame()
+        clock.now = 0.25
+        runner.frame()
+        self.assertEqual(app.updates, 2)
+        self.assertAlmostEqual(app.rendered[-1], 0.15)
+        self.assertEqual(backend.swaps, 2)
+
+    def test_interpolation_of_nested_states(self):
+        app = Application()
+        state = app.interpolate((1.0, np.array([0.0, 2.0]), "tag"),
+                                (3.0, np.array([2.0, 4.0]), "tag"), 0.5)
+        self.assertEqual(state[0], 2.0)
+        np.testing.assert_allclose(state[1], [1.0, 3.0])
+        self.assertEqual(state[2], "tag")
+
+
+class Typist(Application):
+    """ Advances fake clock by one step per update and records keys seen before every step """
+
+    step = 0.1
+
+    def __init__(self, clock, steps):
+        self.clock = clock
+        self.steps = steps
+        self.thread = None
+        self.keys = []
+        self.seen = []
+
+    def on_keyboard(self, key):
+        self.keys.append(key)
+
+    def on_update(self, dt):
+        self.seen.append(list(self.keys))
+        self.clock.now += dt
+        if len(self.seen) == 3:
+            self.clock.now += 1.0  # falls far behind, must not try to catch up
+        if len(self.seen) == self.steps:
+            self.thread.stop()
+
+
+class UpdateThreadTest(unittest.TestCase):
+
+    def test_steps_and_input_delivery(self):
+        clock = FakeClock()
+        app = Typist(clock, steps=6)
+        inputs = InputQueue()
+        inputs.push('on_keyboard', 'a')
+        inputs.push('on_keyboard', 'b')
+        app.thread = UpdateThread(app, StateBuffer(clock), clock, inputs)
+        app.thread.start()
+        app.thread.join(5.0)
+        self.assertFalse(app.thread.is_alive())
+        self.assertEqual(len(app.seen), 6)
+        self.assertEqual(app.seen[0], ['a', 'b'])
+        self.assertEqual(len(inputs), 0)
+
+    def test_threaded_runner_queues_input(self):
+        app = Typist(FakeClock(), steps=0)
+        runner = Runner(app, FakeBackend(), threaded=True)
+        runner.on_keyboard('x')
+        self.assertEqual(app.keys, [])
+        runner.inputs.deliver(app)
+        self.assertEqual(app.keys, ['x'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,42 +1,181 @@
+import io
 import sys
-from scipy import misc
+from functools import partial
+from contextlib import contextmanager
+
+import numpy as np
 from OpenGL.GL import *
 
+import mipmap
+import assetpack
+
+
+RESIDENCY_KEEP = 'keep'
+RESIDENCY_DROP = 'drop'
+RESIDENCY_RELOAD = 'reload'
+
+FORMATS = {3: GL_RGB, 4: GL_RGBA}
+
+# prebuilt mipmap chains produced by assetc
+MIP_EXTENSION = '.mip'
+
+
+def read_image(filename: str, rgba: bool=True, pack=None):
+    """ Decodes image file into (height, width, channels) array of unsigned bytes.
+
+    Images are converted to RGBA unless `rgba` is False, in which case RGB
+    and RGBA images are returned as they are stored in file. If asset pack
+    is given, file is read from it.
+
+    Doesn't touch OpenGL, so can be safely called from worker threads.
+    """
+    from PIL import Image  # imported on first use, it is slow to import
+    source = filename if pack is None else io.BytesIO(pack.read(filename))
+    with Image.open(source) as image:
+        if rgba or image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        return np.asarray(image)
+
+
+def pixel_format(image):
+    """ Returns OpenGL format of pixel data stored in (height, width, channels) array """
+    return FORMATS[image.shape[2]]
+
+
+def unpack_alignment(row_bytes: int):
+    """ Returns largest valid GL_UNPACK_ALIGNMENT for rows of given length """
+    for alignment in (8, 4, 2):
+        if row_bytes % alignment == 0:
+            return alignment
+    return 1
+
+
+@contextmanager
+def unpack_alignment_for(row_bytes: int):
+    """ Sets GL_UNPACK_ALIGNMENT for rows of given length, restores default 4 afterwards """
+    glPixelStorei(GL_UNPACK_ALIGNMENT, unpack_alignment(row_bytes))
+    try:
+        yield
+    finally:
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 4)
+
 
 class Texture:
     """ Simple wrapper over bytes array representing image.
 
     Reads texture from file system and prepares it to work with OpenGL.
+
+    When `mipmaps` is True, full mipmap chain is built on CPU with specified
+    filter ('box' or 'kaiser') and optionally block compressed ('bc1' or
+    'bc3'). Prebuilt chains are taken from `cache` (MipCache) if given.
+    Files with .mip extension are chains compiled by assetc and are always
+    uploaded as they are. Image is read from asset `pack` instead of file
+    system if given.
+
+    Residency policy defines what happens with CPU copy of image after it
+    is uploaded: RESIDENCY_KEEP retains it in `blob`, RESIDENCY_DROP frees
+    it, and RESIDENCY_RELOAD frees it but lets `pixels` decode it again.
     """
 
-    def __init__(self, target, filename: str):
+    def __init__(self, target, filename: str, mipmaps: bool=False,
+                 mip_filter: str='box', srgb: bool=True, compression: str=None,
+                 cache: mipmap.MipCache=None, residency: str=RESIDENCY_DROP, pack=None):
         self.target = target
         self.filename = filename
+        self.mipmaps = mipmaps
+        self.mip_filter = mip_filter
+        self.srgb = srgb
+        self.compression = compression
+        self.cache = cache
+        self.residency = residency
+        self.pack = pack
         self.texture_obj = None
         self.image = None
         self.blob = None
+        self.width = 0
+        self.height = 0
+        self._nbytes = 0
 
     @property
     def ready(self):
-        return self.blob and self.texture_obj
+        return self.texture_obj is not None
+
+    @property
+    def nbytes(self):
+        """ Estimated amount of GPU memory occupied by texture """
+        return self._nbytes
 
     def load(self):
+        if self.mipmaps or self.filename.endswith(MIP_EXTENSION):
+            return self._load_mip_chain()
+
         try:
-            self.blob = misc.imread(self.filename)
+            blob = read_image(self.filename, rgba=False, pack=self.pack)
         except Exception as e:
             print("Error occurred: " + str(e), file=sys.stderr)
             return False
 
-        self.texture_obj = glGenTextures(1)  # generate one texture
-        h, w, _ = self.blob.shape
+        # decoded array is already contiguous, so it is passed without copying
+        blob = np.ascontiguousarray(blob)
+        fmt = pixel_format(blob)
+        self.texture_obj = int(glGenTextures(1))  # generate one texture
+        h, w, channels = blob.shape
+        self.width, self.height = w, h
+        self._nbytes = w * h * 4
         glBindTexture(self.target, self.texture_obj)
-        glTexImage2D(self.target, 0, GL_RGBA, w, h, 0, GL_RGBA, GL_UNSIGNED_BYTE, self.blob.flatten())
+        with unpack_alignment_for(blob.strides[0]):
+            glTexImage2D(self.target, 0, fmt, w, h, 0, fmt, GL_UNSIGNED_BYTE, blob)
         glTexParameterf(self.target, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
         glTexParameterf(self.target, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
         glBindTexture(self.target, 0)
+        self.blob = blob if self.residency == RESIDENCY_KEEP else None
+        return True
+
+    def pixels(self):
+        """ Returns CPU copy of level 0 image, or None if it was dropped """
+        if self.blob is not None:
+            return self.blob
+        if self.residency == RESIDENCY_RELOAD:
+            return read_image(self.filename, rgba=False, pack=self.pack)
+        return None
+
+    def _load_mip_chain(self):
+        try:
+            if self.filename.endswith(MIP_EXTENSION):
+                chain = mipmap.unpack_chain(bytes(assetpack.read_bytes(self.filename, self.pack)))
+            else:
+                chain = mipmap.load_or_build(
+                    self.filename, partial(read_image, pack=self.pack), self.cache,
+                    self.mip_filter, self.srgb, self.compression,
+                    read=partial(assetpack.read_bytes, pack=self.pack))
+        except Exception as e:
+            print("Error occurred: " + str(e), file=sys.stderr)
+            return False
+
+        self.texture_obj = int(glGenTextures(1))
+        self.width, self.height = chain.levels[0].width, chain.levels[0].height
+        self._nbytes = sum(len(level.data) for level in chain.levels)
+        glBindTexture(self.target, self.texture_obj)
+        for i, level in enumerate(chain.levels):
+            if chain.compression:
+                glCompressedTexImage2D(self.target, i, mipmap.COMPRESSION_FORMATS[chain.compression],
+                                       level.width, level.height, 0, len(level.data), level.data)
+            else:
+                glTexImage2D(self.target, i, GL_RGBA, level.width, level.height,
+                             0, GL_RGBA, GL_UNSIGNED_BYTE, level.data)
+        glTexParameteri(self.target, GL_TEXTURE_MAX_LEVEL, len(chain.levels) - 1)
+        glTexParameterf(self.target, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
+        glTexParameterf(self.target, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glBindTexture(self.target, 0)
         return True
 
     def bind(self, texture_unit):
         """ Enables specified texture unit and binds current texture """
         glActiveTexture(texture_unit)
         glBindTexture(self.target, self.texture_obj)
+
+    def dispose(self):
+        """ Deletes texture object created earlier """
+        if self.texture_obj is not None:
+            glDeleteTextures([self.texture_obj])
+            self.texture_obj = None
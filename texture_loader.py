@@ -0,0 +1,218 @@
+"""
+Asynchronous texture loading.
+
+Images are decoded by a pool of worker threads, while uploading to the GPU
+happens on the rendering thread through a staging pixel buffer object, a
+limited number of bytes per frame. Texture storage is allocated only when
+image reaches the head of upload queue.
+"""
+
+import sys
+import ctypes
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from OpenGL.GL import *
+
+from texture import read_image, pixel_format, unpack_alignment_for
+
+
+class TextureHandle:
+    """ Future-like reference to texture which is still being loaded.
+
+    Until upload is finished, binds placeholder texture instead of
+    the requested one.
+    """
+
+    def __init__(self, target, filename: str, future, placeholder):
+        self.target = target
+        self.filename = filename
+        self.texture_obj = None
+        self.error = None
+        self._future = future
+        self._placeholder = placeholder
+
+    @property
+    def ready(self):
+        return self.texture_obj is not None
+
+    def done(self):
+        """ Returns True if texture is uploaded or its loading has failed """
+        return self.ready or self.error is not None
+
+    def bind(self, texture_unit):
+        """ Enables specified texture unit and binds texture or placeholder """
+        glActiveTexture(texture_unit)
+        if self.texture_obj is not None:
+            glBindTexture(self.target, self.texture_obj)
+        else:
+            glBindTexture(self.target, self._placeholder)
+
+
+class _Upload:
+    """ State of texture which is being copied to GPU slice by slice """
+
+    def __init__(self, handle, image):
+        self.handle = handle
+        self.image = np.ascontiguousarray(image)
+        self.format = pixel_format(self.image)
+        self.row = 0
+        self.texture_obj = None
+
+    @property
+    def height(self):
+        return self.image.shape[0]
+
+    @property
+    def width(self):
+        return self.image.shape[1]
+
+    @property
+    def row_bytes(self):
+        return self.image.strides[0]
+
+
+class AsyncTextureLoader:
+    """ Decodes textures in thread pool and uploads them in bounded slices.
+
+    Method `update` should be called once per frame from the thread which
+    owns OpenGL context; it uploads not more than `bytes_per_frame` bytes
+    of pixel data (at least one row of a pending image). Slices are staged
+    in single pixel buffer of `bytes_per_frame` size, which is orphaned
+    every frame.
+    """
+
+    placeholder_color = (255, 0, 255, 255)
+
+    def __init__(self, max_workers: int=4, bytes_per_frame: int=4 * 1024 * 1024):
+        self.bytes_per_frame = bytes_per_frame
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._decoding = deque()
+        self._uploading = deque()
+        self._placeholder = None
+        self._pbo = None
+        self._pbo_size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    @property
+    def pending(self):
+        return len(self._decoding) + len(self._uploading)
+
+    def load(self, target, filename: str) -> TextureHandle:
+        """ Schedules texture decoding and returns handle to it """
+        if self._placeholder is None:
+            self._placeholder = self._create_placeholder(target)
+        future = self._executor.submit(read_image, filename, False)
+        handle = TextureHandle(target, filename, future, self._placeholder)
+        self._decoding.append(handle)
+        return handle
+
+    def update(self) -> int:
+        """ Uploads next portion of decoded images and returns number of bytes sent """
+        self._collect_decoded()
+        budget = self.bytes_per_frame
+        sent = 0
+        while self._uploading and sent < budget:
+            upload = self._uploading[0]
+            if upload.texture_obj is None:
+                self._allocate(upload)
+            sent += self._upload_slice(upload, budget - sent, sent)
+            if upload.row >= upload.height:
+                self._finish(upload)
+                self._uploading.popleft()
+        return sent
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+        for upload in self._uploading:
+            if upload.texture_obj is not None:
+                glDeleteTextures([upload.texture_obj])
+        self._uploading.clear()
+        self._decoding.clear()
+        if self._pbo is not None:
+            glDeleteBuffers(1, [self._pbo])
+            self._pbo, self._pbo_size = None, 0
+        if self._placeholder is not None:
+            glDeleteTextures([self._placeholder])
+            self._placeholder = None
+
+    def _collect_decoded(self):
+        still_decoding = deque()
+        for handle in self._decoding:
+            future = handle._future
+            if not future.done():
+                still_decoding.append(handle)
+                continue
+            try:
+                image = future.result()
+            except Exception as e:
+                handle.error = e
+                print("Error occurred: " + str(e), file=sys.stderr)
+                continue
+            self._uploading.append(_Upload(handle, image))
+        self._decoding = still_decoding
+
+    def _allocate(self, upload: _Upload):
+        target = upload.handle.target
+        upload.texture_obj = int(glGenTextures(1))
+        glBindTexture(target, upload.texture_obj)
+        glTexImage2D(target, 0, upload.format, upload.width, upload.height,
+                     0, upload.format, GL_UNSIGNED_BYTE, None)
+        glBindTexture(target, 0)
+
+    def _bind_staging(self, offset: int, size: int):
+        """ Binds staging buffer which has room for `size` bytes at `offset`.
+
+        Buffer is orphaned at first slice of a frame, so writing doesn't wait
+        for uploads of previous frame; it grows only if a single row exceeds
+        the budget.
+        """
+        if self._pbo is None:
+            self._pbo = int(glGenBuffers(1))
+        glBindBuffer(GL_PIXEL_UNPACK_BUFFER, self._pbo)
+        if offset == 0 or offset + size > self._pbo_size:
+            self._pbo_size = max(self._pbo_size, self.bytes_per_frame, offset + size)
+            glBufferData(GL_PIXEL_UNPACK_BUFFER, self._pbo_size, None, GL_STREAM_DRAW)
+
+    def _upload_slice(self, upload: _Upload, budget: int, offset: int) -> int:
+        rows = max(1, budget // upload.row_bytes)
+        rows = min(rows, upload.height - upload.row)
+        first, last = upload.row, upload.row + rows
+        data = upload.image[first:last]
+
+        self._bind_staging(offset, data.nbytes)
+        glBufferSubData(GL_PIXEL_UNPACK_BUFFER, offset, data.nbytes, data)
+        glBindTexture(upload.handle.target, upload.texture_obj)
+        with unpack_alignment_for(upload.row_bytes):
+            glTexSubImage2D(upload.handle.target, 0, 0, first, upload.width, rows,
+                            upload.format, GL_UNSIGNED_BYTE, ctypes.c_void_p(offset))
+        glBindTexture(upload.handle.target, 0)
+        glBindBuffer(GL_PIXEL_UNPACK_BUFFER, 0)
+
+        upload.row = last
+        return data.nbytes
+
+    def _finish(self, upload: _Upload):
+        target = upload.handle.target
+        glBindTexture(target, upload.texture_obj)
+        glTexParameterf(target, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameterf(target, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glBindTexture(target, 0)
+        upload.handle.texture_obj = upload.texture_obj
+
+    def _create_placeholder(self, target):
+        """ Creates 1x1 texture of solid color shown while real one is loading """
+        pixel = np.array(self.placeholder_color, dtype=np.uint8)
+        texture_obj = glGenTextures(1)
+        glBindTexture(target, texture_obj)
+        glTexImage2D(target, 0, GL_RGBA, 1, 1, 0, GL_RGBA, GL_UNSIGNED_BYTE, pixel)
+        glTexParameterf(target, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameterf(target, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glBindTexture(target, 0)
+        return texture_obj
@@ -0,0 +1,147 @@
+"""
+Registry of shared textures with reference counting and GPU memory budget.
+"""
+
+from collections import OrderedDict
+
+from texture import Texture
+
+
+class TextureLoadError(Exception):
+    pass
+
+
+class TextureReleasedError(Exception):
+    pass
+
+
+class _Entry:
+
+    def __init__(self, key, texture):
+        self.key = key
+        self.texture = texture
+        self.ref_count = 0
+        self.nbytes = 0
+        self.resident = False
+
+
+class ManagedTexture:
+    """ Reference to texture owned by manager.
+
+    Binding marks texture as recently used and transparently reloads it
+    if it was evicted from GPU memory. Released reference cannot be bound.
+    """
+
+    def __init__(self, manager, entry):
+        self._manager = manager
+        self._entry = entry
+        self._released = False
+
+    @property
+    def texture(self):
+        return self._entry.texture
+
+    @property
+    def resident(self):
+        return self._entry.resident
+
+    @property
+    def released(self):
+        return self._released
+
+    def bind(self, texture_unit):
+        if self._released:
+            raise TextureReleasedError("texture is released: %s" % self._entry.texture.filename)
+        self._manager.touch(self._entry)
+        self._entry.texture.bind(texture_unit)
+
+    def release(self):
+        """ Drops this reference; does nothing if it was already released """
+        if self._released:
+            return
+        self._released = True
+        self._manager.release(self)
+
+
+class TextureManager:
+    """ Deduplicates textures by path and parameters and limits GPU memory usage.
+
+    When total size of resident textures exceeds `budget` bytes, the least
+    recently bound ones are evicted (deleted from GPU) but kept in registry
+    while they are referenced, so they could be reloaded on next bind.
+
+    Hooks `on_evict(texture)` and `on_reload(texture)` are called after
+    texture is evicted and before it is loaded again.
+    """
+
+    def __init__(self, budget: int=512 * 1024 * 1024, factory=Texture,
+                 on_evict=None, on_reload=None):
+        self.budget = budget
+        self.used = 0
+        self.loads = 0
+        self.evictions = 0
+        self._factory = factory
+        self._on_evict = on_evict
+        self._on_reload = on_reload
+        self._entries = {}
+        self._lru = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def acquire(self, target, filename: str, **params) -> ManagedTexture:
+        """ Returns shared texture loading it if needed """
+        key = (target, filename, tuple(sorted(params.items())))
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = _Entry(key, self._factory(target, filename, **params))
+            self._load(entry)
+            self._entries[key] = entry
+        entry.ref_count += 1
+        return ManagedTexture(self, entry)
+
+    def release(self, managed: ManagedTexture):
+        """ Drops one reference; texture is deleted when nobody uses it """
+        entry = managed._entry
+        entry.ref_count -= 1
+        if entry.ref_count > 0:
+            return
+        if entry.resident:
+            self._unload(entry)
+        del self._entries[entry.key]
+
+    def touch(self, entry: _Entry):
+        """ Marks texture as most recently used, reloading it if evicted """
+        if entry.resident:
+            self._lru.move_to_end(entry.key)
+            return
+        if self._on_reload is not None:
+            self._on_reload(entry.texture)
+        self._load(entry)
+
+    def trim(self, budget: int=None):
+        """ Evicts least recently used textures until usage fits into budget """
+        budget = self.budget if budget is None else budget
+        while self.used > budget and len(self._lru) > 1:
+            key = next(iter(self._lru))
+            entry = self._entries[key]
+            self._unload(entry)
+            self.evictions += 1
+            if self._on_evict is not None:
+                self._on_evict(entry.texture)
+
+    def _load(self, entry: _Entry):
+        if not entry.texture.load():
+            raise TextureLoadError("cannot load texture: %s" % entry.texture.filename)
+        entry.nbytes = entry.texture.nbytes
+        entry.resident = True
+        self.used += entry.nbytes
+        self.loads += 1
+        self._lru[entry.key] = entry
+        self.trim()
+
+    def _unload(self, entry: _Entry):
+        entry.texture.dispose()
+        entry.resident = False
+        self.used -= entry.nbytes
+        del self._lru[entry.key]
@@ -7,6 +7,7 @@ import OpenGL.GL as gl
 import OpenGL.GLUT as glut
 from pipeline import Pipeline, ProjParams
 from camera import Camera
+from scheduler import FrameScheduler
 
 
 vertex_code, fragment_code = None, None
@@ -16,14 +17,32 @@ camera_target = [0.0, -0.5, 1.0]  # "look at" direction
 camera_up = [0.0, 1.0, 0.0]  # camera vertical axis
 WINDOW_WIDTH, WINDOW_HEIGHT = 1920, 1200
 CAMERA = Camera(camera_pos, camera_target, camera_up, WINDOW_WIDTH, WINDOW_HEIGHT)
+SCHEDULER = FrameScheduler(60.0)
 
 
 def tiny_glut(args):
     global vertex_code, fragment_code
     scale = 0.01
+    timer_pending = False
+
+    def request_redisplay():
+        nonlocal timer_pending
+        delay = SCHEDULER.delay()
+        if timer_pending or delay is None:
+            return
+        timer_pending = True
+        glut.glutTimerFunc(int(delay * 1000), on_timer, 0)
+
+    def on_timer(value):
+        nonlocal timer_pending
+        timer_pending = False
+        glut.glutPostRedisplay()
 
     def display():
+        SCHEDULER.begin_frame()
         CAMERA.render()
+        if CAMERA.moving:
+            SCHEDULER.invalidate()
         gl.glClear(gl.GL_COLOR_BUFFER_BIT)
 
         nonlocal scale
@@ -43,10 +62,12 @@ def tiny_glut(args):
         gl.glUniformMatrix4fv(world_location, 1, gl.GL_TRUE, pipeline.get_wvp())
         gl.glDrawElements(gl.GL_TRIANGLES, 18, gl.GL_UNSIGNED_INT, ctypes.c_void_p(0))
         glut.glutSwapBuffers()
-        # glut.glutPostRedisplay()
+        request_redisplay()
 
     def mouse(x, y):
         CAMERA.mouse(x, y)
+        SCHEDULER.invalidate()
+        request_redisplay()
 
     def keyboard(key, x, y):
         if key == glut.GLUT_KEY_F1:
@@ -55,6 +76,8 @@ def tiny_glut(args):
             CAMERA.setup()
         else:
             CAMERA.keyboard(key)
+        SCHEDULER.invalidate()
+        request_redisplay()
 
     glut.glutInit(args)
     glut.glutInitDisplayMode(glut.GLUT_DOUBLE | glut.GLUT_RGBA | glut.GLUT_3_2_CORE_PROFILE)
@@ -66,7 +89,7 @@ def tiny_glut(args):
 
     # callbacks initialization
     glut.glutDisplayFunc(display)
-    glut.glutIdleFunc(display)
+    SCHEDULER.start_animation("rotation")
     # glut.glutKeyboardFunc(keyboard)
     glut.glutPassiveMotionFunc(mouse)
     glut.glutSpecialFunc(keyboard)
@@ -0,0 +1,377 @@
+"""
+Backend agnostic window layer.
+
+Application logic is split into fixed timestep simulation (`on_update`)
+and rendering of interpolated state (`on_render`), so frame rate doesn't
+change simulation speed and slow simulation steps don't stall rendering
+when simulation runs on its own thread. In that case input events are
+queued and delivered on simulation thread before the next step, so
+application handlers never run concurrently with `on_update`.
+
+Backends (GLUT, GLFW, Qt) only create window and OpenGL context, deliver
+input events and call `Runner.frame` when next frame should be drawn.
+Note that key codes are passed as they come from backend.
+"""
+
+import sys
+import time
+import threading
+from collections import deque
+
+import numpy as np
+
+from callback import WindowCallback
+from scheduler import FrameScheduler
+
+
+class Application(WindowCallback):
+    """ Base class for programs which can be run by any backend.
+
+    Simulation state returned by `get_state` should be a snapshot (not
+    mutated later by `on_update`), because it is handed to rendering
+    thread when simulation is threaded.
+    """
+
+    step = 1.0 / 60.0
+
+    def on_init(self):
+        """ Called once OpenGL context is created """
+        pass
+
+    def on_update(self, dt):
+        pass
+
+    def get_state(self):
+        return None
+
+    def interpolate(self, previous, current, alpha):
+        """ Blends two simulation states; numbers and arrays are interpolated linearly """
+        if previous is None:
+            return current
+        if isinstance(current, (int, float, np.ndarray)):
+            return previous + (current - previous) * alpha
+        if isinstance(current, (tuple, list)):
+            return type(current)(self.interpolate(p, c, alpha) for p, c in zip(previous, current))
+        return current
+
+    def on_render(self, state):
+        pass
+
+
+class FixedTimestep:
+    """ Converts variable frame time into fixed number of simulation steps.
+
+    At most `max_steps` steps are done per frame, so slow simulation
+    slows down instead of freezing rendering completely.
+    """
+
+    def __init__(self, step: float, max_steps: int=5, clock=time.perf_counter):
+        self.step = step
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self._clock = clock
+        self._last = None
+
+    def advance(self, update) -> float:
+        """ Runs due steps and returns interpolation factor between last two states """
+        now = self._clock()
+        if self._last is not None:
+            self.accumulator += now - self._last
+        self._last = now
+        steps = 0
+        while self.accumulator >= self.step and steps < self.max_steps:
+            update(self.step)
+            self.accumulator -= self.step
+            steps += 1
+        if steps == self.max_steps:
+            self.accumulator = min(self.accumulator, self.step)
+        return self.accumulator / self.step
+
+
+class StateBuffer:
+    """ Keeps two last simulation states with the time the last one was published """
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._previous = None
+        self._current = None
+        self._time = None
+
+    def publish(self, state):
+        now = self._clock()
+        with self._lock:
+            self._previous, self._current, self._time = self._current, state, now
+
+    def sample(self):
+        with self._lock:
+            return self._previous, self._current, self._time
+
+
+class InputQueue:
+    """ Input events pushed by backend thread and delivered to application by simulation thread """
+
+    def __init__(self):
+        self._events = deque()  # append and popleft are atomic
+
+    def __len__(self):
+        return len(self._events)
+
+    def push(self, handler: str, *args):
+        """ Queues call of application handler, e.g. push('on_keyboard', key) """
+        self._events.append((handler, args))
+
+    def deliver(self, app: Application):
+        """ Calls handlers of all queued events in order they came """
+        while True:
+            try:
+                handler, args = self._events.popleft()
+            except IndexError:
+                return
+            getattr(app, handler)(*args)
+
+
+class UpdateThread(threading.Thread):
+    """ Runs application simulation with fixed timestep on its own thread.
+
+    Events of `inputs` queue are delivered before every step.
+    """
+
+    def __init__(self, app: Application, states: StateBuffer, clock=time.perf_counter,
+                 inputs: InputQueue=None):
+        super(UpdateThread, self).__init__(daemon=True)
+        self.app = app
+        self.states = states
+        self.inputs = inputs if inputs is not None else InputQueue()
+        self._clock = clock
+        self._stopped = threading.Event()
+
+    def stop(self):
+        """ Stops simulation; waits for the thread unless called from it (e.g. by on_update) """
+        self._stopped.set()
+        if threading.current_thread() is not self:
+            self.join()
+
+    def run(self):
+        step = self.app.step
+        deadline = self._clock()
+        while not self._stopped.is_set():
+            self.inputs.deliver(self.app)
+            self.app.on_update(step)
+            self.states.publish(self.app.get_state())
+            deadline += step
+            delay = deadline - self._clock()
+            if delay > 0:
+                self._stopped.wait(delay)
+            elif delay < -step * 5:
+                # too far behind, don't try to catch up
+                deadline = self._clock()
+
+
+class Runner:
+    """ Glues application, backend and simulation loop together """
+
+    def __init__(self, app: Application, backend, threaded: bool=False,
+                 fps: float=60.0, clock=time.perf_counter):
+        self.app = app
+        self.backend = backend
+        self.threaded = threaded
+        self.scheduler = FrameScheduler(fps, clock)
+        self.states = StateBuffer(clock)
+        self.timestep = FixedTimestep(app.step, clock=clock)
+        self.inputs = InputQueue()
+        self._clock = clock
+        self._thread = None
+
+    def run(self, size=(1024, 768), title: str='Default Title'):
+        self.backend.create(self, size, title)
+        self.app.on_init()
+        self.states.publish(self.app.get_state())
+        self.scheduler.start_animation('simulation')
+        if self.threaded:
+            self._thread = UpdateThread(self.app, self.states, self._clock, self.inputs)
+            self._thread.start()
+        try:
+            self.backend.main_loop()
+        finally:
+            if self._thread is not None:
+                self._thread.stop()
+                self._thread = None
+
+    def _update(self, dt):
+        self.app.on_update(dt)
+        self.states.publish(self.app.get_state())
+
+    def alpha(self):
+        """ Interpolation factor for threaded simulation """
+        _, _, published = self.states.sample()
+        if published is None:
+            return 1.0
+        return min(1.0, max(0.0, (self._clock() - published) / self.app.step))
+
+    def frame(self):
+        self.scheduler.begin_frame()
+        if self.threaded:
+            alpha = self.alpha()
+        else:
+            alpha = self.timestep.advance(self._update)
+        previous, current, _ = self.states.sample()
+        self.app.on_render(self.app.interpolate(previous, current, alpha))
+        self.backend.swap_buffers()
+
+    def on_keyboard(self, key):
+        self._input('on_keyboard', key)
+
+    def on_mouse(self, x, y):
+        self._input('on_mouse', x, y)
+
+    def _input(self, handler, *args):
+        if self.threaded:
+            self.inputs.push(handler, *args)
+        else:
+            getattr(self.app, handler)(*args)
+        self.scheduler.invalidate()
+
+
+class GlutBackend:
+
+    def __init__(self):
+        self._runner = None
+        self._timer_pending = False
+
+    def create(self, runner: Runner, size, title):
+        from OpenGL import GLUT as glut
+        self._glut = glut
+        self._runner = runner
+        glut.glutInit(sys.argv[1:])
+        glut.glutInitDisplayMode(glut.GLUT_DOUBLE | glut.GLUT_RGBA | glut.GLUT_3_2_CORE_PROFILE)
+        glut.glutInitWindowSize(*size)
+        glut.glutCreateWindow(title.encode())
+        glut.glutDisplayFunc(self._display)
+        glut.glutPassiveMotionFunc(runner.on_mouse)
+        glut.glutSpecialFunc(lambda key, x, y: runner.on_keyboard(key))
+
+    def _display(self):
+        self._runner.frame()
+        self._schedule()
+
+    def _schedule(self):
+        delay = self._runner.scheduler.delay()
+        if self._timer_pending or delay is None:
+            return
+        self._timer_pending = True
+        self._glut.glutTimerFunc(int(delay * 1000), self._on_timer, 0)
+
+    def _on_timer(self, value):
+        self._timer_pending = False
+        self._glut.glutPostRedisplay()
+
+    def swap_buffers(self):
+        self._glut.glutSwapBuffers()
+
+    def main_loop(self):
+        self._glut.glutMainLoop()
+
+
+class GlfwBackend:
+
+    def __init__(self):
+        self._runner = None
+        self._window = None
+
+    def create(self, runner: Runner, size, title):
+        import glfw
+        self._glfw = glfw
+        self._runner = runner
+        if not glfw.glfwInit():
+            raise RuntimeError("cannot initialize GLFW")
+        glfw.glfwWindowHint(glfw.GLFW_CONTEXT_VERSION_MAJOR, 3)
+        glfw.glfwWindowHint(glfw.GLFW_CONTEXT_VERSION_MINOR, 2)
+        glfw.glfwWindowHint(glfw.GLFW_OPENGL_FORWARD_COMPAT, 1)
+        glfw.glfwWindowHint(glfw.GLFW_OPENGL_PROFILE, glfw.GLFW_OPENGL_CORE_PROFILE)
+        width, height = size
+        self._window = glfw.glfwCreateWindow(width, height, title.encode())
+        glfw.glfwMakeContextCurrent(self._window)
+        glfw.glfwSetCursorPosCallback(
+            self._window, lambda window, x, y: runner.on_mouse(int(x), int(y)))
+        glfw.glfwSetKeyCallback(
+            self._window, lambda window, key, scancode, action, mods:
+            runner.on_keyboard(key) if action != glfw.GLFW_RELEASE else None)
+
+    def swap_buffers(self):
+        self._glfw.glfwSwapBuffers(self._window)
+
+    def main_loop(self):
+        glfw = self._glfw
+        try:
+            while not glfw.glfwWindowShouldClose(self._window):
+                glfw.glfwPollEvents()
+                if not self._runner.scheduler.wait():
+                    glfw.glfwWaitEvents()
+                    continue
+                self._runner.frame()
+        finally:
+            glfw.glfwDestroyWindow(self._window)
+            glfw.glfwTerminate()
+
+
+class QtBackend:
+
+    def __init__(self):
+        self._runner = None
+        self._app = None
+        self._widget = None
+
+    def create(self, runner: Runner, size, title):
+        from PyQt4 import QtGui
+        from PyQt4.QtOpenGL import QGLWidget
+        from PyQt4.QtCore import QTimer
+
+        class Widget(QGLWidget):
+
+            def paintGL(widget):
+                runner.frame()
+                delay = runner.scheduler.delay()
+                if delay is not None and not timer.isActive():
+                    timer.start(int(delay * 1000))
+
+            def mouseMoveEvent(widget, event):
+                runner.on_mouse(event.x(), event.y())
+                widget.update()
+
+            def keyPressEvent(widget, event):
+                runner.on_keyboard(event.key())
+                widget.update()
+
+        self._runner = runner
+        self._app = QtGui.QApplication.instance() or QtGui.QApplication(sys.argv)
+        self._widget = Widget()
+        self._widget.setMouseTracking(True)
+        self._widget.setWindowTitle(title)
+        self._widget.resize(*size)
+        timer = QTimer(self._widget)
+        timer.setSingleShot(True)
+        timer.timeout.connect(self._widget.updateGL)
+        self._widget.show()
+        self._widget.makeCurrent()
+
+    def swap_buffers(self):
+        # QGLWidget swaps buffers itself after paintGL
+        pass
+
+    def main_loop(self):
+        self._app.exec_()
+
+
+BACKENDS = {
+    'glut': GlutBackend,
+    'glfw': GlfwBackend,
+    'qt': QtBackend,
+}
+
+
+def run(app: Application, backend: str='glut', threaded: bool=False, **params):
+    """ Creates window with specified backend and runs application in it """
+    runner = Runner(app, BACKENDS[backend](), threaded, params.pop('fps', 60.0))
+    runner.run(**params)
+    return runner